@@ -0,0 +1,60 @@
+from fastapi import Request, Response, status
+from typing import Optional, Sequence
+import hashlib
+import sys
+import os
+
+# Tilføj projektets rodmappe til Python's path, så vi kan importere fra src
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import APP_VERSION
+from src.data.async_db import AsyncDatabase
+from src.data.changes import get_change_versions
+from api.negotiation import msgpack_requested
+
+def make_etag(request: Request, versions: Sequence[int]) -> str:
+    """
+    Danner et stærkt ETag ud fra ændringsversionerne og requestens sti og parametre.
+    APP_VERSION er med, så et nyt svarformat ikke genbruger gamle ETags, og JSON og
+    MessagePack får hver sit ETag.
+    """
+    representation = "msgpack" if msgpack_requested() else "json"
+    key = f"{APP_VERSION}|{representation}|{request.url.path}|{request.url.query}|{','.join(map(str, versions))}"
+    return '"' + hashlib.sha1(key.encode("utf-8")).hexdigest()[:24] + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Tjekker om If-None-Match indeholder ETag'et (svag sammenligning, som RFC 9110 kræver for If-None-Match).
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+async def not_modified(request: Request, response: Response, db: AsyncDatabase,
+                       *scopes: str) -> Optional[Response]:
+    """
+    Betinget GET ud fra ændringsversionerne for de givne områder.
+
+    Versionerne læses før selve forespørgslen, så et svar aldrig får et nyere
+    ETag end de data det indeholder.
+
+    Returns:
+        Optional[Response]: Et 304-svar hvis klientens kopi er aktuel; ellers None,
+        og ETag sættes på `response`
+    """
+    versions = await db.run(get_change_versions, scopes)
+    headers = {
+        "ETag": make_etag(request, versions),
+        # Klienten må gemme svaret, men skal altid spørge om det stadig er aktuelt
+        "Cache-Control": "private, no-cache",
+    }
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
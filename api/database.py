@@ -0,0 +1,78 @@
+from fastapi import HTTPException, status
+import logging
+import sys
+import os
+
+# Tilføj projektets rodmappe til Python's path, så vi kan importere fra src
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import (
+    DB_PATH, DB_POOL_SIZE, DB_POOL_TIMEOUT,
+    DB_CACHE_SIZE_KB, DB_MMAP_SIZE, DB_BUSY_TIMEOUT_MS,
+    DB_WRITER_MAX_BATCH, DB_WRITER_MAX_DELAY_MS, DB_WRITER_QUEUE_SIZE,
+    REGRADE_WORKERS, REGRADE_CHUNK_SIZE
+)
+from src.data.pool import ConnectionPool, DEFAULT_PRAGMAS, PoolTimeoutError
+from src.data.async_db import AsyncDatabase
+from src.data.writer import GroupCommitWriter, WriterQueueFullError
+from src.utils.validators import RegradeJob
+
+# Fælles forbindelsespulje for hele API'et
+pool = ConnectionPool(
+    DB_PATH,
+    max_size=DB_POOL_SIZE,
+    timeout=DB_POOL_TIMEOUT,
+    pragmas={
+        **DEFAULT_PRAGMAS,
+        "cache_size": -DB_CACHE_SIZE_KB,
+        "mmap_size": DB_MMAP_SIZE,
+        "busy_timeout": DB_BUSY_TIMEOUT_MS,
+    }
+)
+
+# Én skrivetråd for hele API'et; samtidige skrivninger committes samlet
+writer = GroupCommitWriter(
+    DB_PATH,
+    pragmas=pool.pragmas,
+    max_batch=DB_WRITER_MAX_BATCH,
+    max_delay=DB_WRITER_MAX_DELAY_MS / 1000,
+    max_queue=DB_WRITER_QUEUE_SIZE
+)
+
+class ApiDatabase(AsyncDatabase):
+    """
+    AsyncDatabase der oversætter en udtømt pulje eller fuld skrivekø til HTTP 503.
+    """
+
+    async def run(self, fn, *args, **kwargs):
+        try:
+            return await super().run(fn, *args, **kwargs)
+        except PoolTimeoutError as e:
+            logging.error(f"Ingen ledig database forbindelse: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Databasen er optaget, prøv igen"
+            )
+
+    async def write(self, fn, *args, **kwargs):
+        try:
+            return await super().write(fn, *args, **kwargs)
+        except WriterQueueFullError as e:
+            logging.error(f"Skrivekøen er fuld: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Databasen er optaget, prøv igen"
+            )
+
+# Asynkront dataadgangslag med egen trådpulje til databasekald
+db = ApiDatabase(pool, writer=writer)
+
+# Baggrundsjob der genberegner status, når grænseværdierne ændres
+# Ændringerne skrives gennem skrivetråden, så API'ets skrivninger ikke venter på jobbet
+regrade_job = RegradeJob(workers=REGRADE_WORKERS, chunk_size=REGRADE_CHUNK_SIZE, writer=writer)
+
+async def get_db() -> ApiDatabase:
+    """
+    FastAPI dependency der giver adgang til det asynkrone dataadgangslag.
+    """
+    return db
@@ -1,10 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional, Tuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+import asyncio
 import logging
+import time
+
+from config import PASSWORD_HASH_WORKERS
 
 # Importér brugermodeller (skal implementeres i api/models/auth.py)
 from api.models.auth import UserCreate, UserInDB, User, Token, TokenData
@@ -15,11 +21,19 @@ router = APIRouter()
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
+# bcrypt tager 100-300 ms CPU pr. kald, så hashing køres i en begrænset trådpulje
+# i stedet for i event loopet (bcrypt frigiver GIL'en mens den hasher)
+password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password")
+
 # I produktion bør disse værdier gemmes sikkert (f.eks. i miljøvariabler)
 SECRET_KEY = "din_hemmelige_nøgle_her"  # Skal ændres i produktion!
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Cache af verificerede tokens, så hvert kald ikke skal dekode JWT og slå brugeren op
+TOKEN_CACHE_SIZE = 1024
+TOKEN_CACHE_TTL_SECONDS = 60
+
 # Brugere vil i produktionen blive gemt i databasen
 # Denne dictionary er kun til demonstration
 fake_users_db = {
@@ -27,11 +41,85 @@ fake_users_db = {
         "username": "testuser",
         "full_name": "Test Bruger",
         "email": "test@example.com",
-        "hashed_password": pwd_context.hash("password123"),
+        # Forudberegnet hash af "password123", så der ikke hashes ved import
+        "hashed_password": "$2b$12$IAbWWJGse/izw5NWMLmsl.logOUylpsYt7BgtvNBSI5jFRZ8aIVum",
         "disabled": False,
     }
 }
 
+class TokenCache:
+    """
+    LRU-cache med TTL der afbilder verificerede tokens til brugerobjekter.
+
+    En post udløber ved det tidligste af tokenets exp og TTL, og alle poster
+    for en bruger kan fjernes, f.eks. når brugeren deaktiveres. get_current_user
+    tjekker desuden brugerens status i lageret ved hvert hit. Bruges kun
+    fra event loopet, så der er ikke brug for låse.
+    """
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE, ttl: float = TOKEN_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[UserInDB, float]]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def get(self, token: str) -> Optional[UserInDB]:
+        """Returnerer brugeren for et cachet token, None hvis det ikke findes eller er udløbet."""
+        entry = self._entries.get(token)
+        if entry is None:
+            self._misses += 1
+            return None
+        user, expires = entry
+        if time.time() >= expires:
+            del self._entries[token]
+            self._expired += 1
+            self._misses += 1
+            return None
+        self._entries.move_to_end(token)
+        self._hits += 1
+        return user
+
+    def put(self, token: str, user: UserInDB, exp: Optional[float] = None):
+        """Gemmer et verificeret token; exp er tokenets udløb som Unix-tid."""
+        expires = time.time() + self.ttl
+        if exp is not None:
+            expires = min(expires, exp)
+        self._entries[token] = (user, expires)
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def invalidate_user(self, username: str) -> int:
+        """Fjerner alle tokens for en bruger og returnerer antallet."""
+        tokens = [token for token, (user, _) in self._entries.items() if user.username == username]
+        for token in tokens:
+            del self._entries[token]
+        self._invalidations += len(tokens)
+        return len(tokens)
+
+    def clear(self):
+        """Tømmer cachen."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Returnerer størrelse og hit/miss-tællere."""
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self._hits,
+            "misses": self._misses,
+            "expired": self._expired,
+            "evictions": self._evictions,
+            "invalidations": self._invalidations,
+        }
+
+token_cache = TokenCache()
+
 def verify_password(plain_password, hashed_password):
     """Verificerer om en adgangskode matcher den hashede version."""
     return pwd_context.verify(plain_password, hashed_password)
@@ -40,6 +128,16 @@ def get_password_hash(password):
     """Genererer en hash af adgangskoden."""
     return pwd_context.hash(password)
 
+async def verify_password_async(plain_password, hashed_password):
+    """Verificerer en adgangskode i trådpuljen uden at blokere event loopet."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    """Genererer en hash af adgangskoden i trådpuljen uden at blokere event loopet."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, get_password_hash, password)
+
 def get_user(db, username: str):
     """Henter bruger fra databasen."""
     if username in db:
@@ -47,12 +145,25 @@ def get_user(db, username: str):
         return UserInDB(**user_data)
     return None
 
-def authenticate_user(db, username: str, password: str):
+def is_cached_user_current(db, user: UserInDB) -> bool:
+    """Tjekker at en cachet bruger stadig findes i lageret med samme aktiv/deaktiveret-status."""
+    user_data = db.get(user.username)
+    return user_data is not None and bool(user_data.get("disabled")) == bool(user.disabled)
+
+def set_user_disabled(db, username: str, disabled: bool = True):
+    """Aktiverer eller deaktiverer en bruger og fjerner brugerens cachede tokens."""
+    if username not in db:
+        return None
+    db[username]["disabled"] = disabled
+    token_cache.invalidate_user(username)
+    return get_user(db, username)
+
+async def authenticate_user(db, username: str, password: str):
     """Autentificerer en bruger."""
     user = get_user(db, username)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return False
     return user
 
@@ -69,6 +180,14 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     """Henter den nuværende bruger baseret på JWT token."""
+    user = token_cache.get(token)
+    if user is not None:
+        # Cachen sparer JWT-dekodningen, men brugerlageret afgør stadig om brugeren
+        # findes og er aktiv, også når den ændres uden om set_user_disabled
+        if is_cached_user_current(fake_users_db, user):
+            return user
+        token_cache.invalidate_user(user.username)
+    
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Kunne ikke validere legitimationsoplysninger",
@@ -85,6 +204,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     user = get_user(fake_users_db, username=token_data.username)
     if user is None:
         raise credentials_exception
+    token_cache.put(token, user, payload.get("exp"))
     return user
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)):
@@ -98,7 +218,7 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
     """
     Autentificerer en bruger og returnerer et JWT access token.
     """
-    user = authenticate_user(fake_users_db, form_data.username, form_data.password)
+    user = await authenticate_user(fake_users_db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -125,7 +245,7 @@ async def register_user(user: UserCreate):
         )
     
     # Opret ny bruger og gem i "database"
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     fake_users_db[user.username] = {
         "username": user.username,
         "email": user.email,
@@ -0,0 +1,73 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+import asyncio
+import logging
+import sys
+import os
+import time
+
+# Tilføj projektets rodmappe til Python's path, så vi kan importere fra src
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from config import DASHBOARD_CACHE_TTL
+from api.models.dashboard import DashboardSummary
+from src.data.dashboard import get_dashboard_summary
+from src.data.async_db import AsyncDatabase
+
+# Importér authentication dependencies
+from api.endpoints.auth import get_current_active_user, User
+from api.endpoints.tests import row_to_test_response
+from api.endpoints.tasks import row_to_task_response
+from api.database import get_db
+
+router = APIRouter()
+
+# Seneste beregnede oversigt og hvornår den udløber
+_summary_cache = {"summary": None, "expires": 0.0}
+_summary_lock = asyncio.Lock()
+
+async def build_summary(db: AsyncDatabase) -> DashboardSummary:
+    """
+    Beregner dashboard-oversigten med aggregeringer i databasen.
+    """
+    now = datetime.now()
+    summary = await db.run(get_dashboard_summary, now)
+    return DashboardSummary(
+        installation_count=summary["installation_count"],
+        totals=summary["totals"],
+        test_counts=summary["test_counts"],
+        recent_failures=[row_to_test_response(row) for row in summary["recent_failures"]],
+        overdue_task_count=summary["overdue_task_count"],
+        overdue_tasks=[row_to_task_response(row) for row in summary["overdue_tasks"]],
+        generated_at=now
+    )
+
+@router.get("/summary", response_model=DashboardSummary)
+async def read_dashboard_summary(
+    db: AsyncDatabase = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Returnerer nøgletal til dashboardet: antal installationer, teststatus
+    fordelt på testtype, seneste fejl og forsinkede opgaver.
+    Resultatet caches i DASHBOARD_CACHE_TTL sekunder.
+    """
+    try:
+        if _summary_cache["summary"] is not None and time.monotonic() < _summary_cache["expires"]:
+            return _summary_cache["summary"]
+        
+        # Kun én request beregner oversigten; de andre venter og bruger resultatet
+        async with _summary_lock:
+            if _summary_cache["summary"] is None or time.monotonic() >= _summary_cache["expires"]:
+                _summary_cache["summary"] = await build_summary(db)
+                _summary_cache["expires"] = time.monotonic() + DASHBOARD_CACHE_TTL
+            return _summary_cache["summary"]
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Fejl ved beregning af dashboard: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Serverfejl: {str(e)}"
+        )
@@ -0,0 +1,126 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from typing import Iterator, Literal, Optional
+import sqlite3
+import logging
+import threading
+import sys
+import os
+from datetime import datetime
+
+# Tilføj projektets rodmappe til Python's path, så vi kan importere fra src
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from config import DB_PATH, EXPORT_CHUNK_SIZE, EXPORT_MAX_CONCURRENT
+from src.data.export import export_stream, EXPORT_FORMATS
+from src.data.pool import connect_readonly
+
+# Importér authentication dependencies
+from api.endpoints.auth import get_current_active_user, User
+from api.database import pool
+
+router = APIRouter()
+
+ExportFormat = Literal["csv", "ndjson", "xlsx"]
+
+# En eksport tager så lang tid, som klienten er om at hente den, så den får sin
+# egen forbindelse i stedet for at optage en i puljen, og antallet begrænses
+export_slots = threading.BoundedSemaphore(EXPORT_MAX_CONCURRENT)
+
+def _export_body(chunks: Iterator[bytes], conn: sqlite3.Connection) -> Iterator[bytes]:
+    """Sender eksporten og lukker forbindelsen og frigiver pladsen bagefter, også ved afbrudt download."""
+    try:
+        # Tom første del: stream_export starter generatoren, så finally altid kører
+        yield b""
+        yield from chunks
+    finally:
+        conn.close()
+        export_slots.release()
+
+def stream_export(entity: str, export_format: str, **filters) -> StreamingResponse:
+    """
+    Opretter et streamet svar for en eksport.
+    Rækkerne læses i bidder og sendes, efterhånden som de kodes.
+
+    Fejl skal opdages her: når headerne er sendt, kan en fejl kun vise sig som
+    en afkortet fil.
+    """
+    if not export_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="For mange eksporter i gang, prøv igen senere"
+        )
+    try:
+        conn = connect_readonly(DB_PATH, pool.pragmas)
+    except sqlite3.Error as e:
+        export_slots.release()
+        logging.error(f"Kunne ikke åbne databasen til eksport: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Databasen er optaget, prøv igen"
+        )
+    try:
+        chunks = export_stream(conn, entity, export_format, chunk_size=EXPORT_CHUNK_SIZE, **filters)
+    except ValueError as e:
+        conn.close()
+        export_slots.release()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    body = _export_body(chunks, conn)
+    next(body)
+
+    filename = f"{entity}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{export_format}"
+    logging.info(f"Starter eksport af {entity} som {export_format}")
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get("/installations")
+async def export_installations(
+    format: ExportFormat = "csv",
+    installation_id: Optional[str] = None,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Eksporterer installationer som CSV, NDJSON eller XLSX.
+    """
+    return stream_export("installations", format, installation_id=installation_id)
+
+@router.get("/tests")
+async def export_tests(
+    format: ExportFormat = "csv",
+    installation_id: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    test_type: Optional[str] = None,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Eksporterer testresultater som CSV, NDJSON eller XLSX.
+    Kan filtreres på installation, tidsrum (timestamp) og testtype.
+    """
+    return stream_export(
+        "tests", format,
+        installation_id=installation_id, date_from=date_from, date_to=date_to, test_type=test_type
+    )
+
+@router.get("/tasks")
+async def export_tasks(
+    format: ExportFormat = "csv",
+    installation_id: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Eksporterer opgaver som CSV, NDJSON eller XLSX.
+    Kan filtreres på installation og oprettelsestidspunkt.
+    """
+    return stream_export(
+        "tasks", format,
+        installation_id=installation_id, date_from=date_from, date_to=date_to
+    )
@@ -0,0 +1,93 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Literal, Optional, Tuple
+import asyncio
+import logging
+import multiprocessing
+import sys
+import os
+
+# Tilføj projektets rodmappe til Python's path, så vi kan importere fra src
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from config import IMAGE_DIR, IMAGE_WORKERS
+from src.data.images import IMAGE_VARIANTS, derivative_path, generate_derivatives, image_location
+
+# Importér authentication dependencies
+from api.endpoints.auth import get_current_active_user, User
+
+router = APIRouter()
+
+# Billederne er content-addressed og ændrer sig aldrig under samme navn
+CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+# Skalering af billeder er CPU-tung og køres i separate processer
+# (spawn i stedet for fork, da processen allerede kører andre tråde)
+image_executor = ProcessPoolExecutor(max_workers=IMAGE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+
+ImageVariant = Literal["original", "thumb", "preview"]
+
+def _log_failure(future: Future):
+    if future.exception() is not None:
+        logging.error(f"Fejl ved generering af billedversioner: {future.exception()}")
+
+def schedule_derivatives(image_path: str) -> Future:
+    """
+    Starter generering af thumbnail og preview for et uploadet billede i baggrunden.
+    """
+    future = image_executor.submit(generate_derivatives, image_path)
+    future.add_done_callback(_log_failure)
+    return future
+
+def _find_image(filename: str, variant: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Finder originalen og den ønskede version på disken (blokerende filsystemkald).
+
+    Returns:
+        Tuple: Stien til originalen (None hvis billedet ikke findes) og til
+        versionen (None hvis den ikke er genereret endnu)
+    """
+    original_path = image_location(IMAGE_DIR, filename)
+    if original_path is None or not os.path.isfile(original_path):
+        return None, None
+    if variant not in IMAGE_VARIANTS:
+        return original_path, original_path
+    path = derivative_path(original_path, variant)
+    return original_path, path if os.path.isfile(path) else None
+
+@router.get("/{filename}")
+async def read_image(
+    filename: str,
+    variant: ImageVariant = "original",
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Returnerer et testbillede i original størrelse eller som thumbnail/preview.
+    Understøtter HTTP Range og må caches af klienten, da indholdet aldrig ændres.
+    Kræver login som resten af API'et: inspektionsbilleder er kundedata, og
+    navnet alene (billedets SHA-256) skal ikke være nok til at hente dem.
+    """
+    original_path, path = await run_in_threadpool(_find_image, filename, variant)
+    if original_path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Billede '{filename}' ikke fundet"
+        )
+    
+    media_type = None
+    if variant in IMAGE_VARIANTS:
+        media_type = "image/jpeg"
+        if path is None:
+            # Ikke genereret endnu (eller uploadet før pipelinen fandtes) - lav den nu
+            loop = asyncio.get_running_loop()
+            paths = await loop.run_in_executor(image_executor, generate_derivatives, original_path)
+            if variant not in paths:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Der kan ikke laves en {variant} af '{filename}'"
+                )
+            path = paths[variant]
+    
+    return FileResponse(path, media_type=media_type, headers={"Cache-Control": CACHE_CONTROL})
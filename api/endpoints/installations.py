@@ -1,5 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+from typing import List, Literal, Optional, Union
 import sqlite3
 import logging
 import sys
@@ -10,41 +12,64 @@ from datetime import datetime
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 # Importér config og databaseværktøjer
-from config import DB_PATH
-from api.models.installation import InstallationCreate, InstallationResponse, InstallationUpdate
+from config import REPORT_CACHE_DIR
+from api.models.installation import (
+    InstallationCreate, InstallationResponse, InstallationUpdate, InstallationPage, InstallationTestStatus
+)
 from src.models import Installation
-from src.data.db import save_installation, get_installation
+from src.data import db as data
+from src.data.async_db import AsyncDatabase
+from src.data.installation_status import compliance, get_installation_status
+from src.data.changes import INSTALLATIONS_SCOPE
+from src.data.pagination import encode_cursor, decode_cursor
+from src.utils.report_gen import load_report_data, render_report_file, REPORT_FORMATS
 
 # Importér authentication dependencies
 from api.endpoints.auth import get_current_active_user, User
+from api.database import get_db
+from api.conditional import not_modified
+from api.serialization import column_names, rows_to_dicts, json_response
+from api.negotiation import MessagePackRoute
 
-router = APIRouter()
+router = APIRouter(route_class=MessagePackRoute)
 
-def get_db_connection():
+def row_to_installation_response(row) -> InstallationResponse:
     """
-    Opretter en forbindelse til SQLite-databasen.
+    Konverterer en databaserække (INSTALLATION_COLUMNS, evt. efterfulgt af
+    COMPLIANCE_COLUMNS) til en InstallationResponse.
     """
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        return conn
-    except sqlite3.Error as e:
-        logging.error(f"Fejl ved oprettelse af database forbindelse: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Databasefejl"
-        )
+    return InstallationResponse(
+        id=row[0],
+        address=row[1],
+        customer_name=row[2],
+        installation_date=row[3],
+        last_inspection=row[4],
+        compliance=compliance(*row[5:9]) if len(row) > 5 else None
+    )
+
+INSTALLATION_FIELDS = column_names(data.INSTALLATION_COLUMNS)
+
+def rows_to_installation_dicts(rows) -> List[dict]:
+    """
+    Hurtig udgave af row_to_installation_response til lister over installationer
+    (INSTALLATION_COLUMNS efterfulgt af COMPLIANCE_COLUMNS): samme JSON som
+    InstallationResponse, men uden at bygge en model pr. række.
+    """
+    items = rows_to_dicts(INSTALLATION_FIELDS, rows, ("installation_date", "last_inspection"))
+    for item, row in zip(items, rows):
+        item["compliance"] = compliance(*row[5:9])
+    return items
 
 @router.post("/", response_model=InstallationResponse, status_code=status.HTTP_201_CREATED)
 async def create_installation(
     installation: InstallationCreate,
+    db: AsyncDatabase = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Opretter en ny installation.
     """
     try:
-        conn = get_db_connection()
-        
         # Konverter fra Pydantic model til domain model
         new_installation = Installation(
             id=installation.id,
@@ -55,16 +80,13 @@ async def create_installation(
         )
         
         # Gem installationen
-        success = save_installation(conn, new_installation)
+        success = await db.write(data.save_installation, new_installation)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Kunne ikke gemme installationen"
             )
         
-        # Luk forbindelsen
-        conn.close()
-        
         # Konverter tilbage til response model
         return InstallationResponse(
             id=new_installation.id,
@@ -74,6 +96,8 @@ async def create_installation(
             last_inspection=new_installation.last_inspection
         )
         
+    except HTTPException:
+        raise
     except sqlite3.IntegrityError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -89,15 +113,14 @@ async def create_installation(
 @router.get("/{installation_id}", response_model=InstallationResponse)
 async def read_installation(
     installation_id: str,
+    db: AsyncDatabase = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Henter en specifik installation baseret på ID.
     """
     try:
-        conn = get_db_connection()
-        installation = get_installation(conn, installation_id)
-        conn.close()
+        installation = await db.run(data.get_installation, installation_id)
         
         if installation is None:
             raise HTTPException(
@@ -113,6 +136,8 @@ async def read_installation(
             last_inspection=installation.last_inspection
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Fejl ved hentning af installation: {e}")
         raise HTTPException(
@@ -120,39 +145,128 @@ async def read_installation(
             detail=f"Serverfejl: {str(e)}"
         )
 
-@router.get("/", response_model=List[InstallationResponse])
+@router.get("/{installation_id}/status", response_model=List[InstallationTestStatus])
+async def read_installation_status(
+    installation_id: str,
+    db: AsyncDatabase = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Henter det seneste resultat for hver testtype på en installation.
+    """
+    try:
+        rows = await db.run(get_installation_status, installation_id)
+        
+        if rows is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Installation med ID '{installation_id}' ikke fundet"
+            )
+        
+        return [
+            InstallationTestStatus(
+                test_type=row[1],
+                test_id=row[2],
+                value=row[3],
+                unit=row[4],
+                status=row[5],
+                timestamp=row[6]
+            )
+            for row in rows
+        ]
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Fejl ved hentning af installationsstatus: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Serverfejl: {str(e)}"
+        )
+
+@router.get("/{installation_id}/report")
+async def read_installation_report(
+    installation_id: str,
+    format: Literal["html", "pdf"] = "html",
+    db: AsyncDatabase = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Returnerer inspektionsrapporten for en installation som HTML eller PDF.
+    Rapporten genereres kun, hvis installationen eller dens tests er ændret siden sidst.
+    """
+    try:
+        data = await db.run(load_report_data, installation_id)
+        if data is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Installation med ID '{installation_id}' ikke fundet"
+            )
+        
+        # Rækkerne er hentet, så forbindelsen er tilbage i puljen, mens rapporten bygges
+        installation, tests = data
+        path, cached = await run_in_threadpool(render_report_file, installation, tests, format, REPORT_CACHE_DIR)
+        logging.info(f"Rapport for {installation_id} ({format}) {'hentet fra cache' if cached else 'genereret'}")
+        return FileResponse(
+            path,
+            media_type=REPORT_FORMATS[format],
+            filename=f"rapport-{installation_id}.{format}",
+            content_disposition_type="inline"
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Fejl ved generering af rapport: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Serverfejl: {str(e)}"
+        )
+
+@router.get("/", response_model=Union[List[InstallationResponse], InstallationPage])
 async def list_installations(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncDatabase = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Henter en liste af installationer med paginering.
+    
+    Angives `cursor` (tom for første side), bruges cursor-paginering sorteret på ID,
+    og svaret indeholder `items` og `next_cursor` i stedet for en liste.
+    Svaret har et ETag; med et aktuelt If-None-Match returneres 304.
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        cached = await not_modified(request, response, db, INSTALLATIONS_SCOPE)
+        if cached is not None:
+            return cached
+        
+        if cursor is not None:
+            # Cursor-paginering: samme pris for alle sider
+            try:
+                after = decode_cursor(cursor, 1) if cursor else None
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Ugyldig cursor"
+                )
+            rows, next_key = await db.run(data.list_installations_page, limit, after)
+            return json_response({
+                "items": rows_to_installation_dicts(rows),
+                "next_cursor": encode_cursor(next_key) if next_key else None
+            }, response)
         
         # Hent installationer med paginering
-        cursor.execute(
-            "SELECT id, address, customer_name, installation_date, last_inspection FROM installations LIMIT ? OFFSET ?",
-            (limit, skip)
-        )
-        rows = cursor.fetchall()
+        rows = await db.run(data.list_installations, limit, skip)
         
-        installations = []
-        for row in rows:
-            installations.append(InstallationResponse(
-                id=row[0],
-                address=row[1],
-                customer_name=row[2],
-                installation_date=row[3],
-                last_inspection=row[4]
-            ))
-            
-        conn.close()
-        return installations
+        return json_response(rows_to_installation_dicts(rows), response)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Fejl ved hentning af installationer: {e}")
         raise HTTPException(
@@ -164,27 +278,15 @@ async def list_installations(
 async def update_installation(
     installation_id: str,
     installation_update: InstallationUpdate,
+    db: AsyncDatabase = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Opdaterer en eksisterende installation.
     """
     try:
-        conn = get_db_connection()
-        
-        # Tjek om installationen eksisterer
-        existing_installation = get_installation(conn, installation_id)
-        if existing_installation is None:
-            conn.close()
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Installation med ID '{installation_id}' ikke fundet"
-            )
-        
         # Opdater felter, hvis de er inkluderet i update
-        cursor = conn.cursor()
         update_fields = {}
-        update_values = []
         
         if installation_update.address is not None:
             update_fields["address"] = installation_update.address
@@ -195,21 +297,13 @@ async def update_installation(
         if installation_update.last_inspection is not None:
             update_fields["last_inspection"] = installation_update.last_inspection
         
-        # Hvis der er felter at opdatere
-        if update_fields:
-            query = "UPDATE installations SET "
-            query += ", ".join([f"{key} = ?" for key in update_fields.keys()])
-            query += " WHERE id = ?"
-            
-            values = list(update_fields.values())
-            values.append(installation_id)
-            
-            cursor.execute(query, values)
-            conn.commit()
-        
-        # Hent den opdaterede installation
-        updated_installation = get_installation(conn, installation_id)
-        conn.close()
+        # Opdater og få den opdaterede installation tilbage i samme sætning
+        updated_installation = await db.write(data.update_installation, installation_id, update_fields)
+        if updated_installation is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Installation med ID '{installation_id}' ikke fundet"
+            )
         
         return InstallationResponse(
             id=updated_installation.id,
@@ -219,6 +313,8 @@ async def update_installation(
             last_inspection=updated_installation.last_inspection
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Fejl ved opdatering af installation: {e}")
         raise HTTPException(
@@ -229,31 +325,34 @@ async def update_installation(
 @router.delete("/{installation_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_installation(
     installation_id: str,
+    db: AsyncDatabase = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Sletter en installation.
     """
     try:
-        conn = get_db_connection()
-        
-        # Tjek om installationen eksisterer
-        existing_installation = get_installation(conn, installation_id)
-        if existing_installation is None:
-            conn.close()
+        # Slet installationen, hvis den eksisterer. Fremmednøglerne afviser
+        # sletningen, så længe testresultater eller opgaver peger på den
+        try:
+            deleted = await db.write(data.delete_installation, installation_id)
+        except sqlite3.IntegrityError as e:
+            if not data.is_foreign_key_error(e):
+                raise
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Installation med ID '{installation_id}' har testresultater eller opgaver og kan ikke slettes"
+            )
+        if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Installation med ID '{installation_id}' ikke fundet"
             )
         
-        # Slet installationen
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM installations WHERE id = ?", (installation_id,))
-        conn.commit()
-        conn.close()
-        
         return None
         
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Fejl ved sletning af installation: {e}")
         raise HTTPException(
@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import List, Literal, Optional
+import logging
+import sys
+import os
+
+# Tilføj projektets rodmappe til Python's path, så vi kan importere fra src
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from api.models.search import SearchHit, SearchResults
+from src.data.async_db import AsyncDatabase
+from src.data.search import search
+
+# Importér authentication dependencies
+from api.endpoints.auth import get_current_active_user, User
+from api.database import get_db
+
+router = APIRouter()
+
+@router.get("/", response_model=SearchResults)
+async def search_all(
+    q: str = Query(..., min_length=1, max_length=200, description="Søgetekst; hvert ord matcher som præfiks"),
+    kind: Optional[List[Literal["installation", "task", "test"]]] = Query(None, description="Begræns til disse typer"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncDatabase = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Fritekstsøgning i installationer (adresse, kundenavn, ID), opgaver
+    (titel, beskrivelse, bemærkninger) og bemærkninger på testresultater.
+    Resultaterne er sorteret efter relevans (bm25).
+    """
+    try:
+        hits = await db.run(search, q, kind, limit)
+        return SearchResults(query=q, hits=[SearchHit(**hit) for hit in hits])
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Fejl ved søgning: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Serverfejl: {str(e)}"
+        )
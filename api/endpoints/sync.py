@@ -0,0 +1,77 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+import logging
+import sys
+import os
+
+# Tilføj projektets rodmappe til Python's path, så vi kan importere fra src
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from api.models.sync import SyncPage
+from src.data.async_db import AsyncDatabase
+from src.data.sync import get_changes, get_latest_version
+
+# Importér authentication dependencies
+from api.endpoints.auth import get_current_active_user, User
+from api.database import get_db
+from api.endpoints.installations import rows_to_installation_dicts
+from api.endpoints.tasks import rows_to_task_dicts
+from api.endpoints.tests import rows_to_test_dicts
+from api.negotiation import MessagePackRoute
+from api.serialization import json_response
+
+router = APIRouter(route_class=MessagePackRoute)
+
+_TO_DICTS = {
+    "installation": rows_to_installation_dicts,
+    "test": rows_to_test_dicts,
+    "task": rows_to_task_dicts,
+}
+
+@router.get("/", response_model=SyncPage)
+async def sync_changes(
+    since: int = Query(0, ge=0, description="Seneste version klienten har; 0 for alt"),
+    limit: int = Query(500, ge=1, le=5000),
+    db: AsyncDatabase = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Returnerer installationer, testresultater og opgaver ændret efter `since`,
+    sorteret efter version. Slettede rækker kommer som tombstones (deleted=true).
+
+    Hent sider med since=next_since, indtil has_more er false, og gem next_since
+    til næste synkronisering. Hver række kommer kun med sin seneste ændring.
+    """
+    try:
+        latest_version = await db.run(get_latest_version)
+        changes, next_since, has_more = await db.run(get_changes, since, limit)
+
+        # Konvertér rækkerne samlet pr. type med listeendepunkternes hurtige vej
+        data = {}
+        for entity, to_dicts in _TO_DICTS.items():
+            found = [(version, row) for version, kind, _, row in changes if kind == entity and row is not None]
+            data.update(zip((version for version, _ in found), to_dicts([row for _, row in found])))
+
+        return json_response({
+            "changes": [
+                {
+                    "version": version,
+                    "entity": entity,
+                    "id": entity_id,
+                    "deleted": version not in data,
+                    "data": data.get(version),
+                }
+                for version, entity, entity_id, _ in changes
+            ],
+            "next_since": next_since,
+            "has_more": has_more,
+            "latest_version": max(latest_version, next_since),
+        })
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Fejl ved synkronisering: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Serverfejl: {str(e)}"
+        )
@@ -1,5 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from typing import List, Optional, Union
 import sqlite3
 import logging
 import sys
@@ -11,47 +11,57 @@ import uuid
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 # Import konfiguration og værktøjer
-from config import DB_PATH
-from api.models.task import TaskCreate, TaskResponse, TaskUpdate
+from api.models.task import TaskCreate, TaskResponse, TaskUpdate, TaskPage
 from src.models import Task, TaskStatus, TaskPriority
-from src.data.db import get_installation
+from src.data import db as data
+from src.data.async_db import AsyncDatabase
+from src.data.pagination import encode_cursor, decode_cursor
+from src.data.changes import TASKS_SCOPE
 
 # Import authentication
 from api.endpoints.auth import get_current_active_user, User
+from api.database import get_db
+from api.conditional import not_modified
+from api.serialization import column_names, rows_to_dicts, json_response
+from api.negotiation import MessagePackRoute
 
-router = APIRouter()
+router = APIRouter(route_class=MessagePackRoute)
 
-def get_db_connection():
-    """Opretter forbindelse til SQLite-databasen."""
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        return conn
-    except sqlite3.Error as e:
-        logging.error(f"Fejl ved database forbindelse: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Databasefejl"
-        )
+def row_to_task_response(row) -> TaskResponse:
+    """Konverterer en databaserække (TASK_COLUMNS) til en TaskResponse."""
+    return TaskResponse(
+        id=row[0],
+        title=row[1],
+        description=row[2],
+        status=row[3],
+        priority=row[4],
+        installation_id=row[5],
+        created_date=datetime.fromisoformat(row[6]) if row[6] else None,
+        due_date=datetime.fromisoformat(row[7]) if row[7] else None,
+        completed_date=datetime.fromisoformat(row[8]) if row[8] else None,
+        assigned_to=row[9],
+        estimated_hours=row[10],
+        actual_hours=row[11],
+        notes=row[12]
+    )
+
+TASK_FIELDS = column_names(data.TASK_COLUMNS)
+
+def rows_to_task_dicts(rows) -> List[dict]:
+    """
+    Hurtig udgave af row_to_task_response til lister: samme JSON som TaskResponse,
+    men uden at bygge en model pr. række.
+    """
+    return rows_to_dicts(TASK_FIELDS, rows, ("created_date", "due_date", "completed_date"))
 
 @router.post("/", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
 async def create_task(
     task: TaskCreate,
+    db: AsyncDatabase = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Opretter en ny opgave."""
     try:
-        conn = get_db_connection()
-        
-        # Tjek om installationen eksisterer
-        if task.installation_id:
-            installation = get_installation(conn, task.installation_id)
-            if installation is None:
-                conn.close()
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"Installation med ID '{task.installation_id}' ikke fundet"
-                )
-        
         # Generer et unikt ID
         task_id = task.id if task.id else f"TASK-{uuid.uuid4().hex[:8].upper()}"
         
@@ -72,32 +82,19 @@ async def create_task(
             notes=task.notes
         )
         
-        # Gem i database
-        cursor = conn.cursor()
-        cursor.execute(
-            """INSERT INTO tasks (
-                id, title, description, status, priority, installation_id,
-                created_date, due_date, completed_date, assigned_to,
-                estimated_hours, actual_hours, notes
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (
-                new_task.id,
-                new_task.title,
-                new_task.description,
-                new_task.status.value,
-                new_task.priority.value,
-                new_task.installation_id,
-                new_task.created_date.isoformat(),
-                new_task.due_date.isoformat() if new_task.due_date else None,
-                new_task.completed_date.isoformat() if new_task.completed_date else None,
-                new_task.assigned_to,
-                new_task.estimated_hours,
-                new_task.actual_hours,
-                new_task.notes
+        # Gem i database; fremmednøglen afviser en ukendt installation
+        try:
+            await db.write(data.save_task, new_task)
+        except sqlite3.IntegrityError as e:
+            if data.is_foreign_key_error(e):
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Installation med ID '{task.installation_id}' ikke fundet"
+                )
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Opgave med ID '{task_id}' eksisterer allerede"
             )
-        )
-        conn.commit()
-        conn.close()
         
         # Returner respons
         return TaskResponse(
@@ -115,6 +112,8 @@ async def create_task(
             actual_hours=new_task.actual_hours,
             notes=new_task.notes
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Fejl ved oprettelse af opgave: {e}")
         raise HTTPException(
@@ -125,46 +124,22 @@ async def create_task(
 @router.get("/{task_id}", response_model=TaskResponse)
 async def read_task(
     task_id: str,
+    db: AsyncDatabase = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Henter en specifik opgave baseret på ID."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            """SELECT id, title, description, status, priority, installation_id,
-                    created_date, due_date, completed_date, assigned_to,
-                    estimated_hours, actual_hours, notes
-                FROM tasks WHERE id = ?""",
-            (task_id,)
-        )
-        row = cursor.fetchone()
+        row = await db.run(data.get_task, task_id)
         
         if row is None:
-            conn.close()
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Opgave med ID '{task_id}' ikke fundet"
             )
         
-        conn.close()
-        
-        return TaskResponse(
-            id=row[0],
-            title=row[1],
-            description=row[2],
-            status=row[3],
-            priority=row[4],
-            installation_id=row[5],
-            created_date=datetime.fromisoformat(row[6]) if row[6] else None,
-            due_date=datetime.fromisoformat(row[7]) if row[7] else None,
-            completed_date=datetime.fromisoformat(row[8]) if row[8] else None,
-            assigned_to=row[9],
-            estimated_hours=row[10],
-            actual_hours=row[11],
-            notes=row[12]
-        )
+        return row_to_task_response(row)
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Fejl ved hentning af opgave: {e}")
         raise HTTPException(
@@ -172,69 +147,60 @@ async def read_task(
             detail=f"Serverfejl: {str(e)}"
         )
 
-@router.get("/", response_model=List[TaskResponse])
+@router.get("/", response_model=Union[List[TaskResponse], TaskPage])
 async def list_tasks(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     status: Optional[str] = None,
     installation_id: Optional[str] = None,
     assigned_to: Optional[str] = None,
+    cursor: Optional[str] = None,
+    db: AsyncDatabase = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Henter en liste af opgaver med mulighed for filtrering."""
+    """
+    Henter en liste af opgaver med mulighed for filtrering.
+    
+    Angives `cursor` (tom for første side), bruges cursor-paginering på
+    (created_date, id), og svaret indeholder `items` og `next_cursor`.
+    Svaret har et ETag; med et aktuelt If-None-Match returneres 304.
+    """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Byg query med filtrering
-        query = """SELECT id, title, description, status, priority, installation_id,
-                        created_date, due_date, completed_date, assigned_to,
-                        estimated_hours, actual_hours, notes
-                   FROM tasks WHERE 1=1"""
-        params = []
-        
-        if status:
-            query += " AND status = ?"
-            params.append(status)
+        cached = await not_modified(request, response, db, TASKS_SCOPE)
+        if cached is not None:
+            return cached
         
-        if installation_id:
-            query += " AND installation_id = ?"
-            params.append(installation_id)
-            
-        if assigned_to:
-            query += " AND assigned_to = ?"
-            params.append(assigned_to)
-            
-        query += " ORDER BY created_date DESC LIMIT ? OFFSET ?"
-        params.extend([limit, skip])
+        if cursor is not None:
+            try:
+                after = decode_cursor(cursor, 2) if cursor else None
+            except ValueError:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Ugyldig cursor"
+                )
+            rows, next_key = await db.run(
+                data.list_tasks_page, limit, after,
+                status=status, installation_id=installation_id, assigned_to=assigned_to
+            )
+            return json_response({
+                "items": rows_to_task_dicts(rows),
+                "next_cursor": encode_cursor(next_key) if next_key else None
+            }, response)
         
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
+        rows = await db.run(
+            data.list_tasks, limit, skip,
+            status=status, installation_id=installation_id, assigned_to=assigned_to
+        )
         
-        tasks = []
-        for row in rows:
-            tasks.append(TaskResponse(
-                id=row[0],
-                title=row[1],
-                description=row[2],
-                status=row[3],
-                priority=row[4],
-                installation_id=row[5],
-                created_date=datetime.fromisoformat(row[6]) if row[6] else None,
-                due_date=datetime.fromisoformat(row[7]) if row[7] else None,
-                completed_date=datetime.fromisoformat(row[8]) if row[8] else None,
-                assigned_to=row[9],
-                estimated_hours=row[10],
-                actual_hours=row[11],
-                notes=row[12]
-            ))
-            
-        conn.close()
-        return tasks
+        return json_response(rows_to_task_dicts(rows), response)
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Fejl ved hentning af opgaver: {e}")
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            status_code=500,
             detail=f"Serverfejl: {str(e)}"
         )
 
@@ -242,73 +208,42 @@ async def list_tasks(
 async def update_task(
     task_id: str,
     task_update: TaskUpdate,
+    db: AsyncDatabase = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Opdaterer en eksisterende opgave."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Tjek om opgaven eksisterer
-        cursor.execute("SELECT * FROM tasks WHERE id = ?", (task_id,))
-        if cursor.fetchone() is None:
-            conn.close()
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Opgave med ID '{task_id}' ikke fundet"
-            )
-        
         # Byg update query baseret på de felter, der er angivet
         update_fields = {}
-        params = []
         
         # Gå gennem alle egenskaber i opdateringen
         for key, value in task_update.dict(exclude_unset=True).items():
             update_fields[key] = value
-            params.append(value)
         
         # Særlig håndtering for completed_date - sæt det automatisk hvis status ændres til COMPLETED
         if task_update.status == TaskStatus.COMPLETED.value:
             if 'completed_date' not in update_fields or update_fields['completed_date'] is None:
                 update_fields['completed_date'] = datetime.now().isoformat()
-                params.append(update_fields['completed_date'])
-        
-        # Hvis der er felter at opdatere
-        if update_fields:
-            query = "UPDATE tasks SET "
-            query += ", ".join([f"{key} = ?" for key in update_fields.keys()])
-            query += " WHERE id = ?"
-            params.append(task_id)
-            
-            cursor.execute(query, params)
-            conn.commit()
         
-        # Hent den opdaterede opgave
-        cursor.execute(
-            """SELECT id, title, description, status, priority, installation_id,
-                    created_date, due_date, completed_date, assigned_to,
-                    estimated_hours, actual_hours, notes
-                FROM tasks WHERE id = ?""",
-            (task_id,)
-        )
-        row = cursor.fetchone()
-        conn.close()
+        # Opdater og få den opdaterede opgave tilbage i samme sætning
+        try:
+            row = await db.write(data.update_task, task_id, update_fields)
+        except sqlite3.IntegrityError as e:
+            if not data.is_foreign_key_error(e):
+                raise
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Installation med ID '{update_fields.get('installation_id')}' ikke fundet"
+            )
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Opgave med ID '{task_id}' ikke fundet"
+            )
         
-        return TaskResponse(
-            id=row[0],
-            title=row[1],
-            description=row[2],
-            status=row[3],
-            priority=row[4],
-            installation_id=row[5],
-            created_date=datetime.fromisoformat(row[6]) if row[6] else None,
-            due_date=datetime.fromisoformat(row[7]) if row[7] else None,
-            completed_date=datetime.fromisoformat(row[8]) if row[8] else None,
-            assigned_to=row[9],
-            estimated_hours=row[10],
-            actual_hours=row[11],
-            notes=row[12]
-        )
+        return row_to_task_response(row)
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Fejl ved opdatering af opgave: {e}")
         raise HTTPException(
@@ -319,28 +254,22 @@ async def update_task(
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_task(
     task_id: str,
+    db: AsyncDatabase = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Sletter en opgave."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Tjek om opgaven eksisterer
-        cursor.execute("SELECT id FROM tasks WHERE id = ?", (task_id,))
-        if cursor.fetchone() is None:
-            conn.close()
+        # Slet opgaven, hvis den eksisterer
+        deleted = await db.write(data.delete_task, task_id)
+        if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Opgave med ID '{task_id}' ikke fundet"
             )
         
-        # Slet opgaven
-        cursor.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
-        conn.commit()
-        conn.close()
-        
         return None
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Fejl ved sletning af opgave: {e}")
         raise HTTPException(
@@ -1,72 +1,89 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Optional, Union
 import sqlite3
 import logging
 import sys
 import os
 from datetime import datetime
-import uuid
 
 # Tilføj projektets rodmappe til Python's path, så vi kan importere fra src
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 # Importér config og databaseværktøjer
-from config import DB_PATH
-from api.models.test import TestCreate, TestResponse, TestUpdate
+from config import IMAGE_DIR, IMAGE_MAX_BYTES, IMAGE_CHUNK_SIZE
+from api.models.test import (
+    TestCreate, TestResponse, TestUpdate, TestPage, TestBatchCreate, TestHistory, RegradeStatus, image_url
+)
 from src.models import TestResult, TestType, TestStatus
-from src.data.db import save_test_result, get_installation
-from src.tests import validate_rcd_test
+from src.data import db as data
+from src.data.history import get_history
+from src.data.images import ImageTooLargeError
+from src.data.async_db import AsyncDatabase
+from src.data.pagination import encode_cursor, decode_cursor
+from src.data.changes import test_results_scope
+from src.tests import grade_test
+from src.utils.standards import MANUAL_RULE_VERSION, rule_version_for_notes
 
 # Importér authentication dependencies
 from api.endpoints.auth import get_current_active_user, User
+from api.database import get_db, pool, regrade_job
+from api.endpoints.images import schedule_derivatives
+from api.conditional import not_modified
+from api.serialization import column_names, rows_to_dicts, json_response
+from api.negotiation import MessagePackRoute
+from api.uploads import receive_image, UploadError, MULTIPART_OVERHEAD_BYTES
 
-router = APIRouter()
+router = APIRouter(route_class=MessagePackRoute)
 
-def get_db_connection():
+# Status for nye målinger med en ukendt enhed: de kan ikke bedømmes og markeres
+# til manuel kontrol. Regelversionen sørger for at de genberegnes, hvis enheden
+# senere tilføjes til standards.UNIT_FACTORS
+UNGRADED_STATUS = TestStatus.WARNING
+
+def row_to_test_response(row) -> TestResponse:
+    """Konverterer en databaserække (TEST_RESULT_COLUMNS) til en TestResponse."""
+    return TestResponse(
+        id=row[0],
+        installation_id=row[1],
+        test_type=row[2],
+        value=row[3],
+        unit=row[4],
+        status=row[5],
+        timestamp=datetime.fromisoformat(row[6]) if row[6] else None,
+        notes=row[7],
+        image_path=row[8]
+    )
+
+TEST_RESULT_FIELDS = column_names(data.TEST_RESULT_COLUMNS)
+
+def rows_to_test_dicts(rows) -> List[dict]:
     """
-    Opretter en forbindelse til SQLite-databasen.
+    Hurtig udgave af row_to_test_response til lister: samme JSON som TestResponse,
+    men uden at bygge en model pr. række.
     """
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        return conn
-    except sqlite3.Error as e:
-        logging.error(f"Fejl ved oprettelse af database forbindelse: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Databasefejl"
-        )
+    items = rows_to_dicts(TEST_RESULT_FIELDS, rows, ("timestamp",))
+    for item in items:
+        image_path = item["image_path"]
+        if image_path is None:
+            item["thumbnail_url"] = item["preview_url"] = None
+        else:
+            item["thumbnail_url"] = image_url(image_path, "thumb")
+            item["preview_url"] = image_url(image_path, "preview")
+    return items
 
 @router.post("/", response_model=TestResponse, status_code=status.HTTP_201_CREATED)
 async def create_test(
     test: TestCreate,
+    db: AsyncDatabase = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Opretter et nyt testresultat for en installation.
     """
     try:
-        conn = get_db_connection()
-        
-        # Tjek om installationen eksisterer
-        installation = get_installation(conn, test.installation_id)
-        if installation is None:
-            conn.close()
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Installation med ID '{test.installation_id}' ikke fundet"
-            )
-        
         # Valider testværdien baseret på testtypen
-        test_status = TestStatus.PASS  # Standard værdi
-        
-        # Hvis det er en RCD test, validerer vi den
-        if test.test_type == TestType.RCD.value:
-            try:
-                rated_current = float(test.notes.split("mA")[0].strip()) if test.notes and "mA" in test.notes else 30
-                test_status = validate_rcd_test(test.value, rated_current)
-            except Exception as e:
-                logging.warning(f"Kunne ikke validere RCD test: {e}")
-                # Fortsæt med standard status hvis validering fejler
+        test_status = grade_test(test.test_type, test.value, test.unit, test.notes) or UNGRADED_STATUS
         
         # Konverter fra Pydantic model til domain model
         new_test = TestResult(
@@ -76,24 +93,27 @@ async def create_test(
             status=test_status,
             notes=test.notes,
             image_path=test.image_path,
-            timestamp=datetime.now()
+            timestamp=datetime.now(),
+            rule_version=rule_version_for_notes(test.test_type, test.unit, test.notes)
         )
         
-        # Gem testen
-        success = save_test_result(conn, new_test, test.installation_id)
-        if not success:
+        # Gem testen og få ID'et for den nyligt indsatte test; fremmednøglen
+        # afviser en ukendt installation, så den slås ikke op først
+        try:
+            test_id = await db.write(data.save_test_result, new_test, test.installation_id)
+        except sqlite3.IntegrityError as e:
+            if not data.is_foreign_key_error(e):
+                raise
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Installation med ID '{test.installation_id}' ikke fundet"
+            )
+        if test_id is None:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Kunne ikke gemme testresultatet"
             )
         
-        # Få ID'et for den nyligt indsatte test
-        cursor = conn.cursor()
-        cursor.execute("SELECT last_insert_rowid()")
-        test_id = cursor.fetchone()[0]
-        
-        conn.close()
-        
         # Konverter tilbage til response model
         return TestResponse(
             id=test_id,
@@ -107,6 +127,8 @@ async def create_test(
             timestamp=new_test.timestamp
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Fejl ved oprettelse af test: {e}")
         raise HTTPException(
@@ -114,45 +136,127 @@ async def create_test(
             detail=f"Serverfejl: {str(e)}"
         )
 
+@router.post("/batch", response_model=List[TestResponse], status_code=status.HTTP_201_CREATED)
+async def create_tests_batch(
+    batch: TestBatchCreate,
+    db: AsyncDatabase = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Opretter mange testresultater på én gang, f.eks. en hel tavleinspektion.
+    Alle målinger valideres først og gemmes derefter i én transaktion.
+    """
+    try:
+        # Valider alle testtyper, før noget gemmes
+        valid_types = {test_type.value for test_type in TestType}
+        invalid = [index for index, test in enumerate(batch.tests) if test.test_type not in valid_types]
+        if invalid:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Ukendt testtype i målinger: {invalid}"
+            )
+        
+        # Bedøm alle målinger i ét gennemløb
+        timestamp = datetime.now()
+        new_tests = [
+            (test.installation_id, TestResult(
+                test_type=TestType(test.test_type),
+                value=test.value,
+                unit=test.unit,
+                status=grade_test(test.test_type, test.value, test.unit, test.notes) or UNGRADED_STATUS,
+                notes=test.notes,
+                image_path=test.image_path,
+                timestamp=timestamp,
+                rule_version=rule_version_for_notes(test.test_type, test.unit, test.notes)
+            ))
+            for test in batch.tests
+        ]
+        
+        # Gem alle testene i én transaktion. Fremmednøglen afviser hele bidden
+        # hvis en installation ikke findes; kun da slås de manglende op
+        try:
+            test_ids = await db.write(data.save_test_results_bulk, new_tests)
+        except sqlite3.IntegrityError as e:
+            if not data.is_foreign_key_error(e):
+                raise
+            installation_ids = {test.installation_id for test in batch.tests}
+            missing = await db.run(data.get_missing_installations, installation_ids)
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Installationer ikke fundet: {', '.join(sorted(missing))}"
+            )
+        
+        return [
+            TestResponse(
+                id=test_id,
+                installation_id=installation_id,
+                test_type=new_test.test_type.value,
+                value=new_test.value,
+                unit=new_test.unit,
+                status=new_test.status.value,
+                notes=new_test.notes,
+                image_path=new_test.image_path,
+                timestamp=new_test.timestamp
+            )
+            for test_id, (installation_id, new_test) in zip(test_ids, new_tests)
+        ]
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Fejl ved oprettelse af tests: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Serverfejl: {str(e)}"
+        )
+
+@router.post("/regrade", response_model=RegradeStatus, status_code=status.HTTP_202_ACCEPTED)
+async def start_regrade(
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Starter en genberegning af de testresultater, der er bedømt efter
+    grænseværdier, som siden er ændret. Kører i baggrunden.
+    """
+    if not regrade_job.start(pool.connection):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="En genberegning kører allerede"
+        )
+    logging.info("Genberegning af testresultater startet")
+    return regrade_job.state()
+
+@router.get("/regrade", response_model=RegradeStatus)
+async def read_regrade_status(
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Returnerer fremdriften for den seneste genberegning.
+    """
+    return regrade_job.state()
+
 @router.get("/{test_id}", response_model=TestResponse)
 async def read_test(
     test_id: int,
+    db: AsyncDatabase = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Henter et specifikt testresultat baseret på ID.
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            "SELECT id, installation_id, test_type, value, unit, status, timestamp, notes, image_path FROM test_results WHERE id = ?",
-            (test_id,)
-        )
-        row = cursor.fetchone()
+        row = await db.run(data.get_test_result, test_id)
         
         if row is None:
-            conn.close()
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Test med ID '{test_id}' ikke fundet"
             )
         
-        conn.close()
-        
-        return TestResponse(
-            id=row[0],
-            installation_id=row[1],
-            test_type=row[2],
-            value=row[3],
-            unit=row[4],
-            status=row[5],
-            timestamp=datetime.fromisoformat(row[6]) if row[6] else None,
-            notes=row[7],
-            image_path=row[8]
-        )
+        return row_to_test_response(row)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Fejl ved hentning af test: {e}")
         raise HTTPException(
@@ -160,43 +264,43 @@ async def read_test(
             detail=f"Serverfejl: {str(e)}"
         )
 
-@router.get("/", response_model=List[TestResponse])
+@router.get("/", response_model=Union[List[TestResponse], TestPage])
 async def list_all_tests(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncDatabase = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Henter en liste af alle testresultater med paginering.
+    
+    Angives `cursor` (tom for første side), bruges cursor-paginering med nyeste
+    først, og svaret indeholder `items` og `next_cursor` i stedet for en liste.
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        if cursor is not None:
+            # Cursor-paginering på (timestamp, id): samme pris for alle sider
+            try:
+                after = decode_cursor(cursor, 2) if cursor else None
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Ugyldig cursor"
+                )
+            rows, next_key = await db.run(data.list_test_results_page, limit, after)
+            return json_response({
+                "items": rows_to_test_dicts(rows),
+                "next_cursor": encode_cursor(next_key) if next_key else None
+            })
         
         # Hent tests med paginering
-        cursor.execute(
-            "SELECT id, installation_id, test_type, value, unit, status, timestamp, notes, image_path FROM test_results LIMIT ? OFFSET ?",
-            (limit, skip)
-        )
-        rows = cursor.fetchall()
-        
-        tests = []
-        for row in rows:
-            tests.append(TestResponse(
-                id=row[0],
-                installation_id=row[1],
-                test_type=row[2],
-                value=row[3],
-                unit=row[4],
-                status=row[5],
-                timestamp=datetime.fromisoformat(row[6]) if row[6] else None,
-                notes=row[7],
-                image_path=row[8]
-            ))
-            
-        conn.close()
-        return tests
+        rows = await db.run(data.list_test_results, limit, skip)
         
+        return json_response(rows_to_test_dicts(rows))
+        
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Fejl ved hentning af tests: {e}")
         raise HTTPException(
@@ -207,80 +311,106 @@ async def list_all_tests(
 @router.get("/installation/{installation_id}", response_model=List[TestResponse])
 async def list_tests_by_installation(
     installation_id: str,
+    request: Request,
+    response: Response,
+    db: AsyncDatabase = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Henter alle testresultater for en specifik installation.
+    Svaret har et ETag; med et aktuelt If-None-Match returneres 304.
     """
     try:
-        conn = get_db_connection()
+        cached = await not_modified(request, response, db, test_results_scope(installation_id))
+        if cached is not None:
+            return cached
+        
+        rows = await db.run(data.list_test_results_by_installation, installation_id)
         
         # Tjek om installationen eksisterer
-        installation = get_installation(conn, installation_id)
-        if installation is None:
-            conn.close()
+        if rows is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Installation med ID '{installation_id}' ikke fundet"
             )
         
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT id, installation_id, test_type, value, unit, status, timestamp, notes, image_path FROM test_results WHERE installation_id = ?",
-            (installation_id,)
+        return json_response(rows_to_test_dicts(rows), response)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Fejl ved hentning af tests: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Serverfejl: {str(e)}"
         )
-        rows = cursor.fetchall()
-        
-        tests = []
-        for row in rows:
-            tests.append(TestResponse(
-                id=row[0],
-                installation_id=row[1],
-                test_type=row[2],
-                value=row[3],
-                unit=row[4],
-                status=row[5],
-                timestamp=datetime.fromisoformat(row[6]) if row[6] else None,
-                notes=row[7],
-                image_path=row[8]
-            ))
+
+@router.get("/installation/{installation_id}/history", response_model=TestHistory)
+async def read_test_history(
+    installation_id: str,
+    test_type: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    points: int = Query(500, ge=3, le=10000),
+    buckets: Optional[int] = Query(None, ge=1, le=10000),
+    db: AsyncDatabase = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Henter historikken for én testtype på en installation, sorteret efter tid.
+    
+    Uden `buckets` returneres op til `points` målinger, nedsamplet med LTTB, så
+    kurvens form bevares. Med `buckets` returneres min/maks/gennemsnit pr. interval.
+    """
+    try:
+        history = await db.run(
+            get_history, installation_id, test_type,
+            start=start, end=end, points=points, buckets=buckets
+        )
+        if history is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Installation med ID '{installation_id}' ikke fundet"
+            )
         
-        conn.close()
-        return tests
+        return TestHistory(**history)
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logging.error(f"Fejl ved hentning af tests: {e}")
+        logging.error(f"Fejl ved hentning af testhistorik: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Serverfejl: {str(e)}"
         )
 
+def grade_update(test_type: str, value: float, unit: str, notes: Optional[str]):
+    """
+    Bedømmer en opdateret måling til data.update_test_result.
+
+    Returns:
+        Tuple[Optional[str], str]: Status (None for en ukendt enhed, så den
+        gemte status beholdes) og regelversion
+    """
+    test_status = grade_test(test_type, value, unit, notes)
+    return (
+        test_status.value if test_status is not None else None,
+        rule_version_for_notes(test_type, unit, notes)
+    )
+
 @router.put("/{test_id}", response_model=TestResponse)
 async def update_test(
     test_id: int,
     test_update: TestUpdate,
+    db: AsyncDatabase = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Opdaterer et eksisterende testresultat.
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Tjek om testen eksisterer
-        cursor.execute("SELECT * FROM test_results WHERE id = ?", (test_id,))
-        existing_test = cursor.fetchone()
-        if existing_test is None:
-            conn.close()
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Test med ID '{test_id}' ikke fundet"
-            )
-        
         # Byg update query baseret på de angivne felter
         update_fields = {}
-        update_values = []
         
         if test_update.value is not None:
             update_fields["value"] = test_update.value
@@ -293,38 +423,26 @@ async def update_test(
         if test_update.image_path is not None:
             update_fields["image_path"] = test_update.image_path
         
-        # Hvis der er felter at opdatere
-        if update_fields:
-            query = "UPDATE test_results SET "
-            query += ", ".join([f"{key} = ?" for key in update_fields.keys()])
-            query += " WHERE id = ?"
-            
-            values = list(update_fields.values())
-            values.append(test_id)
-            
-            cursor.execute(query, values)
-            conn.commit()
-        
-        # Hent den opdaterede test
-        cursor.execute(
-            "SELECT id, installation_id, test_type, value, unit, status, timestamp, notes, image_path FROM test_results WHERE id = ?",
-            (test_id,)
-        )
-        row = cursor.fetchone()
-        conn.close()
+        # En manuelt sat status må ikke overskrives af genberegning, mens en ny
+        # værdi, enhed eller nye bemærkninger bedømmes igen med det samme
+        grade = None
+        if test_update.status is not None:
+            update_fields["rule_version"] = MANUAL_RULE_VERSION
+        elif test_update.value is not None or test_update.unit is not None or test_update.notes is not None:
+            grade = grade_update
         
-        return TestResponse(
-            id=row[0],
-            installation_id=row[1],
-            test_type=row[2],
-            value=row[3],
-            unit=row[4],
-            status=row[5],
-            timestamp=datetime.fromisoformat(row[6]) if row[6] else None,
-            notes=row[7],
-            image_path=row[8]
-        )
+        # Opdater og få den opdaterede test tilbage i samme sætning
+        row = await db.write(data.update_test_result, test_id, update_fields, grade)
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Test med ID '{test_id}' ikke fundet"
+            )
+        
+        return row_to_test_response(row)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Fejl ved opdatering af test: {e}")
         raise HTTPException(
@@ -335,31 +453,25 @@ async def update_test(
 @router.delete("/{test_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_test(
     test_id: int,
+    db: AsyncDatabase = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Sletter et testresultat.
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Tjek om testen eksisterer
-        cursor.execute("SELECT id FROM test_results WHERE id = ?", (test_id,))
-        if cursor.fetchone() is None:
-            conn.close()
+        # Slet testen, hvis den eksisterer
+        deleted = await db.write(data.delete_test_result, test_id)
+        if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Test med ID '{test_id}' ikke fundet"
             )
         
-        # Slet testen
-        cursor.execute("DELETE FROM test_results WHERE id = ?", (test_id,))
-        conn.commit()
-        conn.close()
-        
         return None
         
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Fejl ved sletning af test: {e}")
         raise HTTPException(
@@ -367,38 +479,61 @@ async def delete_test(
             detail=f"Serverfejl: {str(e)}"
         )
 
-@router.post("/upload-image", status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/upload-image",
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra={"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+        "type": "object",
+        "properties": {"file": {"type": "string", "format": "binary"}},
+        "required": ["file"],
+    }}}}}
+)
 async def upload_test_image(
-    file: UploadFile = File(...),
+    request: Request,
     current_user: User = Depends(get_current_active_user)
 ):
     """
-    Upload af billeddata for testresultater.
+    Upload af billeddata for testresultater (multipart/form-data med feltet "file").
+    Filen streames fra requesten direkte til disk i bidder og gemmes under sin SHA-256,
+    så ens billeder kun gemmes én gang. Bodyen læses selv i stedet for via UploadFile,
+    så filen ikke først spooles af Starlette, og størrelsesgrænsen gælder mens den modtages.
     """
     try:
-        # Generere et unikt filnavn
-        file_extension = file.filename.split(".")[-1]
-        unique_filename = f"{uuid.uuid4()}.{file_extension}"
+        # Afvis åbenlyst for store uploads, før der læses noget
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > IMAGE_MAX_BYTES + MULTIPART_OVERHEAD_BYTES:
+            raise ImageTooLargeError(IMAGE_MAX_BYTES)
+        
+        stored = await receive_image(request, "file", IMAGE_DIR, IMAGE_MAX_BYTES, IMAGE_CHUNK_SIZE)
         
-        # Opret mappen til testbilleder, hvis den ikke findes
-        image_dir = os.path.join("static", "test_images")
-        os.makedirs(image_dir, exist_ok=True)
+        if stored.duplicate:
+            logging.info(f"Billede {stored.sha256} findes allerede, genbruger filen")
         
-        # Gem filen
-        file_path = os.path.join(image_dir, unique_filename)
-        with open(file_path, "wb") as image_file:
-            content = await file.read()
-            image_file.write(content)
+        # Thumbnail og preview laves i baggrunden; eksisterende versioner genbruges
+        schedule_derivatives(stored.path)
         
         # Returner filstien som kan bruges til test-resultatet
         return {
-            "image_path": file_path,
-            "filename": unique_filename
+            "image_path": stored.path,
+            "filename": stored.filename,
+            "sha256": stored.sha256,
+            "size": stored.size,
+            "duplicate": stored.duplicate
         }
         
+    except ImageTooLargeError:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Billedet er for stort (maks {IMAGE_MAX_BYTES // (1024 * 1024)} MB)"
+        )
+    except UploadError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         logging.error(f"Fejl ved upload af billede: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Serverfejl: {str(e)}"
-        )
\ No newline at end of file
+        )
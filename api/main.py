@@ -1,5 +1,7 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
+import asyncio
 import logging
 import os
 import sys
@@ -9,14 +11,44 @@ from api.endpoints import tasks
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Konfigurer logging
-from config import LOG_LEVEL, LOG_FORMAT, APP_NAME, APP_VERSION
+from config import (
+    LOG_LEVEL, LOG_FORMAT, APP_NAME, APP_VERSION,
+    COMPRESSION_MINIMUM_SIZE, COMPRESSION_GZIP_LEVEL, COMPRESSION_BROTLI_QUALITY
+)
 logging.basicConfig(level=getattr(logging, LOG_LEVEL), format=LOG_FORMAT)
 
+from api.database import db, pool, writer, regrade_job
+from api.middleware import CompressionMiddleware
+from api.endpoints.auth import token_cache, password_executor, get_current_active_user, User
+from src.data.migrations import check_foreign_keys, migrate
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Håndterer opstart og nedlukning af applikationen.
+    """
+    # Bring databaseskemaet op til nyeste version før første request
+    with pool.connection() as conn:
+        migrate(conn)
+    # Rækker skrevet før fremmednøglerne blev håndhævet kan pege på slettede
+    # installationer. Tjekket læser alle testresultater og opgaver, så det kører
+    # i baggrunden i stedet for at forsinke opstarten
+    foreign_key_check = asyncio.create_task(db.run(check_foreign_keys))
+    yield
+    foreign_key_check.cancel()
+    # Stop en kørende genberegning, før skrivetråden lukkes
+    regrade_job.stop()
+    # Luk databasens trådpulje og alle forbindelser i puljen
+    db.close()
+    password_executor.shutdown(wait=False)
+    images.image_executor.shutdown(wait=False, cancel_futures=True)
+
 # Opret FastAPI app
 app = FastAPI(
     title=APP_NAME,
     description="API til ElSikkerhed applikationen",
-    version=APP_VERSION
+    version=APP_VERSION,
+    lifespan=lifespan
 )
 
 # Tilføj CORS middleware for at tillade cross-origin requests
@@ -29,14 +61,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Komprimér store svar (JSON-lister, eksport) med gzip eller brotli
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=COMPRESSION_MINIMUM_SIZE,
+    gzip_level=COMPRESSION_GZIP_LEVEL,
+    brotli_quality=COMPRESSION_BROTLI_QUALITY,
+)
+
 # Importér og inkludér router endpoints
-from api.endpoints import auth, installations, tests
+from api.endpoints import auth, installations, tests, export, images, dashboard, search, sync
 
 # Tilføj de forskellige endpoints til app
 app.include_router(auth.router, prefix="/auth", tags=["Autentificering"])
 app.include_router(installations.router, prefix="/installations", tags=["Installationer"])
 app.include_router(tests.router, prefix="/tests", tags=["Tests"])
 app.include_router(tasks.router, prefix="/tasks", tags=["Opgaver"])
+app.include_router(export.router, prefix="/export", tags=["Eksport"])
+app.include_router(images.router, prefix="/images", tags=["Billeder"])
+app.include_router(dashboard.router, prefix="/dashboard", tags=["Dashboard"])
+app.include_router(search.router, prefix="/search", tags=["Søgning"])
+app.include_router(sync.router, prefix="/sync", tags=["Synkronisering"])
 @app.get("/", tags=["Root"])
 async def root():
     """
@@ -49,10 +94,29 @@ async def root():
         "endpoints": [
             "/auth", 
             "/installations", 
-            "/tests"
+            "/tests",
+            "/tasks",
+            "/export",
+            "/images",
+            "/dashboard",
+            "/search",
+            "/sync"
         ]
     }
 
+@app.get("/status", tags=["Root"])
+async def service_status(current_user: User = Depends(get_current_active_user)):
+    """
+    Returnerer driftsstatistik for API'et, bl.a. brugen af database-puljen.
+    Kræver login, da tallene viser API'ets interne tilstand og belastning.
+    """
+    return {
+        "db_pool": pool.stats(),
+        "db_writer": writer.stats(),
+        "auth_cache": token_cache.stats(),
+        "regrade": regrade_job.state()
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("api.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,221 @@
+from typing import Callable, List, Optional, Tuple
+import zlib
+
+try:
+    import brotli
+except ImportError:  # brotli er valgfri; uden den bruges kun gzip
+    brotli = None
+
+# Indholdstyper der kan betale sig at komprimere. Billeder, PDF'er (allerede
+# FlateDecode) og xlsx (zip) er komprimeret i forvejen.
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/msgpack",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+def parse_accept_encoding(value: str) -> dict:
+    """
+    Læser Accept-Encoding, f.eks. "gzip, br;q=0.8, *;q=0", til {kodning: q}.
+    """
+    encodings = {}
+    for part in value.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, number = param.strip().partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(number)
+                except ValueError:
+                    q = 0.0
+        encodings[name] = q
+    return encodings
+
+def choose_encoding(accept_encoding: str, brotli_available: bool = brotli is not None) -> Optional[str]:
+    """
+    Vælger den bedste kodning klienten accepterer: br (hvis brotli er installeret) før gzip.
+
+    Returns:
+        Optional[str]: "br", "gzip" eller None for ukomprimeret
+    """
+    encodings = parse_accept_encoding(accept_encoding)
+    wildcard = encodings.get("*", 0.0)
+    candidates = (["br"] if brotli_available else []) + ["gzip"]
+    best, best_q = None, 0.0
+    for encoding in candidates:
+        q = encodings.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+class _Compressor:
+    """Fælles grænseflade for gzip og brotli i streaming-tilstand."""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._gzip = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data: bytes) -> bytes:
+        """Komprimerer en del og tømmer bufferen, så klienten kan læse den med det samme."""
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._gzip.compress(data) + self._gzip.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes) -> bytes:
+        """Komprimerer den sidste del og afslutter strømmen."""
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.finish()
+        return self._gzip.compress(data) + self._gzip.flush()
+
+def _header(headers: List[Tuple[bytes, bytes]], name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+def _strip_etag_suffixes(value: bytes) -> bytes:
+    """Fjerner kodningssuffikset som middleware sætter på ETags, f.eks. "abc-gzip" -> "abc"."""
+    for suffix in (b'-gzip"', b'-br"'):
+        value = value.replace(suffix, b'"')
+    return value
+
+class CompressionMiddleware:
+    """
+    Komprimerer svar med gzip eller brotli efter klientens Accept-Encoding.
+
+    Svar mindre end `minimum_size` sendes ukomprimeret. Streamede svar (f.eks.
+    eksport) komprimeres del for del, og hver del sendes videre med det samme.
+    Stærke ETags får kodningen som suffiks, da de komprimerede bytes er en anden
+    repræsentation; suffikset fjernes igen fra If-None-Match, så betingede GET
+    stadig giver 304.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = scope["headers"]
+        encoding = choose_encoding((_header(headers, b"accept-encoding") or b"").decode("latin-1"))
+        # Range-forespørgsler (billeder) skal have de ukomprimerede bytes
+        if _header(headers, b"range") is not None:
+            encoding = None
+
+        if_none_match = _header(headers, b"if-none-match")
+        # Et 304 skal have det ETag klienten har gemt: med suffiks kun hvis det
+        # gemte svar var komprimeret (små svar komprimeres ikke)
+        encoded_etag = (
+            encoding is not None and if_none_match is not None
+            and b"-" + encoding.encode("ascii") + b'"' in if_none_match
+        )
+        if if_none_match is not None:
+            scope = dict(scope)
+            scope["headers"] = [
+                (key, _strip_etag_suffixes(value) if key.lower() == b"if-none-match" else value)
+                for key, value in headers
+            ]
+
+        responder = _CompressionResponder(
+            send, encoding, encoded_etag, self.minimum_size, self.gzip_level, self.brotli_quality
+        )
+        await self.app(scope, receive, responder.send)
+
+class _CompressionResponder:
+    def __init__(self, send: Callable, encoding: Optional[str], encoded_etag: bool, minimum_size: int,
+                 gzip_level: int, brotli_quality: int):
+        self._send = send
+        self.encoding = encoding
+        self.encoded_etag = encoded_etag
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.start = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            # Vent med headers til første del af body, så vi kender størrelsen
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.start is None:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None and not self.passthrough:
+            await self._begin(body, more_body)
+            if self.passthrough:
+                await self._send(message)
+                return
+        elif self.passthrough:
+            await self._send(message)
+            return
+
+        data = self.compressor.chunk(body) if more_body else self.compressor.finish(body)
+        await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+    async def _begin(self, body: bytes, more_body: bool):
+        start = self.start
+        headers = list(start.get("headers", []))
+        content_type = (_header(headers, b"content-type") or b"").decode("latin-1").lower()
+        compressible = content_type.startswith(COMPRESSIBLE_TYPES)
+
+        if start["status"] == 304:
+            # 304 har ingen body, men skal have samme ETag og Vary som det gemte svar
+            compressible = True
+            if self.encoded_etag:
+                headers = self._encoded_etag(headers)
+
+        if compressible:
+            # Svaret afhænger af Accept-Encoding, også når det ikke komprimeres
+            vary = _header(headers, b"vary")
+            if vary is None:
+                headers.append((b"vary", b"Accept-Encoding"))
+            elif b"accept-encoding" not in vary.lower():
+                headers = [(key, value + b", Accept-Encoding" if key.lower() == b"vary" else value)
+                           for key, value in headers]
+
+        if (
+            self.encoding is None
+            or not compressible
+            or start["status"] in (204, 206, 304)
+            or _header(headers, b"content-encoding") is not None
+            or (not more_body and len(body) < self.minimum_size)
+        ):
+            self.passthrough = True
+            await self._send({**start, "headers": headers})
+            return
+
+        self.compressor = _Compressor(self.encoding, self.gzip_level, self.brotli_quality)
+        headers = [(key, value) for key, value in self._encoded_etag(headers) if key.lower() != b"content-length"]
+        headers.append((b"content-encoding", self.encoding.encode("ascii")))
+        await self._send({**start, "headers": headers})
+
+    def _encoded_etag(self, headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+        """Sætter kodningen som suffiks på et stærkt ETag."""
+        suffix = b"-" + self.encoding.encode("ascii") + b'"'
+        return [
+            (key, value[:-1] + suffix
+             if key.lower() == b"etag" and value.endswith(b'"') and not value.startswith(b"W/") else value)
+            for key, value in headers
+        ]
@@ -0,0 +1,36 @@
+from pydantic import BaseModel, Field
+from typing import List
+from datetime import datetime
+
+from api.models.test import TestResponse
+from api.models.task import TaskResponse
+
+class StatusCounts(BaseModel):
+    """
+    Model for the number of test results per status.
+    """
+    total: int
+    pass_: int = Field(..., alias="pass", description="Antal godkendte")
+    warning: int = Field(..., description="Antal advarsler")
+    fail: int = Field(..., description="Antal ikke godkendte")
+
+    class Config:
+        populate_by_name = True
+
+class TestTypeCounts(StatusCounts):
+    """
+    Model for the status counts of one test type.
+    """
+    test_type: str
+
+class DashboardSummary(BaseModel):
+    """
+    Model for the dashboard summary.
+    """
+    installation_count: int
+    totals: StatusCounts
+    test_counts: List[TestTypeCounts] = Field(..., description="Status fordelt på testtype")
+    recent_failures: List[TestResponse] = Field(..., description="Seneste ikke godkendte tests")
+    overdue_task_count: int = Field(..., description="Antal åbne opgaver med overskredet frist")
+    overdue_tasks: List[TaskResponse] = Field(..., description="De mest forsinkede opgaver")
+    generated_at: datetime = Field(..., description="Tidspunkt for beregningen; svaret caches kortvarigt")
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class InstallationBase(BaseModel):
@@ -27,11 +27,43 @@ class InstallationUpdate(BaseModel):
     installation_date: Optional[datetime] = None
     last_inspection: Optional[datetime] = None
 
+class InstallationCompliance(BaseModel):
+    """
+    Model for the latest result of each test type, summarised for an installation.
+    """
+    status: Optional[str] = Field(None, description="Samlet status; None hvis installationen ikke er testet")
+    test_types: int = Field(..., description="Antal testtyper med et resultat")
+    pass_: int = Field(..., alias="pass")
+    warning: int
+    fail: int
+
+    class Config:
+        populate_by_name = True
+
+class InstallationTestStatus(BaseModel):
+    """
+    Model for the latest result of one test type for an installation.
+    """
+    test_type: str
+    test_id: int
+    value: float
+    unit: str
+    status: str
+    timestamp: datetime
+
 class InstallationResponse(InstallationBase):
     """
     Model for installation response.
     """
     id: str
+    compliance: Optional[InstallationCompliance] = Field(None, description="Kun med i lister over installationer")
 
     class Config:
-        from_attributes = True  # Tillader konvertering fra ORM modeller (tidligere orm_mode)
\ No newline at end of file
+        from_attributes = True  # Tillader konvertering fra ORM modeller (tidligere orm_mode)
+
+class InstallationPage(BaseModel):
+    """
+    Model for a page of installations with cursor pagination.
+    """
+    items: List[InstallationResponse]
+    next_cursor: Optional[str] = Field(None, description="Cursor til næste side, None hvis der ikke er flere")
\ No newline at end of file
@@ -0,0 +1,20 @@
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+
+class SearchHit(BaseModel):
+    """
+    Model for one search result.
+    """
+    kind: Literal["installation", "task", "test"]
+    id: str
+    title: str = Field(..., description="Kundenavn, opgavetitel eller testtype")
+    subtitle: Optional[str] = Field(None, description="Adresse for installationer, ellers installations-ID")
+    snippet: Optional[str] = Field(None, description="Uddrag af den tekst der matchede")
+    score: Optional[float] = Field(None, description="bm25-score, lavere er bedre; None ved match på ID")
+
+class SearchResults(BaseModel):
+    """
+    Model for search results.
+    """
+    query: str
+    hits: List[SearchHit]
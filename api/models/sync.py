@@ -0,0 +1,27 @@
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional, Union
+
+from api.models.installation import InstallationResponse
+from api.models.task import TaskResponse
+from api.models.test import TestResponse
+
+class SyncChange(BaseModel):
+    """
+    Model for the latest change of one installation, test result or task.
+    """
+    version: int
+    entity: Literal["installation", "test", "task"]
+    id: str
+    deleted: bool = Field(..., description="True hvis rækken er slettet; data er da None")
+    data: Optional[Union[InstallationResponse, TestResponse, TaskResponse]] = Field(
+        None, description="Rækken som den ser ud nu, i samme form som listeendepunkterne"
+    )
+
+class SyncPage(BaseModel):
+    """
+    Model for a page of changes since a change log version.
+    """
+    changes: List[SyncChange]
+    next_since: int = Field(..., description="Sendes som since i næste kald")
+    has_more: bool = Field(..., description="True hvis der er flere ændringer efter next_since")
+    latest_version: int = Field(..., description="Nyeste version i ændringsloggen")
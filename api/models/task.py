@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class TaskBase(BaseModel):
@@ -40,4 +40,9 @@ class TaskResponse(TaskBase):
     actual_hours: Optional[float] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class TaskPage(BaseModel):
+    """Model for a page of tasks with cursor pagination."""
+    items: List[TaskResponse]
+    next_cursor: Optional[str] = Field(None, description="Cursor til næste side, None hvis der ikke er flere")
\ No newline at end of file
@@ -1,7 +1,9 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, computed_field
+from typing import List, Optional
 from datetime import datetime
 
+from src.data.images import image_filename
+
 class TestBase(BaseModel):
     """
     Base model for Test results.
@@ -18,6 +20,12 @@ class TestCreate(TestBase):
     """
     installation_id: str = Field(..., description="ID på installationen denne test tilhører")
 
+class TestBatchCreate(BaseModel):
+    """
+    Model for creating many test results in one request.
+    """
+    tests: List[TestCreate] = Field(..., min_length=1, max_length=1000, description="Målinger der skal gemmes")
+
 class TestUpdate(BaseModel):
     """
     Model for updating an existing test result.
@@ -28,6 +36,11 @@ class TestUpdate(BaseModel):
     notes: Optional[str] = Field(None, description="Nye bemærkninger")
     image_path: Optional[str] = Field(None, description="Ny sti til billede")
 
+def image_url(image_path: Optional[str], variant: str) -> Optional[str]:
+    """URL til en udgave af et gemt billede, None hvis stien ikke er fra store_image."""
+    filename = image_filename(image_path)
+    return f"/images/{filename}?variant={variant}" if filename else None
+
 class TestResponse(TestBase):
     """
     Model for test response.
@@ -37,5 +50,65 @@ class TestResponse(TestBase):
     status: str
     timestamp: datetime
 
+    @computed_field(description="URL til en lille udgave af billedet")
+    @property
+    def thumbnail_url(self) -> Optional[str]:
+        return image_url(self.image_path, "thumb")
+
+    @computed_field(description="URL til en udgave af billedet i skærmstørrelse")
+    @property
+    def preview_url(self) -> Optional[str]:
+        return image_url(self.image_path, "preview")
+
     class Config:
-        from_attributes = True  # Tillader konvertering fra ORM modeller (tidligere orm_mode)
\ No newline at end of file
+        from_attributes = True  # Tillader konvertering fra ORM modeller (tidligere orm_mode)
+
+class TestPage(BaseModel):
+    """
+    Model for a page of test results with cursor pagination.
+    """
+    items: List[TestResponse]
+    next_cursor: Optional[str] = Field(None, description="Cursor til næste side, None hvis der ikke er flere")
+
+class HistoryPoint(BaseModel):
+    """
+    Model for a single point in a measurement history.
+    """
+    timestamp: datetime
+    value: float
+
+class HistoryBucket(BaseModel):
+    """
+    Model for an aggregated time bucket in a measurement history.
+    """
+    start: datetime
+    end: datetime
+    count: int
+    min: float
+    max: float
+    mean: float
+
+class TestHistory(BaseModel):
+    """
+    Model for the measurement history of one test type on an installation.
+    """
+    installation_id: str
+    test_type: str
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    total: int = Field(..., description="Antal rå målinger i tidsrummet")
+    points: Optional[List[HistoryPoint]] = Field(None, description="Målinger, nedsamplet med LTTB")
+    buckets: Optional[List[HistoryBucket]] = Field(None, description="Min/maks/gennemsnit pr. tidsinterval")
+
+class RegradeStatus(BaseModel):
+    """
+    Model for the state of the background re-grading job.
+    """
+    status: str = Field(..., description="idle, running, done, stopped eller failed")
+    ruleset_version: str = Field(..., description="Version af de gældende grænseværdier")
+    stale: int = Field(..., description="Antal rækker bedømt efter forældede regler")
+    processed: int
+    changed: int = Field(..., description="Antal rækker hvis status blev ændret")
+    started: Optional[datetime] = None
+    finished: Optional[datetime] = None
+    error: Optional[str] = None
@@ -0,0 +1,117 @@
+from fastapi import Request, Response
+from fastapi.datastructures import Default, DefaultPlaceholder
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from contextvars import ContextVar
+from typing import Any, Callable, Mapping, Optional
+from starlette.background import BackgroundTask
+import msgpack
+
+from api.middleware import parse_accept_encoding
+
+# MessagePack som alternativ til JSON for instrumentbroen og mobilklienter.
+# Indholdet er det samme som i JSON (samme modeller, tidsstempler som ISO-strenge);
+# kun kodningen er anderledes, så tal fylder og koster mindre.
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+
+# Sættes pr. request af MessagePackRoute og læses når svaret kodes
+_msgpack_response: ContextVar[bool] = ContextVar("msgpack_response", default=False)
+
+def accepts_msgpack(accept: str) -> bool:
+    """
+    Tjekker om Accept foretrækker MessagePack frem for JSON.
+    JSON vælges når headeren mangler, ved */* og når JSON er nævnt med samme q.
+    """
+    # Accept har samme liste-med-q-syntaks som Accept-Encoding
+    types = parse_accept_encoding(accept)
+    msgpack_q = max(types.get(media_type, 0.0) for media_type in MSGPACK_MEDIA_TYPES)
+    if msgpack_q <= 0:
+        return False
+    json_q = types.get("application/json")
+    if json_q is None:
+        return True
+    return msgpack_q > json_q
+
+def is_msgpack(content_type: str) -> bool:
+    """Tjekker om en Content-Type er MessagePack."""
+    return content_type.split(";")[0].strip().lower() in MSGPACK_MEDIA_TYPES
+
+def msgpack_requested() -> bool:
+    """Om klienten har bedt om MessagePack i den aktuelle request."""
+    return _msgpack_response.get()
+
+class MessagePackResponse(Response):
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content)
+
+class NegotiatedResponse(JSONResponse):
+    """
+    Standardsvar for routes med MessagePackRoute: JSON, eller MessagePack
+    hvis klienten har bedt om det.
+    """
+
+    # Eksplicit status_code med standardværdi: FastAPI læser den fra signaturen til OpenAPI-skemaet
+    def __init__(self, content: Any = None, status_code: int = 200, headers: Optional[Mapping[str, str]] = None,
+                 media_type: Optional[str] = None, background: Optional[BackgroundTask] = None):
+        if msgpack_requested():
+            self.media_type = MSGPACK_MEDIA_TYPE
+        super().__init__(content, status_code, headers, media_type, background)
+
+    def render(self, content: Any) -> bytes:
+        if self.media_type == MSGPACK_MEDIA_TYPE:
+            return msgpack.packb(content)
+        return super().render(content)
+
+class MessagePackRequest(Request):
+    """Request hvis body er MessagePack; FastAPI læser den via json()."""
+
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            self._json = msgpack.unpackb(await self.body())
+        return self._json
+
+class MessagePackRoute(APIRoute):
+    """
+    Route der forhandler MessagePack via Accept og Content-Type.
+
+    Body med Content-Type: application/msgpack valideres mod de samme modeller
+    som JSON. Svar kodes som MessagePack når Accept foretrækker det; fejlsvar
+    er altid JSON.
+
+    Bruges som route_class på en APIRouter.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], *,
+                 response_class: Any = Default(JSONResponse), **kwargs):
+        if isinstance(response_class, DefaultPlaceholder):
+            response_class = Default(NegotiatedResponse)
+        super().__init__(path, endpoint, response_class=response_class, **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            if is_msgpack(request.headers.get("content-type", "")):
+                # FastAPI parser kun JSON-bodies, så requesten udgiver sig for at være JSON
+                scope = dict(request.scope)
+                scope["headers"] = [
+                    (key, b"application/json" if key == b"content-type" else value)
+                    for key, value in request.scope["headers"]
+                ]
+                request = MessagePackRequest(scope, request.receive)
+
+            token = _msgpack_response.set(accepts_msgpack(request.headers.get("accept", "")))
+            try:
+                response = await handler(request)
+            finally:
+                _msgpack_response.reset(token)
+
+            # Svaret afhænger af Accept, også 304 og JSON-svar
+            vary = response.headers.get("vary")
+            response.headers["vary"] = f"{vary}, Accept" if vary else "Accept"
+            return response
+
+        return route_handler
@@ -0,0 +1,52 @@
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+from datetime import datetime
+import re
+
+from api.negotiation import MessagePackResponse, msgpack_requested
+
+# Hurtig vej for store lister: databaserækker bliver til dicts og serialiseres direkte
+# med orjson, uden at bygge og validere en Pydantic-model pr. række. Rækkerne kommer
+# fra vores egne tabeller, så de har allerede de typer response-modellerne beskriver.
+
+# Tidsstempler gemt med datetime.isoformat() er allerede i det format Pydantic
+# serialiserer til og sendes uændret; alt andet normaliseres via Pydantic
+_ISO_DATETIME = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d{6})?")
+_DATETIME = TypeAdapter(datetime)
+
+def column_names(columns: str) -> tuple:
+    """Kolonnenavnene fra en kolonneliste som TEST_RESULT_COLUMNS."""
+    return tuple(name.strip() for name in columns.split(","))
+
+def iso_datetime(value: Optional[str]) -> Optional[str]:
+    """Et tidsstempel fra databasen, formateret som Pydantic ville serialisere det."""
+    if value is None or _ISO_DATETIME.fullmatch(value):
+        return value
+    return _DATETIME.dump_python(_DATETIME.validate_python(value), mode="json")
+
+def rows_to_dicts(names: Sequence[str], rows: Iterable[tuple],
+                  datetime_fields: Sequence[str] = ()) -> List[Dict[str, Any]]:
+    """
+    Konverterer databaserækker til dicts med kolonnenavnene som nøgler.
+    Felterne i `datetime_fields` formateres med iso_datetime.
+    """
+    items = [dict(zip(names, row)) for row in rows]
+    for item in items:
+        for field in datetime_fields:
+            item[field] = iso_datetime(item[field])
+    return items
+
+def json_response(content: Any, response: Optional[Response] = None) -> Response:
+    """
+    Returnerer `content` som JSON uden FastAPI's validering mod response_model,
+    eller som MessagePack hvis klienten har bedt om det (se api.negotiation).
+    Headers sat på `response` (f.eks. ETag) tages med.
+    """
+    fast = MessagePackResponse(content) if msgpack_requested() else ORJSONResponse(content)
+    if response is not None:
+        for key, value in response.headers.items():
+            if key != "content-length":
+                fast.headers[key] = value
+    return fast
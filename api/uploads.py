@@ -0,0 +1,140 @@
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from typing import Optional
+import sys
+import os
+
+from python_multipart.exceptions import FormParserError
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+# Tilføj projektets rodmappe til Python's path, så vi kan importere fra src
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data.images import ImageUpload, ImageTooLargeError, StoredImage, image_extension
+
+# Plads til boundaries, part-headers og små felter ud over selve filen
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+class UploadError(ValueError):
+    """Kastes når en upload ikke er en gyldig multipart/form-data body med filfeltet."""
+
+class _FilePartReceiver:
+    """
+    Callbacks til MultipartParser, der samler data fra ét filfelt op.
+    Data fra andre felter kasseres.
+    """
+
+    def __init__(self, field_name: str):
+        self.field_name = field_name
+        self.filename: Optional[str] = None
+        self.data = bytearray()
+        self.found = False
+        self._in_file = False
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+
+    def on_part_begin(self):
+        self._in_file = False
+        self._disposition = b""
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._disposition)
+        name = options.get(b"name", b"").decode("utf-8", errors="replace")
+        if name != self.field_name or b"filename" not in options:
+            return
+        if self.found:
+            raise UploadError(f"Feltet '{self.field_name}' må kun indeholde én fil")
+        self.found = True
+        self._in_file = True
+        self.filename = options[b"filename"].decode("utf-8", errors="replace")
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self._in_file:
+            self.data += data[start:end]
+
+    def on_part_end(self):
+        self._in_file = False
+
+async def receive_image(request: Request, field_name: str, image_dir: str, max_bytes: int,
+                        chunk_size: int) -> StoredImage:
+    """
+    Streamer filfeltet i en multipart/form-data body direkte til billedlageret.
+
+    I modsætning til UploadFile bliver bodyen ikke først spoolet til en midlertidig
+    fil af Starlette: filens data hashes og skrives mens de modtages, så billedet
+    kun skrives til disk én gang, og størrelsesgrænsen håndhæves undervejs i stedet
+    for efter hele bodyen er modtaget. Skrivningen sker i bidder af chunk_size i
+    trådpuljen, så event loopet ikke blokeres.
+
+    Args:
+        request: Requesten med bodyen
+        field_name: Navnet på filfeltet
+        image_dir: Mappe til gemte billeder
+        max_bytes: Maksimal billedstørrelse i bytes
+        chunk_size: Bytes pr. skrivning til disk
+
+    Returns:
+        StoredImage: Hvor billedet er gemt, og om det var en dublet
+
+    Raises:
+        ImageTooLargeError: Hvis billedet eller bodyen er for stor; intet gemmes
+        UploadError: Hvis bodyen ikke er multipart/form-data eller mangler filfeltet
+    """
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in options:
+        raise UploadError("Forventede multipart/form-data")
+
+    receiver = _FilePartReceiver(field_name)
+    parser = MultipartParser(options[b"boundary"], {
+        "on_part_begin": receiver.on_part_begin,
+        "on_part_data": receiver.on_part_data,
+        "on_part_end": receiver.on_part_end,
+        "on_header_field": receiver.on_header_field,
+        "on_header_value": receiver.on_header_value,
+        "on_header_end": receiver.on_header_end,
+        "on_headers_finished": receiver.on_headers_finished,
+    })
+
+    upload: Optional[ImageUpload] = None
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_bytes + MULTIPART_OVERHEAD_BYTES:
+                raise ImageTooLargeError(max_bytes)
+            parser.write(chunk)
+            if receiver.found and upload is None:
+                upload = await run_in_threadpool(
+                    ImageUpload, image_dir, image_extension(receiver.filename), max_bytes
+                )
+            if upload is not None and len(receiver.data) >= chunk_size:
+                data = bytes(receiver.data)
+                receiver.data.clear()
+                await run_in_threadpool(upload.write, data)
+        parser.finalize()
+
+        if upload is None:
+            raise UploadError(f"Feltet '{field_name}' med en fil mangler")
+        if receiver.data:
+            await run_in_threadpool(upload.write, bytes(receiver.data))
+        return await run_in_threadpool(upload.finish)
+    except BaseException as e:
+        # Også ved afbrudt forbindelse: den halve fil fjernes (lukning og sletning er hurtige)
+        if upload is not None:
+            upload.abort()
+        if isinstance(e, FormParserError):
+            raise UploadError(f"Ugyldig multipart-body: {e}") from e
+        raise
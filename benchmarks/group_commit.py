@@ -0,0 +1,83 @@
+"""
+Benchmark af skrive-gennemstrømning med og uden group commit.
+
+Et antal samtidige klienter gemmer testresultater via AsyncDatabase.write,
+én gang med en transaktion pr. skrivning på puljens forbindelser og én gang
+gennem GroupCommitWriter. Kører mod en midlertidig database.
+
+Kør fra projektets rodmappe:
+
+    python benchmarks/group_commit.py --writes 2000 --clients 1 8 32 --synchronous FULL
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data import db as data
+from src.data.async_db import AsyncDatabase
+from src.data.migrations import migrate
+from src.data.pool import ConnectionPool, DEFAULT_PRAGMAS
+from src.data.writer import GroupCommitWriter
+from src.models import Installation, TestResult, TestType, TestStatus
+
+def make_test(i: int) -> TestResult:
+    return TestResult(
+        test_type=TestType.RCD, value=20.0 + i % 17, unit="ms", status=TestStatus.PASS,
+        timestamp=datetime.now(), notes=None, image_path=None
+    )
+
+async def client(adb: AsyncDatabase, writes: int, latencies: list):
+    for i in range(writes):
+        start = time.perf_counter()
+        await adb.write(data.save_test_result, make_test(i), "INST-BENCH")
+        latencies.append(time.perf_counter() - start)
+
+async def run(adb: AsyncDatabase, writes: int, clients: int):
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(adb, writes // clients, latencies) for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, statistics.median(latencies), sorted(latencies)[int(len(latencies) * 0.95)]
+
+def main():
+    parser = argparse.ArgumentParser(description="Mål skrive-gennemstrømning med og uden group commit")
+    parser.add_argument("--writes", type=int, default=2000, help="Skrivninger i alt pr. kørsel")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32], help="Antal samtidige klienter")
+    parser.add_argument("--synchronous", default="NORMAL", choices=["OFF", "NORMAL", "FULL"], help="PRAGMA synchronous")
+    parser.add_argument("--delay-ms", type=float, default=2, help="GroupCommitWriter max_delay i ms")
+    args = parser.parse_args()
+
+    pragmas = {**DEFAULT_PRAGMAS, "synchronous": args.synchronous}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        pool = ConnectionPool(path, pragmas=pragmas)
+        with pool.connection() as conn:
+            migrate(conn)
+            with conn:
+                data.save_installation(conn, Installation(id="INST-BENCH", address="Benchvej 1", customer_name="Bench"))
+
+        print(f"synchronous={args.synchronous}, {args.writes} skrivninger pr. kørsel")
+        print(f"{'klienter':>8} {'':>14} {'skriv/s':>9} {'median ms':>10} {'p95 ms':>8}")
+        for clients in args.clients:
+            plain = AsyncDatabase(pool)
+            writer = GroupCommitWriter(path, pragmas=pragmas, max_delay=args.delay_ms / 1000)
+            grouped = AsyncDatabase(pool, writer=writer)
+            for name, adb in (("pr. skrivning", plain), ("group commit", grouped)):
+                rate, median, p95 = asyncio.run(run(adb, args.writes, clients))
+                print(f"{clients:>8} {name:>14} {rate:>9.0f} {median * 1000:>10.2f} {p95 * 1000:>8.2f}")
+            stats = writer.stats()
+            print(f"{'':>8} {'':>14} gns. {stats['avg_batch']} skrivninger pr. transaktion")
+            writer.close()
+            plain._executor.shutdown()
+            grouped._executor.shutdown()
+        pool.close()
+
+if __name__ == "__main__":
+    main()
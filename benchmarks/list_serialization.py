@@ -0,0 +1,114 @@
+"""
+Benchmark af serialisering for listeendepunkterne.
+
+Sammenligner prisen pr. række for den gamle vej (en Pydantic-model pr. række,
+som FastAPI derefter validerer og serialiserer igen) med den hurtige vej
+(rækker til dicts, serialiseret direkte med orjson). Tjekker også, at de to
+veje giver samme JSON, og sammenligner størrelse og parsetid for JSON og
+MessagePack (Accept: application/msgpack).
+
+Kør fra projektets rodmappe:
+
+    python benchmarks/list_serialization.py --rows 10000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import msgpack
+from pydantic import TypeAdapter
+
+from api.endpoints.installations import row_to_installation_response, rows_to_installation_dicts
+from api.endpoints.tasks import row_to_task_response, rows_to_task_dicts
+from api.endpoints.tests import row_to_test_response, rows_to_test_dicts
+from api.models.installation import InstallationResponse
+from api.models.task import TaskResponse
+from api.models.test import TestResponse
+from api.serialization import json_response
+
+def make_rows(count: int):
+    start = datetime(2024, 1, 1, 8, 0, 0)
+    tests = [
+        (i, f"INST-{i % 500:04d}", "RCD Test", 20.0 + i % 17, "ms", "Godkendt",
+         (start + timedelta(seconds=i, microseconds=i % 1000)).isoformat(),
+         "30 mA Type A" if i % 2 else None,
+         f"static/test_images/ab/{'ab' * 32}.jpg" if i % 10 == 0 else None)
+        for i in range(count)
+    ]
+    tasks = [
+        (f"task-{i}", f"Eftersyn {i}", "Kontrol af tavle", "Planlagt", "Medium", f"INST-{i % 500:04d}",
+         (start + timedelta(minutes=i)).isoformat(), (start + timedelta(days=30)).isoformat(), None,
+         "testuser", 2.5, None, None)
+        for i in range(count)
+    ]
+    installations = [
+        (f"INST-{i:06d}", f"Eksempelvej {i}, 8000 Aarhus C", f"Kunde {i}", start.isoformat(), None,
+         5, 4, 1, 0)
+        for i in range(count)
+    ]
+    return tests, tasks, installations
+
+def fastapi_path(model, to_model, rows) -> bytes:
+    """Som FastAPI gør med response_model: model pr. række, validering, dump og json.dumps."""
+    adapter = TypeAdapter(List[model])
+    objects = [to_model(row) for row in rows]
+    content = adapter.dump_python(adapter.validate_python(objects), mode="json", by_alias=True)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+def fast_path(to_dicts, rows) -> bytes:
+    return json_response(to_dicts(rows)).body
+
+def best_of(function, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark af serialisering af lister")
+    parser.add_argument("--rows", type=int, default=10000, help="Rækker pr. liste")
+    parser.add_argument("--repeat", type=int, default=5, help="Gentagelser; den hurtigste tæller")
+    args = parser.parse_args()
+
+    tests, tasks, installations = make_rows(args.rows)
+    cases = [
+        ("tests", TestResponse, row_to_test_response, rows_to_test_dicts, tests),
+        ("tasks", TaskResponse, row_to_task_response, rows_to_task_dicts, tasks),
+        ("installations", InstallationResponse, row_to_installation_response, rows_to_installation_dicts, installations),
+    ]
+
+    print(f"{'liste':<14} {'gammel µs/række':>16} {'hurtig µs/række':>16} {'faktor':>7} {'bytes':>10}")
+    for name, model, to_model, to_dicts, rows in cases:
+        old_body = fastapi_path(model, to_model, rows)
+        new_body = fast_path(to_dicts, rows)
+        if json.loads(old_body) != json.loads(new_body):
+            raise SystemExit(f"{name}: den hurtige vej giver ikke samme JSON")
+
+        old = best_of(lambda: fastapi_path(model, to_model, rows), args.repeat)
+        new = best_of(lambda: fast_path(to_dicts, rows), args.repeat)
+        print(f"{name:<14} {old * 1e6 / len(rows):>16.2f} {new * 1e6 / len(rows):>16.2f} "
+              f"{old / new:>6.1f}x {len(new_body):>10}")
+
+    print()
+    print(f"{'liste':<14} {'json bytes':>11} {'msgpack bytes':>14} {'json parse µs/række':>20} {'msgpack parse µs/række':>23}")
+    for name, model, to_model, to_dicts, rows in cases:
+        json_body = fast_path(to_dicts, rows)
+        msgpack_body = msgpack.packb(to_dicts(rows))
+        if msgpack.unpackb(msgpack_body) != json.loads(json_body):
+            raise SystemExit(f"{name}: MessagePack giver ikke samme indhold som JSON")
+
+        json_parse = best_of(lambda: json.loads(json_body), args.repeat)
+        msgpack_parse = best_of(lambda: msgpack.unpackb(msgpack_body), args.repeat)
+        print(f"{name:<14} {len(json_body):>11} {len(msgpack_body):>14} "
+              f"{json_parse * 1e6 / len(rows):>20.2f} {msgpack_parse * 1e6 / len(rows):>23.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark af login-gennemstrømning.
+
+Sender et antal samtidige logins mod API'et og måler samtidig svartiden for
+et let endepunkt. Svartiden viser, om event loopet forbliver svarende, mens
+bcrypt arbejder.
+
+Kør fra projektets rodmappe:
+
+    python benchmarks/login_throughput.py --logins 50 --concurrency 20
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from api.main import app
+
+async def login(client: httpx.AsyncClient, semaphore: asyncio.Semaphore) -> float:
+    async with semaphore:
+        start = time.perf_counter()
+        response = await client.post("/auth/token", data={"username": "testuser", "password": "password123"})
+        response.raise_for_status()
+        return time.perf_counter() - start
+
+async def probe(client: httpx.AsyncClient, stop: asyncio.Event, interval: float) -> list:
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get("/")
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(interval)
+    return latencies
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+async def run(logins: int, concurrency: int, interval: float):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        semaphore = asyncio.Semaphore(concurrency)
+        stop = asyncio.Event()
+        probe_task = asyncio.create_task(probe(client, stop, interval))
+
+        start = time.perf_counter()
+        login_times = await asyncio.gather(*(login(client, semaphore) for _ in range(logins)))
+        elapsed = time.perf_counter() - start
+
+        stop.set()
+        probe_times = await probe_task
+
+    print(f"Logins:             {logins} ({concurrency} samtidige)")
+    print(f"Samlet tid:         {elapsed:.2f} s")
+    print(f"Gennemstrømning:    {logins / elapsed:.1f} logins/s")
+    print(f"Login svartid:      median {statistics.median(login_times) * 1000:.0f} ms, "
+          f"p95 {percentile(login_times, 0.95) * 1000:.0f} ms")
+    print(f"Andre kald:         {len(probe_times)} kald, median {statistics.median(probe_times) * 1000:.1f} ms, "
+          f"p95 {percentile(probe_times, 0.95) * 1000:.1f} ms, maks {max(probe_times) * 1000:.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Mål login-gennemstrømning og event loop svartid")
+    parser.add_argument("--logins", type=int, default=50, help="Antal logins i alt")
+    parser.add_argument("--concurrency", type=int, default=20, help="Antal samtidige logins")
+    parser.add_argument("--interval", type=float, default=0.01, help="Pause mellem kald til det lette endepunkt (s)")
+    args = parser.parse_args()
+
+    # httpx logger hvert kald på INFO-niveau
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    asyncio.run(run(args.logins, args.concurrency, args.interval))
+
+if __name__ == "__main__":
+    main()
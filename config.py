@@ -1,6 +1,47 @@
 # Database configuration
 DB_PATH = "elsikkerhed.db"
 
+# Database connection pool
+DB_POOL_SIZE = 8
+DB_POOL_TIMEOUT = 10.0  # seconds to wait for a free connection
+DB_CACHE_SIZE_KB = 20000
+DB_MMAP_SIZE = 256 * 1024 * 1024
+DB_BUSY_TIMEOUT_MS = 5000
+
+# Group commit: API writes are queued to one writer thread and committed together
+DB_WRITER_MAX_BATCH = 128  # writes per transaction
+DB_WRITER_MAX_DELAY_MS = 2  # wait for more writes after the first one in a batch
+DB_WRITER_QUEUE_SIZE = 1000  # pending writes before requests get 503
+
+# Export settings
+EXPORT_CHUNK_SIZE = 1000  # rows fetched and encoded per streamed chunk
+EXPORT_MAX_CONCURRENT = 4  # exports streaming at once, each on its own connection
+
+# Re-grading settings
+REGRADE_WORKERS = 2  # processes grading chunks in a re-grade job
+REGRADE_CHUNK_SIZE = 5000  # rows graded and committed per chunk
+
+# Image upload settings
+IMAGE_DIR = "static/test_images"
+IMAGE_MAX_BYTES = 25 * 1024 * 1024  # larger uploads are rejected with 413
+IMAGE_CHUNK_SIZE = 256 * 1024  # bytes read, hashed and written per step
+IMAGE_WORKERS = 2  # processes generating thumbnails and previews
+
+# Report settings
+REPORT_CACHE_DIR = "static/reports"  # rendered reports, one folder per installation, named by content hash
+REPORT_WORKERS = 4  # processes used by batch report generation
+
+# Dashboard settings
+DASHBOARD_CACHE_TTL = 15  # seconds a computed summary is reused
+
+# Response compression settings (brotli is used when the brotli package is installed)
+COMPRESSION_MINIMUM_SIZE = 1024  # bytes; smaller responses are sent uncompressed
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 4
+
+# Authentication settings
+PASSWORD_HASH_WORKERS = 4  # concurrent bcrypt hash/verify calls
+
 # Logging configuration
 LOG_LEVEL = "INFO"
 LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
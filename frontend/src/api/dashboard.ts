@@ -0,0 +1,22 @@
+// src/api/dashboard.ts
+import axios from 'axios';
+import { DashboardSummary } from '../models/dashboard';
+
+const API_URL = 'http://localhost:8000';
+
+/**
+ * Henter nøgletal til dashboardet
+ */
+export const getDashboardSummary = async (token: string): Promise<DashboardSummary> => {
+    try {
+        const response = await axios.get(`${API_URL}/dashboard/summary`, {
+            headers: {
+                Authorization: `Bearer ${token}`,
+            },
+        });
+        return response.data;
+    } catch (error) {
+        console.error('Fejl ved hentning af dashboard:', error);
+        throw new Error('Kunne ikke hente dashboard');
+    }
+};
@@ -107,6 +107,30 @@ export const deleteTest = async (token: string, testId: string): Promise<void> =
   }
 };
 
+/**
+ * Fuld URL til et billede fra API'et, f.eks. test.preview_url
+ */
+export const getImageUrl = (path: string): string => `${API_URL}${path}`;
+
+/**
+ * Henter et billede fra API'et med login og returnerer en object URL til et <img>-tag.
+ * Kalderen frigiver den med URL.revokeObjectURL, når billedet ikke længere vises.
+ */
+export const fetchImageObjectUrl = async (token: string, path: string): Promise<string> => {
+  try {
+    const response = await axios.get(getImageUrl(path), {
+      headers: {
+        Authorization: `Bearer ${token}`,
+      },
+      responseType: 'blob',
+    });
+    return URL.createObjectURL(response.data);
+  } catch (error) {
+    console.error(`Fejl ved hentning af billede ${path}:`, error);
+    throw new Error('Kunne ikke hente billede');
+  }
+};
+
 /**
  * Upload billede til et testresultat
  */
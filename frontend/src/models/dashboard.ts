@@ -0,0 +1,24 @@
+// src/models/dashboard.ts
+import { Task } from './task';
+import { Test } from './test';
+
+export interface StatusCounts {
+    total: number;
+    pass: number;
+    warning: number;
+    fail: number;
+}
+
+export interface TestTypeCounts extends StatusCounts {
+    test_type: string;
+}
+
+export interface DashboardSummary {
+    installation_count: number;
+    totals: StatusCounts;
+    test_counts: TestTypeCounts[];
+    recent_failures: Test[];
+    overdue_task_count: number;
+    overdue_tasks: Task[];
+    generated_at: string;
+}
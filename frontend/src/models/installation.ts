@@ -1,11 +1,29 @@
 // src/models/installation.ts
 
+export interface InstallationCompliance {
+    status: string | null;
+    test_types: number;
+    pass: number;
+    warning: number;
+    fail: number;
+  }
+
+  export interface InstallationTestStatus {
+    test_type: string;
+    test_id: number;
+    value: number;
+    unit: string;
+    status: string;
+    timestamp: string;
+  }
+
 export interface Installation {
     id: string;
     address: string;
     customer_name: string;
     installation_date: string | null;
     last_inspection: string | null;
+    compliance?: InstallationCompliance | null;
   }
   
   export interface InstallationCreate {
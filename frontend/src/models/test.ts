@@ -25,6 +25,8 @@ export enum TestType {
     technician?: string;
     notes?: string;
     image_path?: string;
+    thumbnail_url?: string | null;
+    preview_url?: string | null;
   }
   
   export interface TestCreate {
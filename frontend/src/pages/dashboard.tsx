@@ -2,7 +2,7 @@
 import React, { useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
 import { getInstallations } from '../api/installations';
-import { getAllTests } from '../api/tests';
+import { getDashboardSummary } from '../api/dashboard';
 import { useAuth } from '../contexts/AuthContext';
 import { Installation } from '../models/installation';
 import { Test, TestStatus } from '../models/test';
@@ -32,17 +32,10 @@ const Dashboard: React.FC = () => {
         const installationsData = await getInstallations(authToken, 0, 5);
         setInstallations(installationsData);
 
-        // Fetch recent tests
-        const testsData = await getAllTests(authToken, 0, 20);
-        setRecentTests(testsData.slice(0, 10)); // Only show 10 most recent
-
-        // Calculate test statistics
-        const total = testsData.length;
-        const pass = testsData.filter(test => test.status === TestStatus.PASS).length;
-        const fail = testsData.filter(test => test.status === TestStatus.FAIL).length;
-        const warning = testsData.filter(test => test.status === TestStatus.WARNING).length;
-
-        setTestStats({ total, pass, fail, warning });
+        // Fetch test statistics and recent failures, aggregated by the server
+        const summary = await getDashboardSummary(authToken);
+        setRecentTests(summary.recent_failures);
+        setTestStats(summary.totals);
       } catch (err) {
         console.error('Error fetching dashboard data:', err);
         setError('Der opstod en fejl ved hentning af data');
@@ -188,14 +181,14 @@ const Dashboard: React.FC = () => {
         {/* Seneste tests */}
         <div className="bg-white rounded-lg shadow overflow-hidden">
           <div className="bg-blue-500 text-white px-4 py-3 flex justify-between items-center">
-            <h2 className="text-lg font-semibold">Seneste Tests</h2>
+            <h2 className="text-lg font-semibold">Seneste fejl</h2>
             <Link to="/tests" className="text-sm hover:underline">
               Se alle
             </Link>
           </div>
           
           {recentTests.length === 0 ? (
-            <div className="p-4 text-gray-600">Ingen tests fundet</div>
+            <div className="p-4 text-gray-600">Ingen ikke godkendte tests</div>
           ) : (
             <div className="divide-y divide-gray-200">
               {recentTests.map((test) => (
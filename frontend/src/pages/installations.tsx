@@ -50,6 +50,20 @@ const Installations: React.FC = () => {
   const currentItems = filteredInstallations.slice(indexOfFirstItem, indexOfLastItem);
   const totalPages = Math.ceil(filteredInstallations.length / itemsPerPage);
 
+  // Farve til status-badge ud fra seneste resultat for hver testtype
+  const getComplianceColor = (status: string): string => {
+    switch (status) {
+      case 'Godkendt':
+        return 'bg-green-100 text-green-800';
+      case 'Ikke godkendt':
+        return 'bg-red-100 text-red-800';
+      case 'Advarsel':
+        return 'bg-yellow-100 text-yellow-800';
+      default:
+        return 'bg-gray-100 text-gray-800';
+    }
+  };
+
   // Formatér dato til dansk format
   const formatDate = (dateString: string | null): string => {
     if (!dateString) return 'Ikke angivet';
@@ -149,6 +163,12 @@ const Installations: React.FC = () => {
               >
                 Seneste Inspektion
               </th>
+              <th
+                scope="col"
+                className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider"
+              >
+                Status
+              </th>
               <th scope="col" className="relative px-6 py-3">
                 <span className="sr-only">Handlinger</span>
               </th>
@@ -157,7 +177,7 @@ const Installations: React.FC = () => {
           <tbody className="bg-white divide-y divide-gray-200">
             {currentItems.length === 0 ? (
               <tr>
-                <td colSpan={6} className="px-6 py-4 text-center text-gray-500">
+                <td colSpan={7} className="px-6 py-4 text-center text-gray-500">
                   {searchTerm ? 'Ingen installationer matcher din søgning' : 'Ingen installationer fundet'}
                 </td>
               </tr>
@@ -179,6 +199,18 @@ const Installations: React.FC = () => {
                   <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-500">
                     {formatDate(installation.last_inspection)}
                   </td>
+                  <td className="px-6 py-4 whitespace-nowrap text-sm">
+                    {installation.compliance?.status ? (
+                      <span
+                        className={`px-2 py-1 inline-flex text-xs leading-5 font-semibold rounded-full ${getComplianceColor(installation.compliance.status)}`}
+                        title={`${installation.compliance.test_types} testtyper: ${installation.compliance.pass} godkendt, ${installation.compliance.warning} advarsel, ${installation.compliance.fail} ikke godkendt`}
+                      >
+                        {installation.compliance.status}
+                      </span>
+                    ) : (
+                      <span className="text-gray-400">Ikke testet</span>
+                    )}
+                  </td>
                   <td className="px-6 py-4 whitespace-nowrap text-right text-sm font-medium">
                     <Link
                       to={`/installations/${installation.id}`}
@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import { Link, useNavigate, useParams } from 'react-router-dom';
-import { deleteTest, getTest } from '../api/tests';
+import { deleteTest, fetchImageObjectUrl, getTest } from '../api/tests';
 import { useAuth } from '../contexts/AuthContext';
 import { Test, TestStatus, TestType } from '../models/test';
 
@@ -14,6 +14,7 @@ const TestDetails: React.FC = () => {
   const [error, setError] = useState<string | null>(null);
   const [showDeleteConfirm, setShowDeleteConfirm] = useState(false);
   const [isDeleting, setIsDeleting] = useState(false);
+  const [imageUrl, setImageUrl] = useState<string | null>(null);
 
   useEffect(() => {
     const fetchTestData = async () => {
@@ -36,6 +37,30 @@ const TestDetails: React.FC = () => {
     fetchTestData();
   }, [authToken, testId]);
 
+  // Billeder kræver login, så de hentes med token i stedet for direkte i <img>-tagget
+  useEffect(() => {
+    if (!authToken || !test?.preview_url) return;
+
+    let objectUrl: string | null = null;
+    let cancelled = false;
+    fetchImageObjectUrl(authToken, test.preview_url)
+      .then((url) => {
+        objectUrl = url;
+        if (cancelled) {
+          URL.revokeObjectURL(url);
+        } else {
+          setImageUrl(url);
+        }
+      })
+      .catch((err) => console.error('Error fetching test image:', err));
+
+    return () => {
+      cancelled = true;
+      if (objectUrl) URL.revokeObjectURL(objectUrl);
+      setImageUrl(null);
+    };
+  }, [authToken, test?.preview_url]);
+
   const handleDelete = async () => {
     if (!authToken || !testId) return;
 
@@ -285,8 +310,9 @@ const TestDetails: React.FC = () => {
                 <dt className="text-sm font-medium text-gray-500">Billede</dt>
                 <dd className="mt-1 text-sm text-gray-900 sm:col-span-2">
                   <img 
-                    src={test.image_path} 
+                    src={test.preview_url ? imageUrl ?? undefined : test.image_path} 
                     alt="Test billede" 
+                    loading="lazy"
                     className="max-w-md rounded-md shadow-sm" 
                   />
                 </dd>
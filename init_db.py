@@ -2,6 +2,7 @@ import sqlite3
 import logging
 import os
 from config import DB_PATH
+from src.data.migrations import migrate
 
 # Konfigurer logging
 logging.basicConfig(level=logging.INFO, 
@@ -27,55 +28,11 @@ def init_database():
         conn = sqlite3.connect(DB_PATH)
         cursor = conn.cursor()
         
-        # Opret tabeller
+        # Opret tabeller og indekser via migrationerne
         logging.info("Opretter tabeller...")
+        version = migrate(conn)
         
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS installations (
-            id TEXT PRIMARY KEY,
-            address TEXT NOT NULL,
-            customer_name TEXT NOT NULL,
-            installation_date TEXT,
-            last_inspection TEXT
-        )                              
-        ''')
-        
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS test_results (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            installation_id TEXT,
-            test_type TEXT NOT NULL,
-            value REAL NOT NULL,
-            unit TEXT NOT NULL,
-            status TEXT NOT NULL,
-            timestamp TEXT NOT NULL,
-            notes TEXT,
-            image_path TEXT,
-            FOREIGN KEY (installation_id) REFERENCES installations (id)
-        )                    
-        ''')
-        
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS tasks (
-            id TEXT PRIMARY KEY,
-            title TEXT NOT NULL,
-            description TEXT,
-            status TEXT NOT NULL,
-            priority TEXT NOT NULL,
-            installation_id TEXT,
-            created_date TEXT NOT NULL,
-            due_date TEXT,
-            completed_date TEXT,
-            assigned_to TEXT,
-            estimated_hours REAL,
-            actual_hours REAL,
-            notes TEXT,
-            FOREIGN KEY (installation_id) REFERENCES installations (id)
-        )                    
-        ''')
-        
-        conn.commit()
-        logging.info(f"Database initialiseret korrekt i {DB_PATH}")
+        logging.info(f"Database initialiseret korrekt i {DB_PATH} (skemaversion {version})")
         
         # Test database forbindelsen med en simpel indsættelse
         cursor.execute("INSERT INTO installations VALUES (?, ?, ?, ?, ?)", 
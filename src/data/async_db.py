@@ -0,0 +1,87 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from src.data.pool import ConnectionPool
+from src.data.writer import GroupCommitWriter
+
+class AsyncDatabase:
+    """
+    Awaitable access to the synchronous data layer.
+
+    Every call borrows a pooled connection and runs on a dedicated DB thread
+    pool, so slow queries and commits never block the asyncio event loop.
+    The executor is sized to the connection pool, so concurrent requests scale
+    with the pool instead of being serialized on the loop.
+    """
+
+    def __init__(self, pool: ConnectionPool, max_workers: Optional[int] = None,
+                 writer: Optional[GroupCommitWriter] = None):
+        """
+        Args:
+            pool: Connection pool to borrow connections from
+            max_workers: Number of DB threads (default: the pool size)
+            writer: Writer that commits write() calls in groups; without one,
+                each write() gets its own transaction on a pooled connection
+        """
+        self.pool = pool
+        self.writer = writer
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or pool.max_size,
+            thread_name_prefix="db"
+        )
+
+    def _call(self, fn: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+        with self.pool.connection() as conn:
+            return fn(conn, *args, **kwargs)
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run fn(conn, *args, **kwargs) on a DB thread with a pooled connection.
+
+        Args:
+            fn: Data layer function taking a connection as first argument
+
+        Returns:
+            Any: The return value of fn
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor,
+            functools.partial(self._call, fn, args, kwargs)
+        )
+
+    def _call_in_transaction(self, fn: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+        with self.pool.connection() as conn:
+            with conn:
+                return fn(conn, *args, **kwargs)
+
+    async def write(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run the write fn(conn, *args, **kwargs) in a transaction and commit it.
+
+        fn must not commit or roll back itself. With a writer, concurrent
+        writes share one transaction, and each still gets its own result or
+        exception.
+
+        Args:
+            fn: Data layer write function taking a connection as first argument
+
+        Returns:
+            Any: The return value of fn, once committed
+        """
+        if self.writer is None:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor,
+                functools.partial(self._call_in_transaction, fn, args, kwargs)
+            )
+        return await asyncio.wrap_future(self.writer.submit(fn, *args, **kwargs))
+
+    def close(self):
+        """Wait for running calls and queued writes, then close the pool."""
+        self._executor.shutdown(wait=True)
+        if self.writer is not None:
+            self.writer.close()
+        self.pool.close()
@@ -0,0 +1,28 @@
+from typing import Sequence, Tuple
+
+# Områder med en ændringsversion i change_versions; triggerne fra migration 9
+# giver et område en ny version ved hver ændring af de data, det dækker
+INSTALLATIONS_SCOPE = "installations"
+TASKS_SCOPE = "tasks"
+
+def test_results_scope(installation_id: str) -> str:
+    """Scope covering the test results of one installation."""
+    return f"test_results:{installation_id}"
+
+def get_change_versions(conn, scopes: Sequence[str]) -> Tuple[int, ...]:
+    """
+    Get the current change version of each scope.
+
+    Args:
+        conn: SQLite database connection
+        scopes: Scope names, see INSTALLATIONS_SCOPE, TASKS_SCOPE and test_results_scope
+
+    Returns:
+        Tuple[int, ...]: One version per scope, in order; 0 for scopes that have never changed
+    """
+    placeholders = ", ".join("?" * len(scopes))
+    versions = dict(conn.execute(
+        f"SELECT scope, version FROM change_versions WHERE scope IN ({placeholders})",
+        list(scopes)
+    ).fetchall())
+    return tuple(versions.get(scope, 0) for scope in scopes)
@@ -0,0 +1,105 @@
+from datetime import datetime
+from typing import Any, Dict, List
+
+from src.data.db import TEST_RESULT_COLUMNS, TASK_COLUMNS
+from src.models import TestStatus
+
+# Skal stå ordret som i det partielle indeks idx_tasks_open_due, så SQLite kan bruge det
+OPEN_TASK_CONDITION = "status NOT IN ('Afsluttet', 'Annulleret')"
+
+def get_status_counts(conn) -> List[Dict[str, Any]]:
+    """
+    Count test results per test type and status.
+
+    Runs as a scan of the (test_type, status) index without touching the table.
+
+    Args:
+        conn: SQLite database connection
+
+    Returns:
+        List[Dict[str, Any]]: One dict per test type with total, pass, warning and fail counts
+    """
+    keys = {
+        TestStatus.PASS.value: "pass",
+        TestStatus.WARNING.value: "warning",
+        TestStatus.FAIL.value: "fail",
+    }
+    by_type: Dict[str, Dict[str, Any]] = {}
+    for test_type, status, count in conn.execute(
+        "SELECT test_type, status, COUNT(*) FROM test_results GROUP BY test_type, status"
+    ):
+        entry = by_type.setdefault(test_type, {"test_type": test_type, "total": 0, "pass": 0, "warning": 0, "fail": 0})
+        entry["total"] += count
+        if status in keys:
+            entry[keys[status]] += count
+    return [by_type[test_type] for test_type in sorted(by_type)]
+
+def get_recent_failures(conn, limit: int = 10) -> List[tuple]:
+    """
+    Get the most recent failed test results.
+
+    Args:
+        conn: SQLite database connection
+        limit: Maximum number of rows
+
+    Returns:
+        List[tuple]: Rows in TEST_RESULT_COLUMNS order, newest first
+    """
+    return conn.execute(
+        f"""SELECT {TEST_RESULT_COLUMNS} FROM test_results
+            WHERE status = ? ORDER BY timestamp DESC LIMIT ?""",
+        (TestStatus.FAIL.value, limit)
+    ).fetchall()
+
+def get_overdue_tasks(conn, now: datetime, limit: int = 10) -> Dict[str, Any]:
+    """
+    Get open tasks whose due date has passed.
+
+    Args:
+        conn: SQLite database connection
+        now: Reference time
+        limit: Maximum number of tasks to return
+
+    Returns:
+        Dict[str, Any]: "count" of all overdue tasks and "rows" (TASK_COLUMNS order), most overdue first
+    """
+    count = conn.execute(
+        f"SELECT COUNT(*) FROM tasks WHERE {OPEN_TASK_CONDITION} AND due_date < ?",
+        (now.isoformat(),)
+    ).fetchone()[0]
+    rows = conn.execute(
+        f"""SELECT {TASK_COLUMNS} FROM tasks
+            WHERE {OPEN_TASK_CONDITION} AND due_date < ? ORDER BY due_date LIMIT ?""",
+        (now.isoformat(), limit)
+    ).fetchall()
+    return {"count": count, "rows": rows}
+
+def get_dashboard_summary(conn, now: datetime, limit: int = 10) -> Dict[str, Any]:
+    """
+    Collect the figures shown on the dashboard.
+
+    Every query is an aggregate or a LIMIT on an index, so the cost does
+    not depend on how much history is stored beyond an index scan.
+
+    Args:
+        conn: SQLite database connection
+        now: Reference time for overdue tasks
+        limit: Maximum number of recent failures and overdue tasks
+
+    Returns:
+        Dict[str, Any]: installation_count, test_counts, totals, recent_failures,
+        overdue_task_count and overdue_tasks
+    """
+    test_counts = get_status_counts(conn)
+    overdue = get_overdue_tasks(conn, now, limit)
+    return {
+        "installation_count": conn.execute("SELECT COUNT(*) FROM installations").fetchone()[0],
+        "test_counts": test_counts,
+        "totals": {
+            key: sum(entry[key] for entry in test_counts)
+            for key in ("total", "pass", "warning", "fail")
+        },
+        "recent_failures": get_recent_failures(conn, limit),
+        "overdue_task_count": overdue["count"],
+        "overdue_tasks": overdue["rows"],
+    }
@@ -1,11 +1,63 @@
 import sqlite3
 import logging
-from typing import Optional
-from src.models import Installation, TestResult
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from src.models import Installation, TestResult, Task, TestStatus
+
+# Skrivefunktionerne (save_, update_, delete_) committer ikke selv: de køres i
+# kalderens transaktion, i API'et via AsyncDatabase.write, der committer flere
+# samtidige skrivninger samlet (se src/data/writer.py). Uden for API'et: brug `with conn:`.
+#
+# Hver skrivning er én sætning (RETURNING i stedet for SELECT før og efter), og
+# forbindelserne kører med PRAGMA foreign_keys = ON, så en ukendt installation
+# giver sqlite3.IntegrityError i stedet for et separat opslag først.
+
+def is_foreign_key_error(error: sqlite3.IntegrityError) -> bool:
+    """
+    Check whether an IntegrityError is a foreign key violation.
+
+    Args:
+        error: Error raised by an insert, update or delete
+
+    Returns:
+        bool: True for a missing parent row, or a delete of a row that still has children
+    """
+    return getattr(error, "sqlite_errorcode", None) == sqlite3.SQLITE_CONSTRAINT_FOREIGNKEY
 
 def save_installation(conn, installation: Installation) -> bool:
     """
-    Save an installation to the database.
+    Insert a new installation.
+    
+    Args:
+        conn: SQLite database connection
+        installation: Installation object to save
+        
+    Returns:
+        bool: True if successful, False otherwise
+        
+    Raises:
+        sqlite3.IntegrityError: If an installation with the same ID already exists
+    """
+    try:
+        conn.execute(
+            f"INSERT INTO installations ({INSTALLATION_COLUMNS}) VALUES (?, ?, ?, ?, ?)",
+            (
+                installation.id,
+                installation.address,
+                installation.customer_name,
+                installation.installation_date,
+                installation.last_inspection
+            )
+        )
+        return True
+    except sqlite3.IntegrityError:
+        raise
+    except sqlite3.Error as e:
+        logging.error(f"Error saving installation: {e}")
+        return False
+
+def replace_installation(conn, installation: Installation) -> bool:
+    """
+    Save an installation, replacing the fields of an existing one with the same ID.
     
     Args:
         conn: SQLite database connection
@@ -14,10 +66,16 @@ def save_installation(conn, installation: Installation) -> bool:
     Returns:
         bool: True if successful, False otherwise
     """
-    cursor = conn.cursor()
     try:
-        cursor.execute(
-            "INSERT OR REPLACE INTO installations VALUES (?, ?, ?, ?, ?)",
+        # UPSERT i stedet for INSERT OR REPLACE: testresultater og opgaver
+        # mister ikke deres installation, og fremmednøglerne afviser ikke skrivningen
+        conn.execute(
+            f"""INSERT INTO installations ({INSTALLATION_COLUMNS}) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET
+                    address = excluded.address,
+                    customer_name = excluded.customer_name,
+                    installation_date = excluded.installation_date,
+                    last_inspection = excluded.last_inspection""",
             (
                 installation.id,
                 installation.address,
@@ -26,14 +84,12 @@ def save_installation(conn, installation: Installation) -> bool:
                 installation.last_inspection
             )
         )
-        conn.commit()
         return True
     except sqlite3.Error as e:
         logging.error(f"Error saving installation: {e}")
-        conn.rollback()
         return False
 
-def save_test_result(conn, test: TestResult, installation_id: str) -> bool:
+def save_test_result(conn, test: TestResult, installation_id: str) -> Optional[int]:
     """
     Save a test result to the database.
     
@@ -43,12 +99,14 @@ def save_test_result(conn, test: TestResult, installation_id: str) -> bool:
         installation_id: ID of the installation this test belongs to
         
     Returns:
-        bool: True if successful, False otherwise
+        Optional[int]: ID of the new test result if successful, None otherwise
+        
+    Raises:
+        sqlite3.IntegrityError: If the installation does not exist
     """
-    cursor = conn.cursor()
     try:
-        cursor.execute(
-            "INSERT INTO test_results (installation_id, test_type, value, unit, status, timestamp, notes, image_path) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        row = conn.execute(
+            "INSERT INTO test_results (installation_id, test_type, value, unit, status, timestamp, notes, image_path, rule_version) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) RETURNING id",
             (
                 installation_id,
                 test.test_type.value,
@@ -57,15 +115,56 @@ def save_test_result(conn, test: TestResult, installation_id: str) -> bool:
                 test.status.value,
                 test.timestamp.isoformat(),
                 test.notes,
-                test.image_path
+                test.image_path,
+                test.rule_version
             )       
-        )
-        conn.commit()
-        return True
+        ).fetchone()
+        return row[0]
+    except sqlite3.IntegrityError:
+        raise
     except sqlite3.Error as e:
         logging.error(f"Error saving test result: {e}")
-        conn.rollback()
-        return False
+        return None
+
+def save_test_results_bulk(conn, tests: Sequence[Tuple[str, TestResult]]) -> List[int]:
+    """
+    Save many test results at once.
+    
+    Args:
+        conn: SQLite database connection
+        tests: Pairs of (installation_id, TestResult) to save
+        
+    Returns:
+        List[int]: IDs of the new test results, in input order
+        
+    Raises:
+        sqlite3.IntegrityError: If an installation does not exist; no rows are saved in that case
+        sqlite3.Error: If the insert fails; no rows are saved in that case
+    """
+    if not tests:
+        return []
+    
+    # Én INSERT ... RETURNING pr. række (samme forberedte sætning), så hvert ID
+    # kommer fra SQLite selv og i inputrækkefølge; RETURNING fra en INSERT med
+    # flere rækker har ingen garanteret rækkefølge
+    query = "INSERT INTO test_results (installation_id, test_type, value, unit, status, timestamp, notes, image_path, rule_version) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) RETURNING id"
+    return [
+        conn.execute(
+            query,
+            (
+                installation_id,
+                test.test_type.value,
+                test.value,
+                test.unit,
+                test.status.value,
+                test.timestamp.isoformat(),
+                test.notes,
+                test.image_path,
+                test.rule_version
+            )
+        ).fetchone()[0]
+        for installation_id, test in tests
+    ]
 
 def get_installation(conn, installation_id: str) -> Optional[Installation]:
     """
@@ -94,3 +193,432 @@ def get_installation(conn, installation_id: str) -> Optional[Installation]:
     except sqlite3.Error as e:
         logging.error(f"Error retrieving installation: {e}")
         return None
+
+INSTALLATION_COLUMNS = "id, address, customer_name, installation_date, last_inspection"
+TEST_RESULT_COLUMNS = "id, installation_id, test_type, value, unit, status, timestamp, notes, image_path"
+TASK_COLUMNS = """id, title, description, status, priority, installation_id,
+    created_date, due_date, completed_date, assigned_to,
+    estimated_hours, actual_hours, notes"""
+
+# Appended to INSTALLATION_COLUMNS in installation lists: how many test types have a
+# latest result, and how many of those passed, have a warning or failed
+COMPLIANCE_COLUMNS = f"""COUNT(s.test_type),
+    COALESCE(SUM(s.status = '{TestStatus.PASS.value}'), 0),
+    COALESCE(SUM(s.status = '{TestStatus.WARNING.value}'), 0),
+    COALESCE(SUM(s.status = '{TestStatus.FAIL.value}'), 0)"""
+_INSTALLATIONS_WITH_COMPLIANCE = f"""SELECT {INSTALLATION_COLUMNS}, {COMPLIANCE_COLUMNS}
+    FROM installations LEFT JOIN installation_status s ON s.installation_id = installations.id"""
+
+def get_missing_installations(conn, installation_ids: Iterable[str]) -> List[str]:
+    """
+    Find which of the given installation IDs do not exist.
+    
+    Args:
+        conn: SQLite database connection
+        installation_ids: Installation IDs to check
+        
+    Returns:
+        List[str]: The IDs that were not found
+    """
+    wanted = list(set(installation_ids))
+    found = set()
+    # Hold antallet af parametre under SQLite's grænse
+    for start in range(0, len(wanted), 500):
+        chunk = wanted[start:start + 500]
+        placeholders = ", ".join("?" * len(chunk))
+        cursor = conn.execute(f"SELECT id FROM installations WHERE id IN ({placeholders})", chunk)
+        found.update(row[0] for row in cursor)
+    return [installation_id for installation_id in wanted if installation_id not in found]
+
+def list_installations(conn, limit: int = 100, skip: int = 0) -> List[tuple]:
+    """
+    List installations with offset pagination.
+    
+    Args:
+        conn: SQLite database connection
+        limit: Maximum number of rows to return
+        skip: Number of rows to skip
+        
+    Returns:
+        List[tuple]: Rows in INSTALLATION_COLUMNS order followed by COMPLIANCE_COLUMNS
+    """
+    cursor = conn.execute(
+        f"{_INSTALLATIONS_WITH_COMPLIANCE} GROUP BY installations.id LIMIT ? OFFSET ?",
+        (limit, skip)
+    )
+    return cursor.fetchall()
+
+
+def list_installations_page(conn, limit: int = 100, after: Optional[tuple] = None) -> Tuple[List[tuple], Optional[tuple]]:
+    """
+    List installations with keyset pagination on id.
+    
+    Args:
+        conn: SQLite database connection
+        limit: Maximum number of rows to return
+        after: Sort key (id,) of the last row on the previous page
+        
+    Returns:
+        Tuple[List[tuple], Optional[tuple]]: Rows in INSTALLATION_COLUMNS order followed
+        by COMPLIANCE_COLUMNS, and the sort key of the last row, or None if there are no more rows
+    """
+    query = _INSTALLATIONS_WITH_COMPLIANCE
+    params = []
+    if after is not None:
+        query += " WHERE installations.id > ?"
+        params.extend(after)
+    query += " GROUP BY installations.id ORDER BY installations.id LIMIT ?"
+    params.append(limit + 1)
+    
+    rows = conn.execute(query, params).fetchall()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, (rows[-1][0],)
+    return rows, None
+
+def update_installation(conn, installation_id: str, fields: Dict[str, Any]) -> Optional[Installation]:
+    """
+    Update the given columns of an installation.
+    
+    Args:
+        conn: SQLite database connection
+        installation_id: ID of the installation to update
+        fields: Mapping of column name to new value
+        
+    Returns:
+        Optional[Installation]: The updated installation, None if it does not exist
+    """
+    if not fields:
+        return get_installation(conn, installation_id)
+    
+    query = "UPDATE installations SET "
+    query += ", ".join([f"{key} = ?" for key in fields.keys()])
+    query += f" WHERE id = ? RETURNING {INSTALLATION_COLUMNS}"
+    row = conn.execute(query, [*fields.values(), installation_id]).fetchone()
+    if row is None:
+        return None
+    return Installation(
+        id=row[0],
+        address=row[1],
+        customer_name=row[2],
+        installation_date=row[3],
+        last_inspection=row[4]
+    )
+
+def delete_installation(conn, installation_id: str) -> bool:
+    """
+    Delete an installation.
+    
+    Args:
+        conn: SQLite database connection
+        installation_id: ID of the installation to delete
+        
+    Returns:
+        bool: True if the installation existed and was deleted
+        
+    Raises:
+        sqlite3.IntegrityError: If test results or tasks still refer to the installation
+    """
+    cursor = conn.execute("DELETE FROM installations WHERE id = ?", (installation_id,))
+    return cursor.rowcount > 0
+
+def get_test_result(conn, test_id: int) -> Optional[tuple]:
+    """
+    Get a test result row by ID.
+    
+    Args:
+        conn: SQLite database connection
+        test_id: ID of the test result
+        
+    Returns:
+        Optional[tuple]: Row in TEST_RESULT_COLUMNS order, None if not found
+    """
+    cursor = conn.execute(
+        f"SELECT {TEST_RESULT_COLUMNS} FROM test_results WHERE id = ?",
+        (test_id,)
+    )
+    return cursor.fetchone()
+
+def list_test_results(conn, limit: int = 100, skip: int = 0) -> List[tuple]:
+    """
+    List all test results with offset pagination.
+    
+    Args:
+        conn: SQLite database connection
+        limit: Maximum number of rows to return
+        skip: Number of rows to skip
+        
+    Returns:
+        List[tuple]: Rows in TEST_RESULT_COLUMNS order
+    """
+    cursor = conn.execute(
+        f"SELECT {TEST_RESULT_COLUMNS} FROM test_results LIMIT ? OFFSET ?",
+        (limit, skip)
+    )
+    return cursor.fetchall()
+
+
+def list_test_results_page(conn, limit: int = 100, after: Optional[tuple] = None) -> Tuple[List[tuple], Optional[tuple]]:
+    """
+    List test results, newest first, with keyset pagination on (timestamp, id).
+    
+    Args:
+        conn: SQLite database connection
+        limit: Maximum number of rows to return
+        after: Sort key (timestamp, id) of the last row on the previous page
+        
+    Returns:
+        Tuple[List[tuple], Optional[tuple]]: Rows in TEST_RESULT_COLUMNS order and
+        the sort key of the last row, or None if there are no more rows
+    """
+    query = f"SELECT {TEST_RESULT_COLUMNS} FROM test_results"
+    params = []
+    if after is not None:
+        query += " WHERE (timestamp, id) < (?, ?)"
+        params.extend(after)
+    query += " ORDER BY timestamp DESC, id DESC LIMIT ?"
+    params.append(limit + 1)
+    
+    rows = conn.execute(query, params).fetchall()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, (rows[-1][6], rows[-1][0])
+    return rows, None
+
+def list_test_results_by_installation(conn, installation_id: str) -> Optional[List[tuple]]:
+    """
+    List all test results for an installation, oldest first.
+    
+    Args:
+        conn: SQLite database connection
+        installation_id: ID of the installation
+        
+    Returns:
+        Optional[List[tuple]]: Rows in TEST_RESULT_COLUMNS order, None if the installation does not exist
+    """
+    if get_installation(conn, installation_id) is None:
+        return None
+    cursor = conn.execute(
+        f"SELECT {TEST_RESULT_COLUMNS} FROM test_results WHERE installation_id = ? ORDER BY timestamp, id",
+        (installation_id,)
+    )
+    return cursor.fetchall()
+
+def update_test_result(conn, test_id: int, fields: Dict[str, Any],
+                       grade: Optional[Callable[[str, float, str, Optional[str]], Tuple[Optional[str], str]]] = None
+                       ) -> Optional[tuple]:
+    """
+    Update the given columns of a test result.
+    
+    With grade, the measurement is re-graded in the same transaction: the stored
+    row is merged with fields and its status and rule_version are set in the
+    same UPDATE ... RETURNING, so the response never carries the old status.
+    
+    Args:
+        conn: SQLite database connection
+        test_id: ID of the test result to update
+        fields: Mapping of column name to new value
+        grade: Called with the merged (test_type, value, unit, notes) and returns
+            (status, rule_version); a status of None keeps the stored status
+        
+    Returns:
+        Optional[tuple]: The updated row, None if the test result does not exist
+    """
+    fields = dict(fields)
+    if grade is not None:
+        current = conn.execute(
+            "SELECT test_type, value, unit, notes FROM test_results WHERE id = ?", (test_id,)
+        ).fetchone()
+        if current is None:
+            return None
+        test_type, value, unit, notes = current
+        status, fields["rule_version"] = grade(
+            test_type, fields.get("value", value), fields.get("unit", unit), fields.get("notes", notes)
+        )
+        if status is not None:
+            fields["status"] = status
+
+    if not fields:
+        return get_test_result(conn, test_id)
+    
+    query = "UPDATE test_results SET "
+    query += ", ".join([f"{key} = ?" for key in fields.keys()])
+    query += f" WHERE id = ? RETURNING {TEST_RESULT_COLUMNS}"
+    return conn.execute(query, [*fields.values(), test_id]).fetchone()
+
+def delete_test_result(conn, test_id: int) -> bool:
+    """
+    Delete a test result.
+    
+    Args:
+        conn: SQLite database connection
+        test_id: ID of the test result to delete
+        
+    Returns:
+        bool: True if the test result existed and was deleted
+    """
+    cursor = conn.execute("DELETE FROM test_results WHERE id = ?", (test_id,))
+    return cursor.rowcount > 0
+
+def save_task(conn, task: Task):
+    """
+    Insert a new task.
+    
+    Args:
+        conn: SQLite database connection
+        task: Task object to save
+        
+    Raises:
+        sqlite3.IntegrityError: If a task with the same ID already exists, or the installation does not exist
+    """
+    conn.execute(
+        f"INSERT INTO tasks ({TASK_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            task.id,
+            task.title,
+            task.description,
+            task.status.value,
+            task.priority.value,
+            task.installation_id,
+            task.created_date.isoformat(),
+            task.due_date.isoformat() if task.due_date else None,
+            task.completed_date.isoformat() if task.completed_date else None,
+            task.assigned_to,
+            task.estimated_hours,
+            task.actual_hours,
+            task.notes
+        )
+    )
+
+def get_task(conn, task_id: str) -> Optional[tuple]:
+    """
+    Get a task row by ID.
+    
+    Args:
+        conn: SQLite database connection
+        task_id: ID of the task
+        
+    Returns:
+        Optional[tuple]: Row in TASK_COLUMNS order, None if not found
+    """
+    cursor = conn.execute(f"SELECT {TASK_COLUMNS} FROM tasks WHERE id = ?", (task_id,))
+    return cursor.fetchone()
+
+def list_tasks(conn, limit: int = 100, skip: int = 0, status: Optional[str] = None,
+               installation_id: Optional[str] = None, assigned_to: Optional[str] = None) -> List[tuple]:
+    """
+    List tasks, newest first, with optional filters.
+    
+    Args:
+        conn: SQLite database connection
+        limit: Maximum number of rows to return
+        skip: Number of rows to skip
+        status: Only include tasks with this status
+        installation_id: Only include tasks for this installation
+        assigned_to: Only include tasks assigned to this person
+        
+    Returns:
+        List[tuple]: Rows in TASK_COLUMNS order
+    """
+    query = f"SELECT {TASK_COLUMNS} FROM tasks WHERE 1=1"
+    params = []
+    
+    if status:
+        query += " AND status = ?"
+        params.append(status)
+    
+    if installation_id:
+        query += " AND installation_id = ?"
+        params.append(installation_id)
+        
+    if assigned_to:
+        query += " AND assigned_to = ?"
+        params.append(assigned_to)
+        
+    query += " ORDER BY created_date DESC LIMIT ? OFFSET ?"
+    params.extend([limit, skip])
+    
+    return conn.execute(query, params).fetchall()
+
+
+def list_tasks_page(conn, limit: int = 100, after: Optional[tuple] = None, status: Optional[str] = None,
+                    installation_id: Optional[str] = None, assigned_to: Optional[str] = None) -> Tuple[List[tuple], Optional[tuple]]:
+    """
+    List tasks, newest first, with keyset pagination on (created_date, id).
+    
+    Args:
+        conn: SQLite database connection
+        limit: Maximum number of rows to return
+        after: Sort key (created_date, id) of the last row on the previous page
+        status: Only include tasks with this status
+        installation_id: Only include tasks for this installation
+        assigned_to: Only include tasks assigned to this person
+        
+    Returns:
+        Tuple[List[tuple], Optional[tuple]]: Rows in TASK_COLUMNS order and
+        the sort key of the last row, or None if there are no more rows
+    """
+    query = f"SELECT {TASK_COLUMNS} FROM tasks WHERE 1=1"
+    params = []
+    
+    if status:
+        query += " AND status = ?"
+        params.append(status)
+    
+    if installation_id:
+        query += " AND installation_id = ?"
+        params.append(installation_id)
+        
+    if assigned_to:
+        query += " AND assigned_to = ?"
+        params.append(assigned_to)
+    
+    if after is not None:
+        query += " AND (created_date, id) < (?, ?)"
+        params.extend(after)
+        
+    query += " ORDER BY created_date DESC, id DESC LIMIT ?"
+    params.append(limit + 1)
+    
+    rows = conn.execute(query, params).fetchall()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, (rows[-1][6], rows[-1][0])
+    return rows, None
+
+def update_task(conn, task_id: str, fields: Dict[str, Any]) -> Optional[tuple]:
+    """
+    Update the given columns of a task.
+    
+    Args:
+        conn: SQLite database connection
+        task_id: ID of the task to update
+        fields: Mapping of column name to new value
+        
+    Returns:
+        Optional[tuple]: The updated row, None if the task does not exist
+        
+    Raises:
+        sqlite3.IntegrityError: If installation_id is set to an installation that does not exist
+    """
+    if not fields:
+        return get_task(conn, task_id)
+    
+    query = "UPDATE tasks SET "
+    query += ", ".join([f"{key} = ?" for key in fields.keys()])
+    query += f" WHERE id = ? RETURNING {TASK_COLUMNS}"
+    return conn.execute(query, [*fields.values(), task_id]).fetchone()
+
+def delete_task(conn, task_id: str) -> bool:
+    """
+    Delete a task.
+    
+    Args:
+        conn: SQLite database connection
+        task_id: ID of the task to delete
+        
+    Returns:
+        bool: True if the task existed and was deleted
+    """
+    cursor = conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+    return cursor.rowcount > 0
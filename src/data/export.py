@@ -0,0 +1,304 @@
+import csv
+import io
+import json
+import re
+import zipfile
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from src.data.db import INSTALLATION_COLUMNS, TEST_RESULT_COLUMNS, TASK_COLUMNS
+
+# Number of rows fetched from SQLite and encoded per chunk
+DEFAULT_CHUNK_SIZE = 1000
+
+# Excel allows 1,048,576 rows per sheet including the header row
+XLSX_MAX_ROWS_PER_SHEET = 1048575
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+def _columns(column_list: str) -> List[str]:
+    return [column.strip() for column in column_list.split(",")]
+
+def build_export_query(entity: str, installation_id: Optional[str] = None,
+                       date_from: Optional[datetime] = None, date_to: Optional[datetime] = None,
+                       test_type: Optional[str] = None) -> Tuple[List[str], str, List[Any], List[str]]:
+    """
+    Build the SELECT statement for an export, without ORDER BY.
+
+    Rows are read in keyset order on the returned sort columns, which are
+    unique together and covered by an index.
+
+    Args:
+        entity: One of "installations", "tests" or "tasks"
+        installation_id: Only include rows for this installation
+        date_from: Only include rows at or after this time (tests: timestamp, tasks: created_date)
+        date_to: Only include rows before this time
+        test_type: Only include test results of this type (tests only)
+
+    Returns:
+        Tuple[List[str], str, List[Any], List[str]]: Column names, SQL,
+        parameters and sort columns
+
+    Raises:
+        ValueError: If the entity is unknown
+    """
+    if entity == "installations":
+        columns, table, date_column = INSTALLATION_COLUMNS, "installations", None
+        id_column = "id"
+    elif entity == "tests":
+        columns, table, date_column = TEST_RESULT_COLUMNS, "test_results", "timestamp"
+        id_column = "installation_id"
+    elif entity == "tasks":
+        columns, table, date_column = TASK_COLUMNS, "tasks", "created_date"
+        id_column = "installation_id"
+    else:
+        raise ValueError(f"Unknown export entity: {entity}")
+
+    query = f"SELECT {columns} FROM {table} WHERE 1=1"
+    params = []
+
+    if installation_id:
+        query += f" AND {id_column} = ?"
+        params.append(installation_id)
+
+    if date_column and date_from:
+        query += f" AND {date_column} >= ?"
+        params.append(date_from.isoformat())
+
+    if date_column and date_to:
+        query += f" AND {date_column} < ?"
+        params.append(date_to.isoformat())
+
+    if entity == "tests" and test_type:
+        query += " AND test_type = ?"
+        params.append(test_type)
+
+    sort_columns = [date_column, "id"] if date_column else ["id"]
+    return _columns(columns), query, params, sort_columns
+
+def iter_row_chunks(conn, columns: List[str], query: str, params: Sequence[Any],
+                    sort_columns: List[str], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[tuple]]:
+    """
+    Execute a query one keyset page at a time and yield each page.
+
+    Every page is a separate statement, so no read transaction stays open
+    while the caller (e.g. a slow download) consumes the rows and WAL
+    checkpoints can complete in between.
+
+    Args:
+        conn: SQLite database connection
+        columns: Column names of the query, used to find the sort key in a row
+        query: SELECT statement without ORDER BY or LIMIT
+        params: Query parameters
+        sort_columns: Columns that are unique together, e.g. ["timestamp", "id"]
+        chunk_size: Rows per chunk
+
+    Yields:
+        List[tuple]: Up to chunk_size rows
+    """
+    key_indexes = [columns.index(column) for column in sort_columns]
+    key_tuple = ", ".join(sort_columns)
+    placeholders = ", ".join("?" * len(sort_columns))
+    order_by = f" ORDER BY {key_tuple} LIMIT ?"
+    after = None
+    while True:
+        if after is None:
+            rows = conn.execute(query + order_by, [*params, chunk_size]).fetchall()
+        else:
+            rows = conn.execute(
+                f"{query} AND ({key_tuple}) > ({placeholders}){order_by}",
+                [*params, *after, chunk_size]
+            ).fetchall()
+        if not rows:
+            break
+        yield rows
+        if len(rows) < chunk_size:
+            break
+        after = [rows[-1][index] for index in key_indexes]
+
+def csv_chunks(columns: List[str], row_chunks: Iterable[List[tuple]]) -> Iterator[bytes]:
+    """Encode row chunks as CSV with a header row."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue().encode("utf-8")
+
+    for rows in row_chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+
+def ndjson_chunks(columns: List[str], row_chunks: Iterable[List[tuple]]) -> Iterator[bytes]:
+    """Encode row chunks as newline-delimited JSON, one object per row."""
+    for rows in row_chunks:
+        lines = [json.dumps(dict(zip(columns, row)), ensure_ascii=False) for row in rows]
+        lines.append("")
+        yield "\n".join(lines).encode("utf-8")
+
+_XML_INVALID = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+def _xml_escape(value: str) -> str:
+    value = _XML_INVALID.sub("", value)
+    return value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+def _xlsx_cell(value: Any) -> str:
+    if value is None:
+        return "<c/>"
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f"<c><v>{value!r}</v></c>"
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{_xml_escape(str(value))}</t></is></c>'
+
+def _xlsx_row(values: Iterable[Any]) -> str:
+    return "<row>" + "".join(_xlsx_cell(value) for value in values) + "</row>"
+
+class _ChunkSink:
+    """Write-only file object collecting zip output until it is drained."""
+
+    def __init__(self):
+        self._parts = []
+
+    def write(self, data: bytes) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+_XLSX_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_XLSX_SHEET_END = "</sheetData></worksheet>"
+
+def xlsx_chunks(columns: List[str], row_chunks: Iterable[List[tuple]],
+                sheet_name: str = "Data") -> Iterator[bytes]:
+    """
+    Encode row chunks as an XLSX workbook without holding it in memory.
+
+    The zip container is written in streaming mode (data descriptors), and
+    a new sheet is started whenever Excel's row limit is reached.
+    """
+    sink = _ChunkSink()
+    archive = zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED)
+    header = _xlsx_row(columns)
+
+    sheet_count = 0
+    sheet = None
+    rows_in_sheet = 0
+
+    def open_sheet():
+        nonlocal sheet_count, sheet, rows_in_sheet
+        sheet_count += 1
+        sheet = archive.open(f"xl/worksheets/sheet{sheet_count}.xml", mode="w", force_zip64=True)
+        sheet.write((_XLSX_SHEET_START + header).encode("utf-8"))
+        rows_in_sheet = 0
+
+    open_sheet()
+    for rows in row_chunks:
+        parts = []
+        for row in rows:
+            if rows_in_sheet >= XLSX_MAX_ROWS_PER_SHEET:
+                sheet.write("".join(parts).encode("utf-8"))
+                parts = []
+                sheet.write(_XLSX_SHEET_END.encode("utf-8"))
+                sheet.close()
+                open_sheet()
+            parts.append(_xlsx_row(row))
+            rows_in_sheet += 1
+        sheet.write("".join(parts).encode("utf-8"))
+        data = sink.drain()
+        if data:
+            yield data
+
+    sheet.write(_XLSX_SHEET_END.encode("utf-8"))
+    sheet.close()
+
+    names = [sheet_name if sheet_count == 1 else f"{sheet_name} {index}" for index in range(1, sheet_count + 1)]
+    archive.writestr("[Content_Types].xml", (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        + "".join(
+            f'<Override PartName="/xl/worksheets/sheet{index}.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for index in range(1, sheet_count + 1)
+        )
+        + '</Types>'
+    ))
+    archive.writestr("_rels/.rels", (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ))
+    archive.writestr("xl/workbook.xml", (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheets>'
+        + "".join(
+            f'<sheet name="{_xml_escape(name)}" sheetId="{index}" r:id="rId{index}"/>'
+            for index, name in enumerate(names, start=1)
+        )
+        + '</sheets></workbook>'
+    ))
+    archive.writestr("xl/_rels/workbook.xml.rels", (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        + "".join(
+            f'<Relationship Id="rId{index}" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+            f'Target="worksheets/sheet{index}.xml"/>'
+            for index in range(1, sheet_count + 1)
+        )
+        + '</Relationships>'
+    ))
+    archive.close()
+    yield sink.drain()
+
+_ENCODERS: Dict[str, Callable[..., Iterator[bytes]]] = {
+    "csv": csv_chunks,
+    "ndjson": ndjson_chunks,
+    "xlsx": xlsx_chunks,
+}
+
+def export_stream(conn, entity: str, export_format: str,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE, **filters) -> Iterator[bytes]:
+    """
+    Stream an export of installations, test results or tasks.
+
+    Rows are read from conn one chunk at a time as the returned generator is
+    consumed, so memory use is bounded by chunk_size no matter how many rows
+    are exported. The caller owns conn and closes it when the generator is done.
+
+    Args:
+        conn: SQLite database connection, preferably a dedicated read-only one
+        entity: One of "installations", "tests" or "tasks"
+        export_format: One of EXPORT_FORMATS
+        chunk_size: Rows fetched and encoded per chunk
+        **filters: Passed to build_export_query
+
+    Returns:
+        Iterator[bytes]: Encoded output chunks
+
+    Raises:
+        ValueError: If the entity or format is unknown
+    """
+    if export_format not in _ENCODERS:
+        raise ValueError(f"Unknown export format: {export_format}")
+    columns, query, params, sort_columns = build_export_query(entity, **filters)
+    return _ENCODERS[export_format](columns, iter_row_chunks(conn, columns, query, params, sort_columns, chunk_size))
@@ -0,0 +1,220 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.data.db import get_installation
+
+def get_time_range(conn, installation_id: str, test_type: str) -> Optional[Tuple[datetime, datetime]]:
+    """
+    Get the first and last measurement time for an installation and test type.
+
+    Args:
+        conn: SQLite database connection
+        installation_id: ID of the installation
+        test_type: Test type (TestType value)
+
+    Returns:
+        Optional[Tuple[datetime, datetime]]: (first, last), None if there are no measurements
+    """
+    row = conn.execute(
+        "SELECT MIN(timestamp), MAX(timestamp) FROM test_results WHERE installation_id = ? AND test_type = ?",
+        (installation_id, test_type)
+    ).fetchone()
+    if row is None or row[0] is None:
+        return None
+    return datetime.fromisoformat(row[0]), datetime.fromisoformat(row[1])
+
+def get_series(conn, installation_id: str, test_type: str,
+               start: datetime, end: datetime) -> List[Tuple[str, float]]:
+    """
+    Get all measurements in a time range, ordered by time.
+
+    Args:
+        conn: SQLite database connection
+        installation_id: ID of the installation
+        test_type: Test type (TestType value)
+        start: Inclusive start of the range
+        end: Inclusive end of the range
+
+    Returns:
+        List[Tuple[str, float]]: (timestamp, value) pairs
+    """
+    cursor = conn.execute(
+        """SELECT timestamp, value FROM test_results
+           WHERE installation_id = ? AND test_type = ? AND timestamp >= ? AND timestamp <= ?
+           ORDER BY timestamp""",
+        (installation_id, test_type, start.isoformat(), end.isoformat())
+    )
+    return cursor.fetchall()
+
+def get_buckets(conn, installation_id: str, test_type: str,
+                start: datetime, end: datetime, buckets: int) -> List[Dict[str, object]]:
+    """
+    Aggregate measurements into equal-width time buckets.
+
+    The grouping runs in SQLite on the (installation_id, test_type, timestamp)
+    index, so only one row per non-empty bucket leaves the database.
+
+    Args:
+        conn: SQLite database connection
+        installation_id: ID of the installation
+        test_type: Test type (TestType value)
+        start: Inclusive start of the range
+        end: Inclusive end of the range
+        buckets: Number of buckets
+
+    Returns:
+        List[Dict[str, object]]: One dict per non-empty bucket with start, end,
+        count, min, max and mean
+    """
+    span = end - start
+    if span.total_seconds() <= 0:
+        span = timedelta(seconds=1)
+    span_days = span.total_seconds() / 86400
+
+    cursor = conn.execute(
+        """SELECT MIN(CAST((julianday(timestamp) - julianday(?)) * ? / ? AS INTEGER), ? - 1) AS bucket,
+                  COUNT(*), MIN(value), MAX(value), AVG(value)
+           FROM test_results
+           WHERE installation_id = ? AND test_type = ? AND timestamp >= ? AND timestamp <= ?
+           GROUP BY bucket
+           ORDER BY bucket""",
+        (start.isoformat(), buckets, span_days, buckets,
+         installation_id, test_type, start.isoformat(), end.isoformat())
+    )
+
+    width = span / buckets
+    return [
+        {
+            "start": start + width * bucket,
+            "end": end if bucket == buckets - 1 else start + width * (bucket + 1),
+            "count": count,
+            "min": minimum,
+            "max": maximum,
+            "mean": mean,
+        }
+        for bucket, count, minimum, maximum, mean in cursor
+    ]
+
+def lttb(points: Sequence[Tuple[float, float]], threshold: int) -> List[int]:
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Picks the points that best preserve the visual shape of a series.
+
+    Args:
+        points: (x, y) pairs sorted by x
+        threshold: Number of points to keep
+
+    Returns:
+        List[int]: Indexes of the selected points, in order
+    """
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+
+    selected = [0]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        # Gennemsnit af næste spand bruges som tredje hjørne i trekanten
+        avg_start = int((i + 1) * every) + 1
+        avg_end = min(int((i + 2) * every) + 1, n)
+        avg_count = avg_end - avg_start
+        avg_x = sum(points[j][0] for j in range(avg_start, avg_end)) / avg_count
+        avg_y = sum(points[j][1] for j in range(avg_start, avg_end)) / avg_count
+
+        range_start = int(i * every) + 1
+        range_end = int((i + 1) * every) + 1
+        ax, ay = points[a]
+
+        max_area = -1.0
+        chosen = range_start
+        for j in range(range_start, range_end):
+            area = abs((ax - avg_x) * (points[j][1] - ay) - (ax - points[j][0]) * (avg_y - ay))
+            if area > max_area:
+                max_area = area
+                chosen = j
+
+        selected.append(chosen)
+        a = chosen
+
+    selected.append(n - 1)
+    return selected
+
+def get_downsampled_series(conn, installation_id: str, test_type: str,
+                           start: datetime, end: datetime, points: int) -> Tuple[int, List[Tuple[str, float]]]:
+    """
+    Get a time range of measurements downsampled with LTTB.
+
+    Args:
+        conn: SQLite database connection
+        installation_id: ID of the installation
+        test_type: Test type (TestType value)
+        start: Inclusive start of the range
+        end: Inclusive end of the range
+        points: Maximum number of points to return
+
+    Returns:
+        Tuple[int, List[Tuple[str, float]]]: Number of raw measurements and the selected (timestamp, value) pairs
+    """
+    series = get_series(conn, installation_id, test_type, start, end)
+    if len(series) <= points:
+        return len(series), series
+
+    xy = [(datetime.fromisoformat(timestamp).timestamp(), value) for timestamp, value in series]
+    return len(series), [series[index] for index in lttb(xy, points)]
+
+def get_history(conn, installation_id: str, test_type: str, start: Optional[datetime] = None,
+                end: Optional[datetime] = None, points: int = 500,
+                buckets: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """
+    Get the measurement history for an installation and test type.
+
+    Args:
+        conn: SQLite database connection
+        installation_id: ID of the installation
+        test_type: Test type (TestType value)
+        start: Start of the range (default: first measurement)
+        end: End of the range (default: last measurement)
+        points: Maximum number of points when returning a downsampled series
+        buckets: If given, return min/max/mean buckets instead of points
+
+    Returns:
+        Optional[Dict[str, Any]]: History with start, end, total and either
+        points or buckets, None if the installation does not exist
+    """
+    if get_installation(conn, installation_id) is None:
+        return None
+
+    history = {
+        "installation_id": installation_id,
+        "test_type": test_type,
+        "start": start,
+        "end": end,
+        "total": 0,
+        "points": None,
+        "buckets": None,
+    }
+
+    if start is None or end is None:
+        time_range = get_time_range(conn, installation_id, test_type)
+        if time_range is None:
+            history["points"] = [] if buckets is None else None
+            history["buckets"] = [] if buckets is not None else None
+            return history
+        history["start"] = start = start or time_range[0]
+        history["end"] = end = end or time_range[1]
+
+    if buckets is not None:
+        history["buckets"] = get_buckets(conn, installation_id, test_type, start, end, buckets)
+        history["total"] = sum(bucket["count"] for bucket in history["buckets"])
+    else:
+        total, series = get_downsampled_series(conn, installation_id, test_type, start, end, points)
+        history["total"] = total
+        history["points"] = [
+            {"timestamp": datetime.fromisoformat(timestamp), "value": value}
+            for timestamp, value in series
+        ]
+
+    return history
@@ -0,0 +1,233 @@
+import hashlib
+import logging
+import os
+import re
+import tempfile
+from typing import BinaryIO, Dict, NamedTuple, Optional
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# Bytes read, hashed and written per step
+DEFAULT_CHUNK_SIZE = 256 * 1024
+
+# Derived JPEG versions of each image: name -> longest side in pixels
+IMAGE_VARIANTS = {
+    "thumb": 256,
+    "preview": 1280,
+}
+VARIANT_QUALITY = 82
+
+_EXTENSION = re.compile(r"^[A-Za-z0-9]{1,10}$")
+_IMAGE_FILENAME = re.compile(r"^([0-9a-f]{64})\.([a-z0-9]{1,10})$")
+
+class ImageTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured size cap."""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Image exceeds the maximum size of {max_bytes} bytes")
+        self.max_bytes = max_bytes
+
+class StoredImage(NamedTuple):
+    path: str
+    filename: str
+    sha256: str
+    size: int
+    duplicate: bool
+
+def image_extension(filename: Optional[str]) -> str:
+    """
+    Get a safe, lower-case file extension from an uploaded file name.
+
+    Args:
+        filename: Name supplied by the client
+
+    Returns:
+        str: The extension without the dot, "bin" if it is missing or unsafe
+    """
+    if filename and "." in filename:
+        extension = filename.rsplit(".", 1)[-1]
+        if _EXTENSION.match(extension):
+            return extension.lower()
+    return "bin"
+
+class ImageUpload:
+    """
+    Incremental counterpart of store_image for data that arrives in pieces,
+    e.g. straight from a request body.
+
+    Each piece is hashed and appended to a temporary file in image_dir; finish
+    moves it into content-addressed storage. Blocking; call it from a worker thread.
+    """
+
+    def __init__(self, image_dir: str, extension: str, max_bytes: int):
+        """
+        Args:
+            image_dir: Root directory for stored images
+            extension: File extension, see image_extension
+            max_bytes: Maximum accepted size in bytes
+        """
+        os.makedirs(image_dir, exist_ok=True)
+        self.image_dir = image_dir
+        self.extension = extension
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._digest = hashlib.sha256()
+        # Midlertidig fil i samme mappe, så den kan flyttes atomisk på plads
+        fd, self._temp_path = tempfile.mkstemp(dir=image_dir, suffix=".upload")
+        self._target = os.fdopen(fd, "wb")
+
+    def write(self, data: bytes):
+        """
+        Append a piece of the image.
+
+        Raises:
+            ImageTooLargeError: If the data so far exceeds max_bytes
+        """
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise ImageTooLargeError(self.max_bytes)
+        self._digest.update(data)
+        self._target.write(data)
+
+    def finish(self) -> StoredImage:
+        """
+        Move the image into storage, or discard it if the same image is already stored.
+
+        Returns:
+            StoredImage: Where the image is stored and whether it was a duplicate
+        """
+        self._target.close()
+        sha256 = self._digest.hexdigest()
+        filename = f"{sha256}.{self.extension}"
+        directory = os.path.join(self.image_dir, sha256[:2])
+        path = os.path.join(directory, filename)
+        os.makedirs(directory, exist_ok=True)
+
+        if os.path.exists(path):
+            os.remove(self._temp_path)
+            return StoredImage(path, filename, sha256, self.size, True)
+
+        os.replace(self._temp_path, path)
+        return StoredImage(path, filename, sha256, self.size, False)
+
+    def abort(self):
+        """Discard the partial image."""
+        self._target.close()
+        if os.path.exists(self._temp_path):
+            os.remove(self._temp_path)
+
+def store_image(source: BinaryIO, image_dir: str, extension: str, max_bytes: int,
+                chunk_size: int = DEFAULT_CHUNK_SIZE) -> StoredImage:
+    """
+    Stream an image to content-addressed storage.
+
+    The data is copied to a temporary file in fixed-size chunks and hashed
+    with SHA-256 on the way, so memory use is bounded by chunk_size. The
+    file is then moved to <image_dir>/<hash[:2]>/<hash>.<extension>; if
+    that file already exists the copy is discarded and the existing file is
+    reused. Blocking; call it from a worker thread.
+
+    Args:
+        source: Readable binary file object
+        image_dir: Root directory for stored images
+        extension: File extension, see image_extension
+        max_bytes: Maximum accepted size in bytes
+        chunk_size: Bytes per read
+
+    Returns:
+        StoredImage: Where the image is stored and whether it was a duplicate
+
+    Raises:
+        ImageTooLargeError: If the data exceeds max_bytes; nothing is stored
+    """
+    upload = ImageUpload(image_dir, extension, max_bytes)
+    try:
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                break
+            upload.write(chunk)
+        return upload.finish()
+    except BaseException:
+        upload.abort()
+        raise
+
+def image_filename(image_path: Optional[str]) -> Optional[str]:
+    """
+    Get the content-addressed file name from a stored image path.
+
+    Args:
+        image_path: Path as returned by store_image
+
+    Returns:
+        Optional[str]: "<sha256>.<ext>", None for paths not made by store_image
+    """
+    if not image_path:
+        return None
+    filename = os.path.basename(image_path)
+    return filename if _IMAGE_FILENAME.match(filename) else None
+
+def image_location(image_dir: str, filename: str) -> Optional[str]:
+    """
+    Get the path of a stored image from its content-addressed file name.
+
+    Args:
+        image_dir: Root directory for stored images
+        filename: "<sha256>.<ext>"
+
+    Returns:
+        Optional[str]: Path of the original, None if the file name is not valid
+    """
+    match = _IMAGE_FILENAME.match(filename)
+    if match is None:
+        return None
+    return os.path.join(image_dir, match.group(1)[:2], filename)
+
+def derivative_path(original_path: str, variant: str) -> str:
+    """Path of a derived version, stored next to the original as <sha256>.<variant>.jpg."""
+    stem = os.path.basename(original_path).split(".", 1)[0]
+    return os.path.join(os.path.dirname(original_path), f"{stem}.{variant}.jpg")
+
+def generate_derivatives(original_path: str, variants: Optional[Dict[str, int]] = None) -> Dict[str, str]:
+    """
+    Create the thumbnail and preview versions of a stored image.
+
+    Existing versions are kept, so calling this again is cheap. CPU bound;
+    meant to run in a process pool.
+
+    Args:
+        original_path: Path of the stored original
+        variants: Variant name -> longest side in pixels (default: IMAGE_VARIANTS)
+
+    Returns:
+        Dict[str, str]: Variant name -> path, empty if the file is not a readable image
+    """
+    variants = variants or IMAGE_VARIANTS
+    paths = {variant: derivative_path(original_path, variant) for variant in variants}
+    missing = {variant: size for variant, size in variants.items() if not os.path.exists(paths[variant])}
+    if not missing:
+        return paths
+
+    try:
+        with Image.open(original_path) as image:
+            # Brug kun et nedskaleret afkod af store JPEG-billeder
+            image.draft("RGB", (max(missing.values()), max(missing.values())))
+            image = ImageOps.exif_transpose(image).convert("RGB")
+
+            # Største version først, så de mindre kan skaleres ud fra den
+            for variant, size in sorted(missing.items(), key=lambda item: -item[1]):
+                image.thumbnail((size, size), Image.Resampling.LANCZOS)
+                fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(original_path), suffix=".upload")
+                try:
+                    with os.fdopen(fd, "wb") as target:
+                        image.save(target, "JPEG", quality=VARIANT_QUALITY, optimize=True, progressive=True)
+                    os.replace(temp_path, paths[variant])
+                except BaseException:
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
+                    raise
+    except (UnidentifiedImageError, OSError) as e:
+        logging.warning(f"Could not create image variants for {original_path}: {e}")
+        return {}
+
+    return paths
@@ -0,0 +1,104 @@
+import argparse
+import logging
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+from src.data.db import get_installation
+from src.models import TestStatus
+
+# installation_status holds the latest test result per (installation, test type).
+# It is kept up to date by the triggers from migration 7; rebuild it with
+# rebuild_installation_status if it is ever out of sync.
+INSTALLATION_STATUS_COLUMNS = "installation_id, test_type, test_id, value, unit, status, timestamp"
+
+REBUILD_QUERY = f"""
+    INSERT INTO installation_status ({INSTALLATION_STATUS_COLUMNS})
+    SELECT installation_id, test_type, id, value, unit, status, timestamp FROM (
+        SELECT *, ROW_NUMBER() OVER (
+            PARTITION BY installation_id, test_type ORDER BY timestamp DESC, id DESC
+        ) AS position
+        FROM test_results WHERE installation_id IS NOT NULL
+    ) WHERE position = 1
+"""
+
+def rebuild_installation_status(conn) -> int:
+    """
+    Recompute the installation_status table from test_results.
+
+    Runs in one transaction, so readers see either the old or the new table.
+
+    Args:
+        conn: SQLite database connection
+
+    Returns:
+        int: Number of (installation, test type) rows after the rebuild
+    """
+    with conn:
+        conn.execute("DELETE FROM installation_status")
+        conn.execute(REBUILD_QUERY)
+    return conn.execute("SELECT COUNT(*) FROM installation_status").fetchone()[0]
+
+def get_installation_status(conn, installation_id: str) -> Optional[List[tuple]]:
+    """
+    Get the latest result of each test type for an installation.
+
+    Args:
+        conn: SQLite database connection
+        installation_id: ID of the installation
+
+    Returns:
+        Optional[List[tuple]]: Rows in INSTALLATION_STATUS_COLUMNS order sorted by
+        test type, None if the installation does not exist
+    """
+    if get_installation(conn, installation_id) is None:
+        return None
+    cursor = conn.execute(
+        f"SELECT {INSTALLATION_STATUS_COLUMNS} FROM installation_status WHERE installation_id = ? ORDER BY test_type",
+        (installation_id,)
+    )
+    return cursor.fetchall()
+
+def compliance(tested: int, passed: int, warnings: int, failed: int) -> Dict[str, Any]:
+    """
+    Summarise the latest results of an installation.
+
+    Args:
+        tested: Number of test types with a result
+        passed: Number of test types whose latest result passed
+        warnings: Number of test types whose latest result is a warning
+        failed: Number of test types whose latest result failed
+
+    Returns:
+        Dict[str, Any]: The counts and the overall status: FAIL if any test type
+        failed, else WARNING if any has a warning, else PASS; None if untested
+    """
+    if failed:
+        overall = TestStatus.FAIL.value
+    elif warnings:
+        overall = TestStatus.WARNING.value
+    elif tested:
+        overall = TestStatus.PASS.value
+    else:
+        overall = None
+    return {"status": overall, "test_types": tested, "pass": passed, "warning": warnings, "fail": failed}
+
+def main():
+    """
+    Kommandolinje: genopbyg installation_status ud fra test_results.
+    """
+    from config import DB_PATH, LOG_FORMAT
+
+    parser = argparse.ArgumentParser(description="Genopbyg seneste status pr. installation og testtype")
+    parser.add_argument("--db", default=DB_PATH, help="Sti til databasen")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+    conn = sqlite3.connect(args.db)
+    try:
+        count = rebuild_installation_status(conn)
+        logging.info(f"installation_status genopbygget: {count} rækker")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,651 @@
+import sqlite3
+import logging
+from typing import Dict, List, Tuple
+
+# Numbered schema migrations. Each entry is (version, description, statements).
+# The applied version is stored in PRAGMA user_version. Never edit a migration
+# that has been released - add a new one instead.
+MIGRATIONS: List[Tuple[int, str, List[str]]] = [
+    (1, "Initial schema", [
+        '''
+        CREATE TABLE IF NOT EXISTS installations (
+            id TEXT PRIMARY KEY,
+            address TEXT NOT NULL,
+            customer_name TEXT NOT NULL,
+            installation_date TEXT,
+            last_inspection TEXT
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS test_results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            installation_id TEXT,
+            test_type TEXT NOT NULL,
+            value REAL NOT NULL,
+            unit TEXT NOT NULL,
+            status TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            notes TEXT,
+            image_path TEXT,
+            FOREIGN KEY (installation_id) REFERENCES installations (id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS tasks (
+            id TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            description TEXT,
+            status TEXT NOT NULL,
+            priority TEXT NOT NULL,
+            installation_id TEXT,
+            created_date TEXT NOT NULL,
+            due_date TEXT,
+            completed_date TEXT,
+            assigned_to TEXT,
+            estimated_hours REAL,
+            actual_hours REAL,
+            notes TEXT,
+            FOREIGN KEY (installation_id) REFERENCES installations (id)
+        )
+        ''',
+    ]),
+    (2, "Secondary indexes for installation and task lookups", [
+        "CREATE INDEX IF NOT EXISTS idx_test_results_installation_timestamp ON test_results (installation_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_status_assigned_created ON tasks (status, assigned_to, created_date)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_status_created ON tasks (status, created_date)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_installation_created ON tasks (installation_id, created_date)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_assigned_created ON tasks (assigned_to, created_date)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_created ON tasks (created_date)",
+    ]),
+    (3, "Keyset pagination indexes", [
+        "CREATE INDEX IF NOT EXISTS idx_test_results_timestamp ON test_results (timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_created_id ON tasks (created_date, id)",
+        "DROP INDEX IF EXISTS idx_tasks_created",
+    ]),
+    (4, "Measurement history index", [
+        "CREATE INDEX IF NOT EXISTS idx_test_results_installation_type_timestamp ON test_results (installation_id, test_type, timestamp)",
+    ]),
+    (5, "Rule version per test result", [
+        # NULL betyder at resultatet ikke er bedømt efter en kendt regelversion endnu
+        "ALTER TABLE test_results ADD COLUMN rule_version TEXT",
+        "CREATE INDEX IF NOT EXISTS idx_test_results_rule_version ON test_results (rule_version)",
+    ]),
+    (6, "Dashboard aggregation indexes", [
+        "CREATE INDEX IF NOT EXISTS idx_test_results_type_status ON test_results (test_type, status)",
+        "CREATE INDEX IF NOT EXISTS idx_test_results_status_timestamp ON test_results (status, timestamp)",
+        # Kun åbne opgaver; betingelsen skal matche OPEN_TASK_CONDITION i src/data/dashboard.py
+        "CREATE INDEX IF NOT EXISTS idx_tasks_open_due ON tasks (due_date) WHERE status NOT IN ('Afsluttet', 'Annulleret')",
+    ]),
+    (7, "Latest result per installation and test type", [
+        '''
+        CREATE TABLE IF NOT EXISTS installation_status (
+            installation_id TEXT NOT NULL,
+            test_type TEXT NOT NULL,
+            test_id INTEGER NOT NULL,
+            value REAL NOT NULL,
+            unit TEXT NOT NULL,
+            status TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            PRIMARY KEY (installation_id, test_type)
+        ) WITHOUT ROWID
+        ''',
+        # Nyt resultat: erstatter kun rækken hvis det er nyere (timestamp, id)
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_installation_status_insert
+        AFTER INSERT ON test_results
+        WHEN NEW.installation_id IS NOT NULL
+        BEGIN
+            INSERT INTO installation_status (installation_id, test_type, test_id, value, unit, status, timestamp)
+            VALUES (NEW.installation_id, NEW.test_type, NEW.id, NEW.value, NEW.unit, NEW.status, NEW.timestamp)
+            ON CONFLICT (installation_id, test_type) DO UPDATE SET
+                test_id = excluded.test_id, value = excluded.value, unit = excluded.unit,
+                status = excluded.status, timestamp = excluded.timestamp
+            WHERE (excluded.timestamp, excluded.test_id) > (installation_status.timestamp, installation_status.test_id);
+        END
+        ''',
+        # Ny værdi eller status (f.eks. genberegning): kun relevant hvis det er det seneste resultat
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_installation_status_update_values
+        AFTER UPDATE OF value, unit, status ON test_results
+        WHEN NEW.installation_id IS OLD.installation_id AND NEW.test_type = OLD.test_type AND NEW.timestamp = OLD.timestamp
+        BEGIN
+            UPDATE installation_status SET value = NEW.value, unit = NEW.unit, status = NEW.status
+            WHERE installation_id = NEW.installation_id AND test_type = NEW.test_type AND test_id = NEW.id;
+        END
+        ''',
+        # Flyttet til en anden installation, testtype eller tid: find det seneste resultat for begge nøgler igen
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_installation_status_update_key
+        AFTER UPDATE OF installation_id, test_type, timestamp ON test_results
+        WHEN NEW.installation_id IS NOT OLD.installation_id OR NEW.test_type != OLD.test_type OR NEW.timestamp != OLD.timestamp
+        BEGIN
+            DELETE FROM installation_status WHERE installation_id = OLD.installation_id AND test_type = OLD.test_type;
+            INSERT INTO installation_status (installation_id, test_type, test_id, value, unit, status, timestamp)
+            SELECT installation_id, test_type, id, value, unit, status, timestamp FROM test_results
+            WHERE installation_id = OLD.installation_id AND test_type = OLD.test_type
+            ORDER BY timestamp DESC, id DESC LIMIT 1;
+            DELETE FROM installation_status WHERE installation_id = NEW.installation_id AND test_type = NEW.test_type;
+            INSERT INTO installation_status (installation_id, test_type, test_id, value, unit, status, timestamp)
+            SELECT installation_id, test_type, id, value, unit, status, timestamp FROM test_results
+            WHERE installation_id = NEW.installation_id AND test_type = NEW.test_type
+            ORDER BY timestamp DESC, id DESC LIMIT 1;
+        END
+        ''',
+        # Slettet: kun relevant hvis det var det seneste resultat
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_installation_status_delete
+        AFTER DELETE ON test_results
+        WHEN OLD.id IN (
+            SELECT test_id FROM installation_status
+            WHERE installation_id = OLD.installation_id AND test_type = OLD.test_type
+        )
+        BEGIN
+            DELETE FROM installation_status WHERE installation_id = OLD.installation_id AND test_type = OLD.test_type;
+            INSERT INTO installation_status (installation_id, test_type, test_id, value, unit, status, timestamp)
+            SELECT installation_id, test_type, id, value, unit, status, timestamp FROM test_results
+            WHERE installation_id = OLD.installation_id AND test_type = OLD.test_type
+            ORDER BY timestamp DESC, id DESC LIMIT 1;
+        END
+        ''',
+        # Udfyld tabellen for eksisterende data; samme forespørgsel som REBUILD_QUERY i src/data/installation_status.py
+        '''
+        INSERT OR REPLACE INTO installation_status (installation_id, test_type, test_id, value, unit, status, timestamp)
+        SELECT installation_id, test_type, id, value, unit, status, timestamp FROM (
+            SELECT *, ROW_NUMBER() OVER (
+                PARTITION BY installation_id, test_type ORDER BY timestamp DESC, id DESC
+            ) AS position
+            FROM test_results WHERE installation_id IS NOT NULL
+        ) WHERE position = 1
+        ''',
+    ]),
+    (8, "Full-text search indexes", [
+        # FTS5-tabeller med eksternt indhold: teksten ligger kun i kildetabellen, og
+        # triggerne holder indekset opdateret. Se src/data/search.py for genopbygning.
+        '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS installations_fts USING fts5(
+            address, customer_name,
+            content='installations', content_rowid='rowid',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_installations_fts_insert
+        AFTER INSERT ON installations
+        BEGIN
+            INSERT INTO installations_fts (rowid, address, customer_name) VALUES (NEW.rowid, NEW.address, NEW.customer_name);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_installations_fts_update
+        AFTER UPDATE OF address, customer_name ON installations
+        BEGIN
+            INSERT INTO installations_fts (installations_fts, rowid, address, customer_name) VALUES ('delete', OLD.rowid, OLD.address, OLD.customer_name);
+            INSERT INTO installations_fts (rowid, address, customer_name) VALUES (NEW.rowid, NEW.address, NEW.customer_name);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_installations_fts_delete
+        AFTER DELETE ON installations
+        BEGIN
+            INSERT INTO installations_fts (installations_fts, rowid, address, customer_name) VALUES ('delete', OLD.rowid, OLD.address, OLD.customer_name);
+        END
+        ''',
+        '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+            title, description, notes,
+            content='tasks', content_rowid='rowid',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_tasks_fts_insert
+        AFTER INSERT ON tasks
+        BEGIN
+            INSERT INTO tasks_fts (rowid, title, description, notes) VALUES (NEW.rowid, NEW.title, NEW.description, NEW.notes);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_tasks_fts_update
+        AFTER UPDATE OF title, description, notes ON tasks
+        BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, title, description, notes) VALUES ('delete', OLD.rowid, OLD.title, OLD.description, OLD.notes);
+            INSERT INTO tasks_fts (rowid, title, description, notes) VALUES (NEW.rowid, NEW.title, NEW.description, NEW.notes);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_tasks_fts_delete
+        AFTER DELETE ON tasks
+        BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, title, description, notes) VALUES ('delete', OLD.rowid, OLD.title, OLD.description, OLD.notes);
+        END
+        ''',
+        # Kun testresultater med bemærkninger indekseres
+        '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS test_results_fts USING fts5(
+            notes,
+            content='test_results', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_test_results_fts_insert
+        AFTER INSERT ON test_results
+        WHEN NEW.notes IS NOT NULL
+        BEGIN
+            INSERT INTO test_results_fts (rowid, notes) VALUES (NEW.id, NEW.notes);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_test_results_fts_update
+        AFTER UPDATE OF notes ON test_results
+        BEGIN
+            INSERT INTO test_results_fts (test_results_fts, rowid, notes) SELECT 'delete', OLD.id, OLD.notes WHERE OLD.notes IS NOT NULL;
+            INSERT INTO test_results_fts (rowid, notes) SELECT NEW.id, NEW.notes WHERE NEW.notes IS NOT NULL;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_test_results_fts_delete
+        AFTER DELETE ON test_results
+        WHEN OLD.notes IS NOT NULL
+        BEGIN
+            INSERT INTO test_results_fts (test_results_fts, rowid, notes) VALUES ('delete', OLD.id, OLD.notes);
+        END
+        ''',
+        "INSERT INTO installations_fts (rowid, address, customer_name) SELECT rowid, address, customer_name FROM installations",
+        "INSERT INTO tasks_fts (rowid, title, description, notes) SELECT rowid, title, description, notes FROM tasks",
+        "INSERT INTO test_results_fts (rowid, notes) SELECT id, notes FROM test_results WHERE notes IS NOT NULL",
+        # rank = bm25 med titlen vægtet højest
+        "INSERT INTO tasks_fts (tasks_fts, rank) VALUES ('rank', 'bm25(3.0, 1.0, 1.0)')",
+    ]),
+    (9, "Change versions for conditional GET", [
+        # Én række pr. område (se src/data/changes.py). Versionen sættes til et tilfældigt tal
+        # ved hver ændring, så en gendannet database aldrig genbruger en tidligere version.
+        '''
+        CREATE TABLE IF NOT EXISTS change_versions (
+            scope TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        ) WITHOUT ROWID
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_change_installations_insert
+        AFTER INSERT ON installations
+        BEGIN
+            INSERT INTO change_versions (scope, version) VALUES ('installations', random()) ON CONFLICT (scope) DO UPDATE SET version = excluded.version;
+            INSERT INTO change_versions (scope, version) VALUES ('test_results:' || NEW.id, random()) ON CONFLICT (scope) DO UPDATE SET version = excluded.version;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_change_installations_update
+        AFTER UPDATE ON installations
+        BEGIN
+            INSERT INTO change_versions (scope, version) VALUES ('installations', random()) ON CONFLICT (scope) DO UPDATE SET version = excluded.version;
+            INSERT INTO change_versions (scope, version) VALUES ('test_results:' || OLD.id, random()) ON CONFLICT (scope) DO UPDATE SET version = excluded.version;
+            INSERT INTO change_versions (scope, version) VALUES ('test_results:' || NEW.id, random()) ON CONFLICT (scope) DO UPDATE SET version = excluded.version;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_change_installations_delete
+        AFTER DELETE ON installations
+        BEGIN
+            INSERT INTO change_versions (scope, version) VALUES ('installations', random()) ON CONFLICT (scope) DO UPDATE SET version = excluded.version;
+            INSERT INTO change_versions (scope, version) VALUES ('test_results:' || OLD.id, random()) ON CONFLICT (scope) DO UPDATE SET version = excluded.version;
+        END
+        ''',
+        # Installationslisten viser også seneste status (installation_status)
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_change_installation_status_insert
+        AFTER INSERT ON installation_status
+        BEGIN
+            INSERT INTO change_versions (scope, version) VALUES ('installations', random()) ON CONFLICT (scope) DO UPDATE SET version = excluded.version;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_change_installation_status_update
+        AFTER UPDATE ON installation_status
+        BEGIN
+            INSERT INTO change_versions (scope, version) VALUES ('installations', random()) ON CONFLICT (scope) DO UPDATE SET version = excluded.version;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_change_installation_status_delete
+        AFTER DELETE ON installation_status
+        BEGIN
+            INSERT INTO change_versions (scope, version) VALUES ('installations', random()) ON CONFLICT (scope) DO UPDATE SET version = excluded.version;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_change_test_results_insert
+        AFTER INSERT ON test_results
+        WHEN NEW.installation_id IS NOT NULL
+        BEGIN
+            INSERT INTO change_versions (scope, version) VALUES ('test_results:' || NEW.installation_id, random()) ON CONFLICT (scope) DO UPDATE SET version = excluded.version;
+        END
+        ''',
+        # Kun ændringer i kolonner der vises; genberegning uden ny status ændrer ikke versionen
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_change_test_results_update
+        AFTER UPDATE OF installation_id, test_type, value, unit, status, timestamp, notes, image_path ON test_results
+        WHEN NEW.installation_id IS NOT OLD.installation_id OR NEW.test_type IS NOT OLD.test_type
+            OR NEW.value IS NOT OLD.value OR NEW.unit IS NOT OLD.unit OR NEW.status IS NOT OLD.status
+            OR NEW.timestamp IS NOT OLD.timestamp OR NEW.notes IS NOT OLD.notes OR NEW.image_path IS NOT OLD.image_path
+        BEGIN
+            INSERT INTO change_versions (scope, version) SELECT 'test_results:' || OLD.installation_id, random() WHERE OLD.installation_id IS NOT NULL ON CONFLICT (scope) DO UPDATE SET version = excluded.version;
+            INSERT INTO change_versions (scope, version) SELECT 'test_results:' || NEW.installation_id, random() WHERE NEW.installation_id IS NOT NULL ON CONFLICT (scope) DO UPDATE SET version = excluded.version;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_change_test_results_delete
+        AFTER DELETE ON test_results
+        WHEN OLD.installation_id IS NOT NULL
+        BEGIN
+            INSERT INTO change_versions (scope, version) VALUES ('test_results:' || OLD.installation_id, random()) ON CONFLICT (scope) DO UPDATE SET version = excluded.version;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_change_tasks_insert
+        AFTER INSERT ON tasks
+        BEGIN
+            INSERT INTO change_versions (scope, version) VALUES ('tasks', random()) ON CONFLICT (scope) DO UPDATE SET version = excluded.version;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_change_tasks_update
+        AFTER UPDATE ON tasks
+        BEGIN
+            INSERT INTO change_versions (scope, version) VALUES ('tasks', random()) ON CONFLICT (scope) DO UPDATE SET version = excluded.version;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_change_tasks_delete
+        AFTER DELETE ON tasks
+        BEGIN
+            INSERT INTO change_versions (scope, version) VALUES ('tasks', random()) ON CONFLICT (scope) DO UPDATE SET version = excluded.version;
+        END
+        ''',
+    ]),
+    (10, "Change log for delta sync", [
+        # Én række pr. installation, testresultat og opgave: den seneste ændring (se
+        # src/data/sync.py). version stiger ved hver ændring og genbruges aldrig
+        # (AUTOINCREMENT); en ændring sletter rækkens tidligere indgang, så loggen ikke
+        # vokser med antallet af ændringer. Slettede rækker bliver stående som tombstones.
+        '''
+        CREATE TABLE IF NOT EXISTS change_log (
+            version INTEGER PRIMARY KEY AUTOINCREMENT,
+            entity TEXT NOT NULL,
+            entity_id TEXT NOT NULL,
+            deleted INTEGER NOT NULL DEFAULT 0
+        )
+        ''',
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_change_log_entity ON change_log (entity, entity_id)",
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_change_log_installations_insert
+        AFTER INSERT ON installations
+        BEGIN
+            DELETE FROM change_log WHERE entity = 'installation' AND entity_id = NEW.id;
+            INSERT INTO change_log (entity, entity_id, deleted) VALUES ('installation', NEW.id, 0);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_change_log_installations_update
+        AFTER UPDATE ON installations
+        BEGIN
+            DELETE FROM change_log WHERE entity = 'installation' AND entity_id = OLD.id AND OLD.id IS NOT NEW.id;
+            INSERT INTO change_log (entity, entity_id, deleted) SELECT 'installation', OLD.id, 1 WHERE OLD.id IS NOT NEW.id;
+            DELETE FROM change_log WHERE entity = 'installation' AND entity_id = NEW.id;
+            INSERT INTO change_log (entity, entity_id, deleted) VALUES ('installation', NEW.id, 0);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_change_log_installations_delete
+        AFTER DELETE ON installations
+        BEGIN
+            DELETE FROM change_log WHERE entity = 'installation' AND entity_id = OLD.id;
+            INSERT INTO change_log (entity, entity_id, deleted) VALUES ('installation', OLD.id, 1);
+        END
+        ''',
+        # Installationen vises med seneste status (installation_status), så den er også ændret
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_change_log_installation_status_insert
+        AFTER INSERT ON installation_status
+        BEGIN
+            DELETE FROM change_log WHERE entity = 'installation' AND entity_id = NEW.installation_id AND EXISTS (SELECT 1 FROM installations WHERE id = NEW.installation_id);
+            INSERT INTO change_log (entity, entity_id, deleted) SELECT 'installation', NEW.installation_id, 0 WHERE EXISTS (SELECT 1 FROM installations WHERE id = NEW.installation_id);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_change_log_installation_status_update
+        AFTER UPDATE ON installation_status
+        BEGIN
+            DELETE FROM change_log WHERE entity = 'installation' AND entity_id = NEW.installation_id AND EXISTS (SELECT 1 FROM installations WHERE id = NEW.installation_id);
+            INSERT INTO change_log (entity, entity_id, deleted) SELECT 'installation', NEW.installation_id, 0 WHERE EXISTS (SELECT 1 FROM installations WHERE id = NEW.installation_id);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_change_log_installation_status_delete
+        AFTER DELETE ON installation_status
+        BEGIN
+            DELETE FROM change_log WHERE entity = 'installation' AND entity_id = OLD.installation_id AND EXISTS (SELECT 1 FROM installations WHERE id = OLD.installation_id);
+            INSERT INTO change_log (entity, entity_id, deleted) SELECT 'installation', OLD.installation_id, 0 WHERE EXISTS (SELECT 1 FROM installations WHERE id = OLD.installation_id);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_change_log_test_results_insert
+        AFTER INSERT ON test_results
+        BEGIN
+            DELETE FROM change_log WHERE entity = 'test' AND entity_id = CAST(NEW.id AS TEXT);
+            INSERT INTO change_log (entity, entity_id, deleted) VALUES ('test', CAST(NEW.id AS TEXT), 0);
+        END
+        ''',
+        # Kun ændringer i kolonner der vises, som i migration 9
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_change_log_test_results_update
+        AFTER UPDATE OF id, installation_id, test_type, value, unit, status, timestamp, notes, image_path ON test_results
+        WHEN NEW.id IS NOT OLD.id OR NEW.installation_id IS NOT OLD.installation_id OR NEW.test_type IS NOT OLD.test_type
+            OR NEW.value IS NOT OLD.value OR NEW.unit IS NOT OLD.unit OR NEW.status IS NOT OLD.status
+            OR NEW.timestamp IS NOT OLD.timestamp OR NEW.notes IS NOT OLD.notes OR NEW.image_path IS NOT OLD.image_path
+        BEGIN
+            DELETE FROM change_log WHERE entity = 'test' AND entity_id = CAST(OLD.id AS TEXT) AND OLD.id IS NOT NEW.id;
+            INSERT INTO change_log (entity, entity_id, deleted) SELECT 'test', CAST(OLD.id AS TEXT), 1 WHERE OLD.id IS NOT NEW.id;
+            DELETE FROM change_log WHERE entity = 'test' AND entity_id = CAST(NEW.id AS TEXT);
+            INSERT INTO change_log (entity, entity_id, deleted) VALUES ('test', CAST(NEW.id AS TEXT), 0);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_change_log_test_results_delete
+        AFTER DELETE ON test_results
+        BEGIN
+            DELETE FROM change_log WHERE entity = 'test' AND entity_id = CAST(OLD.id AS TEXT);
+            INSERT INTO change_log (entity, entity_id, deleted) VALUES ('test', CAST(OLD.id AS TEXT), 1);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_change_log_tasks_insert
+        AFTER INSERT ON tasks
+        BEGIN
+            DELETE FROM change_log WHERE entity = 'task' AND entity_id = NEW.id;
+            INSERT INTO change_log (entity, entity_id, deleted) VALUES ('task', NEW.id, 0);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_change_log_tasks_update
+        AFTER UPDATE ON tasks
+        BEGIN
+            DELETE FROM change_log WHERE entity = 'task' AND entity_id = OLD.id AND OLD.id IS NOT NEW.id;
+            INSERT INTO change_log (entity, entity_id, deleted) SELECT 'task', OLD.id, 1 WHERE OLD.id IS NOT NEW.id;
+            DELETE FROM change_log WHERE entity = 'task' AND entity_id = NEW.id;
+            INSERT INTO change_log (entity, entity_id, deleted) VALUES ('task', NEW.id, 0);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_change_log_tasks_delete
+        AFTER DELETE ON tasks
+        BEGIN
+            DELETE FROM change_log WHERE entity = 'task' AND entity_id = OLD.id;
+            INSERT INTO change_log (entity, entity_id, deleted) VALUES ('task', OLD.id, 1);
+        END
+        ''',
+        # Eksisterende data er ændret "før" første version
+        "INSERT INTO change_log (entity, entity_id) SELECT 'installation', id FROM installations ORDER BY id",
+        "INSERT INTO change_log (entity, entity_id) SELECT 'test', CAST(id AS TEXT) FROM test_results ORDER BY id",
+        "INSERT INTO change_log (entity, entity_id) SELECT 'task', id FROM tasks ORDER BY created_date, id",
+    ]),
+    (11, "Search indexes keyed by ID instead of rowid", [
+        # installations og tasks har TEXT-primærnøgler, så deres rowid er ikke stabil:
+        # VACUUM må omnummerere den, og så peger søgeindekset fra migration 8 på de
+        # forkerte rækker. Indekserne gemmer nu selv teksten og rækkens ID i en
+        # UNINDEXED-kolonne, og FTS-tabellens egen rowid bruges ikke uden for indekset.
+        # test_results_fts beholder content_rowid='id', da id er en INTEGER PRIMARY KEY.
+        "DROP TRIGGER IF EXISTS trg_installations_fts_insert",
+        "DROP TRIGGER IF EXISTS trg_installations_fts_update",
+        "DROP TRIGGER IF EXISTS trg_installations_fts_delete",
+        "DROP TABLE IF EXISTS installations_fts",
+        "DROP TRIGGER IF EXISTS trg_tasks_fts_insert",
+        "DROP TRIGGER IF EXISTS trg_tasks_fts_update",
+        "DROP TRIGGER IF EXISTS trg_tasks_fts_delete",
+        "DROP TABLE IF EXISTS tasks_fts",
+        # id står sidst, så kolonnenumrene i snippet() og bm25() er de samme som før
+        '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS installations_fts USING fts5(
+            address, customer_name, id UNINDEXED,
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_installations_fts_insert
+        AFTER INSERT ON installations
+        BEGIN
+            INSERT INTO installations_fts (address, customer_name, id) VALUES (NEW.address, NEW.customer_name, NEW.id);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_installations_fts_update
+        AFTER UPDATE OF id, address, customer_name ON installations
+        BEGIN
+            DELETE FROM installations_fts WHERE id = OLD.id;
+            INSERT INTO installations_fts (address, customer_name, id) VALUES (NEW.address, NEW.customer_name, NEW.id);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_installations_fts_delete
+        AFTER DELETE ON installations
+        BEGIN
+            DELETE FROM installations_fts WHERE id = OLD.id;
+        END
+        ''',
+        '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+            title, description, notes, id UNINDEXED,
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_tasks_fts_insert
+        AFTER INSERT ON tasks
+        BEGIN
+            INSERT INTO tasks_fts (title, description, notes, id) VALUES (NEW.title, NEW.description, NEW.notes, NEW.id);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_tasks_fts_update
+        AFTER UPDATE OF id, title, description, notes ON tasks
+        BEGIN
+            DELETE FROM tasks_fts WHERE id = OLD.id;
+            INSERT INTO tasks_fts (title, description, notes, id) VALUES (NEW.title, NEW.description, NEW.notes, NEW.id);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_tasks_fts_delete
+        AFTER DELETE ON tasks
+        BEGIN
+            DELETE FROM tasks_fts WHERE id = OLD.id;
+        END
+        ''',
+        "INSERT INTO installations_fts (address, customer_name, id) SELECT address, customer_name, id FROM installations",
+        "INSERT INTO tasks_fts (title, description, notes, id) SELECT title, description, notes, id FROM tasks ORDER BY created_date, id",
+        "INSERT INTO tasks_fts (tasks_fts, rank) VALUES ('rank', 'bm25(3.0, 1.0, 1.0, 0.0)')",
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def get_schema_version(conn) -> int:
+    """
+    Get the schema version recorded in the database.
+
+    Args:
+        conn: SQLite database connection
+
+    Returns:
+        int: Applied migration version (0 for a new database)
+    """
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn) -> int:
+    """
+    Apply all pending migrations.
+
+    Each migration runs in its own transaction together with the version
+    bump, so a failing migration leaves the schema at the previous version.
+
+    Args:
+        conn: SQLite database connection
+
+    Returns:
+        int: Schema version after migrating
+
+    Raises:
+        sqlite3.Error: If a migration fails
+    """
+    current = get_schema_version(conn)
+    if current > LATEST_VERSION:
+        logging.warning(f"Database schema version {current} is newer than this application ({LATEST_VERSION})")
+        return current
+
+    for version, description, statements in MIGRATIONS:
+        if version <= current:
+            continue
+
+        logging.info(f"Applying migration {version}: {description}")
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Migration {version} failed: {e}")
+            conn.rollback()
+            raise
+        current = version
+
+    # Opdater planner-statistik for nye indekser
+    conn.execute("PRAGMA optimize")
+    return current
+
+def check_foreign_keys(conn) -> Dict[str, int]:
+    """
+    Find rows whose installation does not exist.
+
+    Foreign keys are enforced by the connections (PRAGMA foreign_keys = ON),
+    but rows written before that may point to deleted installations. They
+    are logged rather than deleted, since they may be worth restoring; they
+    stay readable, but a write that sets their installation_id must name an
+    existing installation.
+
+    Args:
+        conn: SQLite database connection
+
+    Returns:
+        Dict[str, int]: Number of orphaned rows per table, empty if there are none
+    """
+    orphans: Dict[str, int] = {}
+    parents: Dict[str, str] = {}
+    for table, _, parent, _ in conn.execute("PRAGMA foreign_key_check"):
+        orphans[table] = orphans.get(table, 0) + 1
+        parents[table] = parent
+    for table, count in orphans.items():
+        logging.warning(
+            f"{count} rows in {table} refer to missing {parents[table]} rows; "
+            f"list them with PRAGMA foreign_key_check({table})"
+        )
+    return orphans
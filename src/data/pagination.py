@@ -0,0 +1,43 @@
+import base64
+import json
+from typing import Any, Sequence, Tuple
+
+def encode_cursor(key: Sequence[Any]) -> str:
+    """
+    Encode a keyset position as an opaque, URL-safe cursor.
+
+    Args:
+        key: Sort key values of the last row on the page, e.g. (timestamp, id)
+
+    Returns:
+        str: Opaque cursor string
+    """
+    raw = json.dumps(list(key), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, size: int) -> Tuple[Any, ...]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor: Opaque cursor string
+        size: Expected number of key values
+
+    Returns:
+        Tuple[Any, ...]: The sort key values
+
+    Raises:
+        ValueError: If the cursor is malformed, has the wrong number of values
+            or values that are not strings, numbers or null
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if not isinstance(key, list) or len(key) != size:
+        raise ValueError("Invalid cursor")
+    # Værdierne bindes direkte som SQL-parametre
+    if not all(value is None or (isinstance(value, (str, int, float)) and not isinstance(value, bool)) for value in key):
+        raise ValueError("Invalid cursor")
+    return tuple(key)
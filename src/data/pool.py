@@ -0,0 +1,197 @@
+import sqlite3
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+# Pragmas applied once to every new connection. journal_mode=WAL is persistent
+# in the database file, the rest are per connection.
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -20000,
+    "mmap_size": 268435456,
+    "busy_timeout": 5000,
+    "temp_store": "MEMORY",
+    "foreign_keys": "ON",
+}
+
+def connect_readonly(db_path: str, pragmas: Optional[Dict[str, object]] = None) -> sqlite3.Connection:
+    """
+    Open a read-only connection outside the pool, for long-running reads such as exports.
+
+    Args:
+        db_path: Path to the SQLite database file
+        pragmas: Pragmas to apply (default: DEFAULT_PRAGMAS); journal_mode is
+            skipped since it is persistent and cannot be set read-only
+
+    Returns:
+        sqlite3.Connection: A read-only connection usable from any thread
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+    try:
+        for name, value in (DEFAULT_PRAGMAS if pragmas is None else pragmas).items():
+            if name != "journal_mode":
+                conn.execute(f"PRAGMA {name} = {value}")
+    except sqlite3.Error:
+        conn.close()
+        raise
+    return conn
+
+class PoolTimeoutError(sqlite3.OperationalError):
+    """Raised when no pooled connection becomes available within the timeout."""
+
+class ConnectionPool:
+    """
+    Thread-safe pool of configured SQLite connections.
+
+    Connections are opened lazily up to max_size and reused across requests,
+    so the page cache and prepared statement cache stay warm.
+    """
+
+    def __init__(self, db_path: str, max_size: int = 8, timeout: float = 10.0,
+                 pragmas: Optional[Dict[str, object]] = None):
+        """
+        Args:
+            db_path: Path to the SQLite database file
+            max_size: Maximum number of open connections
+            timeout: Seconds to wait for a free connection before giving up
+            pragmas: Pragmas applied to each new connection (default: DEFAULT_PRAGMAS)
+        """
+        self.db_path = db_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._created = 0
+        self._counters = {
+            "acquired": 0,
+            "released": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "discarded": 0,
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open and configure a new connection."""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        logging.debug(f"Opened pooled SQLite connection to {self.db_path}")
+        return conn
+
+    def _count(self, key: str):
+        with self._lock:
+            self._counters[key] += 1
+
+    def acquire(self) -> sqlite3.Connection:
+        """
+        Take a connection from the pool, opening a new one if the pool is not full.
+
+        Returns:
+            sqlite3.Connection: A configured connection
+
+        Raises:
+            PoolTimeoutError: If no connection is free within the timeout
+        """
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed")
+
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = None
+
+        if conn is None:
+            with self._lock:
+                can_create = self._created < self.max_size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                try:
+                    conn = self._connect()
+                except sqlite3.Error:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                self._count("waits")
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    self._count("timeouts")
+                    raise PoolTimeoutError(
+                        f"No database connection available within {self.timeout} seconds"
+                    )
+
+        self._count("acquired")
+        return conn
+
+    def release(self, conn: sqlite3.Connection):
+        """
+        Return a connection to the pool.
+
+        Any transaction left open by the caller is rolled back, so a failed
+        request never leaks locks or half-written data to the next user.
+        """
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error as e:
+            logging.warning(f"Discarding broken pooled connection: {e}")
+            self._discard(conn)
+            return
+
+        self._count("released")
+        if self._closed:
+            self._discard(conn)
+        else:
+            self._idle.put(conn)
+
+    def _discard(self, conn: sqlite3.Connection):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self._created -= 1
+            self._counters["discarded"] += 1
+
+    @contextmanager
+    def connection(self):
+        """Context manager that acquires a connection and always releases it."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Close all idle connections. Connections in use are closed on release."""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Get pool usage statistics.
+
+        Returns:
+            dict: Pool size, open/idle/in-use connections and lifetime counters
+        """
+        with self._lock:
+            idle = self._idle.qsize()
+            return {
+                "max_size": self.max_size,
+                "open": self._created,
+                "idle": idle,
+                "in_use": self._created - idle,
+                **self._counters,
+            }
@@ -0,0 +1,203 @@
+import argparse
+import logging
+import re
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional
+
+# Søgbare typer og deres FTS5-tabel (se migration 8 og 11)
+SEARCH_KINDS = ("installation", "task", "test")
+_FTS_TABLES = {
+    "installation": "installations_fts",
+    "task": "tasks_fts",
+    "test": "test_results_fts",
+}
+
+# Kortere ord end prefix-indekset (2 tegn) ville kræve en gennemløbning af hele indekset
+MIN_TERM_LENGTH = 2
+MAX_TERMS = 8
+
+# Matcher en søgning flere rækker end dette, rangeres kun de senest indekserede (højeste
+# rowid i FTS-tabellen); bm25 skal beregnes for hver kandidat, så meget brede søgninger
+# ellers bliver langsomme
+RANK_CANDIDATES = 2000
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+# Rangér i FTS-tabellen først og slå kun de valgte rækker op i kildetabellen
+_QUERIES = {
+    "installation": """
+        SELECT i.id, i.customer_name, i.address, NULL, f.rank
+        FROM (
+            SELECT id, rank FROM installations_fts
+            WHERE installations_fts MATCH ? AND rowid >= ? ORDER BY rank LIMIT ?
+        ) f JOIN installations i ON i.id = f.id
+        ORDER BY f.rank
+    """,
+    "task": """
+        SELECT t.id, t.title, t.installation_id, f.snippet, f.rank
+        FROM (
+            SELECT id, rank, snippet(tasks_fts, -1, '', '', '…', 12) AS snippet FROM tasks_fts
+            WHERE tasks_fts MATCH ? AND rowid >= ? ORDER BY rank LIMIT ?
+        ) f JOIN tasks t ON t.id = f.id
+        ORDER BY f.rank
+    """,
+    "test": """
+        SELECT r.id, r.test_type, r.installation_id, f.snippet, f.rank
+        FROM (
+            SELECT rowid, rank, snippet(test_results_fts, 0, '', '', '…', 12) AS snippet FROM test_results_fts
+            WHERE test_results_fts MATCH ? AND rowid >= ? ORDER BY rank LIMIT ?
+        ) f JOIN test_results r ON r.id = f.rowid
+        ORDER BY f.rank
+    """,
+}
+
+def build_match_query(text: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 query where every word is a prefix term.
+
+    Words are quoted, so FTS5 operators and special characters in the input
+    are matched literally. Words shorter than MIN_TERM_LENGTH are dropped.
+
+    Args:
+        text: Search text from the user, e.g. "Eksempelv 12"
+
+    Returns:
+        Optional[str]: The MATCH expression (e.g. '"Eksempelv"* "12"*'), None if
+        no usable words remain
+    """
+    terms = [term for term in _TERM.findall(text) if len(term) >= MIN_TERM_LENGTH][:MAX_TERMS]
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+def _candidate_bound(conn, kind: str, match: str) -> int:
+    """Lowest rowid to rank, so at most RANK_CANDIDATES matches are ranked."""
+    table = _FTS_TABLES[kind]
+    row = conn.execute(
+        f"SELECT rowid FROM {table} WHERE {table} MATCH ? ORDER BY rowid DESC LIMIT 1 OFFSET ?",
+        (match, RANK_CANDIDATES - 1)
+    ).fetchone()
+    return row[0] if row else -1
+
+def _installations_by_id(conn, text: str, limit: int) -> List[tuple]:
+    """Installations whose ID starts with the search text, using the primary key index."""
+    prefix = text.strip()
+    if not prefix or " " in prefix:
+        return []
+    return conn.execute(
+        "SELECT id, customer_name, address FROM installations WHERE id >= ? AND id < ? ORDER BY id LIMIT ?",
+        (prefix, prefix + "\U0010ffff", limit)
+    ).fetchall()
+
+def search(conn, text: str, kinds: Optional[Iterable[str]] = None, limit: int = 20) -> List[Dict[str, Any]]:
+    """
+    Search installations, tasks and test result notes.
+
+    Each kind is ranked with bm25 in its own FTS5 index and the best
+    `limit` hits of each are merged by score. All words must match, and
+    each word matches as a prefix. Installations whose ID starts with the
+    search text come first. When more than RANK_CANDIDATES rows of a kind
+    match, only the most recently added or changed of them are ranked.
+
+    Args:
+        conn: SQLite database connection
+        text: Search text
+        kinds: Kinds to search (default: all of SEARCH_KINDS)
+        limit: Maximum number of hits
+
+    Returns:
+        List[Dict[str, Any]]: Hits with kind, id, title, subtitle, snippet and
+        score (lower is better, None for ID matches), best first
+    """
+    kinds = list(kinds or SEARCH_KINDS)
+    hits = []
+    if "installation" in kinds:
+        for id_, title, subtitle in _installations_by_id(conn, text, limit):
+            hits.append({"kind": "installation", "id": id_, "title": title, "subtitle": subtitle,
+                         "snippet": None, "score": None})
+    id_hits = {hit["id"] for hit in hits}
+
+    match = build_match_query(text)
+    if match is None:
+        return hits
+
+    ranked = []
+    for kind in kinds:
+        bound = _candidate_bound(conn, kind, match)
+        for id_, title, subtitle, snippet, score in conn.execute(_QUERIES[kind], (match, bound, limit)):
+            if kind == "installation" and id_ in id_hits:
+                continue
+            ranked.append({
+                "kind": kind,
+                "id": str(id_),
+                "title": title,
+                "subtitle": subtitle,
+                "snippet": snippet,
+                "score": score,
+            })
+    ranked.sort(key=lambda hit: hit["score"])
+    return (hits + ranked)[:limit]
+
+def rebuild_search_index(conn) -> Dict[str, int]:
+    """
+    Rebuild the full-text indexes from the source tables.
+
+    Needed only if the indexes are out of sync, e.g. after writes with the
+    triggers disabled. Runs in one transaction.
+
+    Args:
+        conn: SQLite database connection
+
+    Returns:
+        Dict[str, int]: Number of indexed rows per kind
+    """
+    with conn:
+        # installations_fts og tasks_fts gemmer selv teksten (migration 11), så de tømmes med DELETE
+        conn.execute("DELETE FROM installations_fts")
+        conn.execute(
+            "INSERT INTO installations_fts (address, customer_name, id) "
+            "SELECT address, customer_name, id FROM installations"
+        )
+        conn.execute("DELETE FROM tasks_fts")
+        conn.execute(
+            "INSERT INTO tasks_fts (title, description, notes, id) "
+            "SELECT title, description, notes, id FROM tasks ORDER BY created_date, id"
+        )
+        conn.execute("INSERT INTO test_results_fts (test_results_fts) VALUES ('delete-all')")
+        conn.execute(
+            "INSERT INTO test_results_fts (rowid, notes) "
+            "SELECT id, notes FROM test_results WHERE notes IS NOT NULL"
+        )
+        conn.execute("INSERT INTO installations_fts (installations_fts) VALUES ('optimize')")
+        conn.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('optimize')")
+        conn.execute("INSERT INTO test_results_fts (test_results_fts) VALUES ('optimize')")
+
+    return {
+        "installation": conn.execute("SELECT COUNT(*) FROM installations").fetchone()[0],
+        "task": conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0],
+        "test": conn.execute("SELECT COUNT(*) FROM test_results WHERE notes IS NOT NULL").fetchone()[0],
+    }
+
+def main():
+    """
+    Kommandolinje: genopbyg søgeindekserne.
+    """
+    from config import DB_PATH, LOG_FORMAT
+
+    parser = argparse.ArgumentParser(description="Genopbyg søgeindekserne")
+    parser.add_argument("--db", default=DB_PATH, help="Sti til databasen")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+    conn = sqlite3.connect(args.db)
+    try:
+        counts = rebuild_search_index(conn)
+        logging.info(
+            f"Søgeindeks genopbygget: {counts['installation']} installationer, "
+            f"{counts['task']} opgaver, {counts['test']} testresultater"
+        )
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.data.db import INSTALLATION_COLUMNS, COMPLIANCE_COLUMNS, TEST_RESULT_COLUMNS, TASK_COLUMNS
+
+# Typer i change_log (se migration 10) og forespørgslen der henter rækkerne i
+# samme kolonnerækkefølge som listeendepunkterne
+SYNC_ENTITIES = ("installation", "test", "task")
+_ROW_QUERIES = {
+    "installation": f"""SELECT {INSTALLATION_COLUMNS}, {COMPLIANCE_COLUMNS}
+        FROM installations LEFT JOIN installation_status s ON s.installation_id = installations.id
+        WHERE installations.id IN ({{}}) GROUP BY installations.id""",
+    "test": f"SELECT {TEST_RESULT_COLUMNS} FROM test_results WHERE id IN ({{}})",
+    "task": f"SELECT {TASK_COLUMNS} FROM tasks WHERE id IN ({{}})",
+}
+
+def get_changes(conn, since: int = 0, limit: int = 500) -> Tuple[List[Tuple[int, str, str, Optional[tuple]]], int, bool]:
+    """
+    Get what changed after a change log version.
+
+    The change log holds one entry per installation, test result and task:
+    its latest change. Entries are returned in version order together with
+    the current row. Deleted rows, and rows deleted after their entry was
+    written, are returned without a row (a tombstone).
+
+    The log and the rows are read without a common snapshot, so a row can be
+    newer than its entry. That row is then also returned on a later page or
+    sync, which is harmless since applying a change twice gives the same result.
+
+    Args:
+        conn: SQLite database connection
+        since: Last version the client has; 0 for everything
+        limit: Maximum number of changes
+
+    Returns:
+        Tuple: List of (version, entity, id, row or None), the version to pass
+        as `since` next time, and whether there are more changes after it.
+        Rows are in the column order of the list endpoints (installations with
+        COMPLIANCE_COLUMNS).
+    """
+    entries = conn.execute(
+        "SELECT version, entity, entity_id, deleted FROM change_log WHERE version > ? ORDER BY version LIMIT ?",
+        (since, limit + 1)
+    ).fetchall()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    wanted: Dict[str, List[Any]] = {entity: [] for entity in SYNC_ENTITIES}
+    for _, entity, entity_id, deleted in entries:
+        if not deleted:
+            wanted[entity].append(int(entity_id) if entity == "test" else entity_id)
+
+    rows: Dict[Tuple[str, str], tuple] = {}
+    for entity, ids in wanted.items():
+        # Hold antallet af parametre under SQLite's grænse
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            query = _ROW_QUERIES[entity].format(", ".join("?" * len(chunk)))
+            for row in conn.execute(query, chunk):
+                rows[(entity, str(row[0]))] = row
+
+    changes = [
+        (version, entity, entity_id, None if deleted else rows.get((entity, entity_id)))
+        for version, entity, entity_id, deleted in entries
+    ]
+    next_since = entries[-1][0] if entries else since
+    return changes, next_since, has_more
+
+def get_latest_version(conn) -> int:
+    """
+    Get the newest change log version.
+
+    Args:
+        conn: SQLite database connection
+
+    Returns:
+        int: Highest version handed out so far, 0 if nothing has changed
+    """
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'").fetchone()
+    return row[0] if row else 0
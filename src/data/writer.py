@@ -0,0 +1,244 @@
+import sqlite3
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.data.pool import DEFAULT_PRAGMAS
+
+class WriterQueueFullError(sqlite3.OperationalError):
+    """Raised when the write queue is full, i.e. writes arrive faster than they can be committed."""
+
+class WriterClosedError(sqlite3.ProgrammingError):
+    """Raised when a write is submitted after the writer was closed."""
+
+# Sentinel der får skrivetråden til at stoppe
+_STOP = object()
+
+Operation = Tuple[Future, Callable[..., Any], tuple, dict]
+
+class GroupCommitWriter:
+    """
+    Single writer thread that commits concurrent writes together.
+
+    SQLite allows one writer at a time, so instead of every request opening
+    its own write transaction (and waiting on the lock or the commit of the
+    one before it), writes are queued to one thread with its own connection.
+    Writes that arrive while a batch is being committed are run in one
+    transaction, each inside its own savepoint: a failing write is rolled
+    back on its own and only its caller gets the error. When the previous
+    batch had more writes than are queued, the writer waits up to
+    `max_delay` for the rest before committing.
+
+    Write functions run inside the writer's transaction and must not commit
+    or roll back themselves.
+    """
+
+    def __init__(self, db_path: str, pragmas: Optional[Dict[str, object]] = None,
+                 max_batch: int = 128, max_delay: float = 0.002, max_queue: int = 1000):
+        """
+        Args:
+            db_path: Path to the SQLite database file
+            pragmas: Pragmas applied to the writer's connection (default: DEFAULT_PRAGMAS)
+            max_batch: Maximum number of writes per transaction
+            max_delay: Seconds to wait for more writes after the first one in a batch
+            max_queue: Maximum number of queued writes before submit() fails
+        """
+        self.db_path = db_path
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._counters = {
+            "submitted": 0,
+            "committed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "batches": 0,
+            "batch_errors": 0,
+            "max_batch": 0,
+            "commit_seconds": 0.0,
+        }
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """
+        Queue fn(conn, *args, **kwargs) to run in the next write transaction.
+
+        Returns:
+            Future: Resolves to the return value of fn once the transaction is
+            committed, or to the exception raised by fn or the commit
+
+        Raises:
+            WriterQueueFullError: If the queue is full
+            WriterClosedError: If the writer is closed
+        """
+        if self._closed:
+            raise WriterClosedError("Writer is closed")
+        self._ensure_started()
+
+        future = Future()
+        try:
+            self._queue.put_nowait((future, fn, args, kwargs))
+        except queue.Full:
+            self._count("rejected")
+            raise WriterQueueFullError(f"Write queue is full ({self._queue.maxsize} pending writes)")
+        self._count("submitted")
+        return future
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self._counters[key] += amount
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the writer's connection; transactions are managed explicitly."""
+        conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _next_batch(self, first: Operation, expected: int) -> Tuple[List[Operation], bool]:
+        """
+        Collect the queued writes, up to max_batch. While fewer than `expected`
+        are collected, wait up to max_delay for more.
+        """
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic() if len(batch) < expected else 0
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        conn = None
+        last_batch = 1
+        try:
+            stop = False
+            while not stop:
+                first = self._queue.get()
+                if first is _STOP:
+                    break
+                # Forvent lige så mange skrivninger som sidst: en enkelt klient venter
+                # aldrig, og med N samtidige klienter ventes kun til alle N er med
+                batch, stop = self._next_batch(first, expected=last_batch)
+                last_batch = len(batch)
+                if conn is None:
+                    try:
+                        conn = self._connect()
+                    except sqlite3.Error as e:
+                        logging.error(f"Writer could not open the database: {e}")
+                        self._fail(batch, e)
+                        continue
+                self._commit_batch(conn, batch)
+        finally:
+            if conn is not None:
+                conn.close()
+            # Skrivninger der nåede ind i køen efter lukningen
+            leftover = []
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not _STOP:
+                    leftover.append(item)
+            if leftover:
+                self._fail(leftover, WriterClosedError("Writer is closed"))
+
+    def _commit_batch(self, conn: sqlite3.Connection, batch: List[Operation]):
+        # Skriv ikke for kaldere der har givet op, f.eks. en afbrudt request
+        batch = [op for op in batch if op[0].set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        started = time.perf_counter()
+        results = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for _, fn, args, kwargs in batch:
+                conn.execute("SAVEPOINT write")
+                try:
+                    results.append((True, fn(conn, *args, **kwargs)))
+                    conn.execute("RELEASE write")
+                except Exception as e:
+                    conn.execute("ROLLBACK TO write")
+                    conn.execute("RELEASE write")
+                    results.append((False, e))
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            # BEGIN eller COMMIT fejlede: intet er skrevet, så alle i bidden får fejlen
+            logging.error(f"Write batch of {len(batch)} failed: {e}")
+            try:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+            results = [(False, e)] * len(batch)
+            self._count("batch_errors")
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._counters["batches"] += 1
+            self._counters["max_batch"] = max(self._counters["max_batch"], len(batch))
+            self._counters["commit_seconds"] += elapsed
+            for ok, _ in results:
+                self._counters["committed" if ok else "failed"] += 1
+
+        for (future, _, _, _), (ok, value) in zip(batch, results):
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def _fail(self, batch: List[Operation], error: Exception):
+        """Fail every write in a batch that never reached the database."""
+        for future, _, _, _ in batch:
+            if future.set_running_or_notify_cancel():
+                future.set_exception(error)
+        with self._lock:
+            self._counters["failed"] += len(batch)
+            self._counters["batch_errors"] += 1
+
+    def close(self):
+        """Commit the queued writes, then stop the writer thread."""
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Get writer statistics.
+
+        Returns:
+            dict: Queue depth and lifetime counters; avg_batch is committed and
+            failed writes per transaction
+        """
+        with self._lock:
+            counters = dict(self._counters)
+        batches = counters["batches"]
+        return {
+            "queued": self._queue.qsize(),
+            "max_queue": self._queue.maxsize,
+            **counters,
+            "commit_seconds": round(counters["commit_seconds"], 3),
+            "avg_batch": round((counters["committed"] + counters["failed"]) / batches, 2) if batches else 0.0,
+        }
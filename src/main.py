@@ -3,6 +3,8 @@ import sqlite3
 from datetime import datetime
 from models import Installation, TestResult, TestType, TestStatus
 from config import DB_PATH
+from src.data import db as data
+from src.data.migrations import migrate
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, 
@@ -30,46 +32,17 @@ def main():
 
 def init_database(conn):
     """
-    Initialize database schema if tables don't exist.
+    Initialize or upgrade the database schema.
     
     Args:
         conn: SQLite database connection object
     """
-    cursor = conn.cursor()
-    
     try:
-        # Opret tabeller hvis de ikke eksisterer
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS installations (
-            id TEXT PRIMARY KEY,
-            address TEXT NOT NULL,
-            customer_name TEXT NOT NULL,
-            installation_date TEXT,
-            last_inspection TEXT
-        )                              
-        ''')
-        
-        
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS test_results (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            installation_id TEXT,
-            test_type TEXT NOT NULL,
-            value REAL NOT NULL,
-            unit TEXT NOT NULL,
-            status TEXT NOT NULL,
-            timestamp TEXT NOT NULL,
-            notes TEXT,
-            image_path TEXT,
-            FOREIGN KEY (installation_id) REFERENCES installations (id)
-        )                    
-        ''')
-        
-        conn.commit()
-        logging.info("Database initialized successfully")
+        # Opret eller opgrader skemaet via de nummererede migrationer
+        version = migrate(conn)
+        logging.info(f"Database initialized successfully (schema version {version})")
     except sqlite3.Error as e:
         logging.error(f"Error initializing database: {e}")
-        conn.rollback()
     
 def test_app(conn):
     """Test function to demonstrate application functionality."""
@@ -81,18 +54,10 @@ def test_app(conn):
             customer_name="Jens Jensen"
         )
 
-        # Gem installation i database
+        # Gem installation i database; demoen køres igen ved hver start, så en
+        # eksisterende installation overskrives
+        data.replace_installation(conn, new_installation)
         cursor = conn.cursor()
-        cursor.execute(
-            "INSERT OR REPLACE INTO installations VALUES (?, ?, ?, ?, ?)",
-            (
-                new_installation.id,
-                new_installation.address,
-                new_installation.customer_name,
-                new_installation.installation_date,
-                new_installation.last_inspection
-            )
-        )
         
         # RCD Test
         rcd_test = TestResult(
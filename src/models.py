@@ -24,6 +24,7 @@ class TestResult:
     notes: Optional[str] = None
     image_path: Optional[str] = None
     timestamp: datetime = None
+    rule_version: Optional[str] = None
     
     def __post_init__(self):
         if self.timestamp is None:
@@ -1,29 +1,48 @@
 import logging
-from src.models import TestStatus
+from typing import Optional
+from src.models import TestStatus, TestType
+from src.utils.standards import DEFAULT_RATED_CURRENT_MA, DEFAULT_RCD_TYPE, TEST_TYPES, lookup
+from src.utils.validators import STATUS_BY_CODE, grade, grade_value
 
-def validate_rcd_test(tripping_time_ms: float, rated_current_ma: float = 30) -> TestStatus:
+def validate_rcd_test(tripping_time_ms: float, rated_current_ma: float = DEFAULT_RATED_CURRENT_MA,
+                      rcd_type: str = DEFAULT_RCD_TYPE) -> TestStatus:
     """
     Validerer RCD-test i henhold til DS/HD 60364-6
 
     Args:
         tripping_time_ms: Udløsningstid i millisekunder
         rated_current_ma: Mærkestrømen i milliampere (standard: 30 mA)
+        rcd_type: RCD-typen (standard: Type A)
 
     Returns:
         TestStatus: PASS/FAIL/WARNING
     """
-    # For Type A RCD med 30 mA
-    if rated_current_ma == 30:
-        if tripping_time_ms <= 200:  # Hurtig udløsning er god
-            return TestStatus.PASS
-        elif tripping_time_ms <= 300:  # 300 ms max for Type A
-            return TestStatus.PASS
-        elif tripping_time_ms <= 400:  # Lidt tolerance
-            return TestStatus.WARNING
-        else:
-            return TestStatus.FAIL
-    # Andre typer RCD Tilføjes nedenunder her
-    else:
-        logging.warning(f"No specific validation for RCD with rated current: {rated_current_ma} mA")
+    limit = lookup(TestType.RCD.value, rated_current_ma, rcd_type)
+    if limit is None:
+        logging.warning(f"No specific validation for RCD with rated current: {rated_current_ma} mA, type {rcd_type}")
         return TestStatus.FAIL
 
+    return STATUS_BY_CODE[grade_value(limit, tripping_time_ms)]
+
+def grade_test(test_type: str, value: float, unit: str, notes: Optional[str] = None) -> Optional[TestStatus]:
+    """
+    Bestemmer status for en måling ud fra testtypens grænseværdier.
+
+    Args:
+        test_type: Testtypen (TestType værdi)
+        value: Måleværdien
+        unit: Måleværdiens enhed; værdien omregnes til grænseværdiernes enhed
+        notes: Bemærkninger, hvor RCD-mærkestrømmen kan være angivet (f.eks. "30 mA Type A")
+
+    Returns:
+        Optional[TestStatus]: PASS/FAIL/WARNING (PASS for testtyper uden grænseværdier),
+        None hvis enheden er ukendt for testtypen, så målingen ikke kan bedømmes
+    """
+    if test_type not in TEST_TYPES:
+        logging.warning(f"Ingen grænseværdier for testtype: {test_type}")
+        return TestStatus.PASS
+
+    test_status = grade(test_type, value, unit, notes)
+    if test_status is None:
+        logging.warning(f"Ukendt enhed '{unit}' for testtype {test_type}; målingen bedømmes ikke")
+    return test_status
@@ -0,0 +1,467 @@
+import argparse
+import hashlib
+import html
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from string import Template
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.data.db import INSTALLATION_COLUMNS, TEST_RESULT_COLUMNS
+
+# Øges når skabelonerne ændres, så cachede rapporter bliver genereret igen
+TEMPLATE_VERSION = 1
+
+# Ældre versioner af en rapport slettes først, når de ikke er brugt i så mange sekunder
+STALE_REPORT_GRACE_SECONDS = 300
+
+REPORT_FORMATS = {
+    "html": "text/html; charset=utf-8",
+    "pdf": "application/pdf",
+}
+
+STATUS_CLASSES = {
+    "Godkendt": "pass",
+    "Advarsel": "warning",
+    "Ikke godkendt": "fail",
+}
+
+# Skabelonerne kompileres én gang ved import
+_HTML_PAGE = Template("""<!DOCTYPE html>
+<html lang="da">
+<head>
+<meta charset="utf-8">
+<title>Inspektionsrapport $installation_id</title>
+<style>
+body { font-family: Arial, Helvetica, sans-serif; font-size: 13px; color: #222; margin: 40px; }
+h1 { font-size: 22px; margin-bottom: 4px; }
+table { border-collapse: collapse; width: 100%; margin-top: 16px; }
+th, td { border: 1px solid #ccc; padding: 4px 8px; text-align: left; }
+th { background: #f2f2f2; }
+dl { display: grid; grid-template-columns: max-content auto; gap: 4px 16px; }
+dt { font-weight: bold; }
+.pass { color: #1a7f37; } .warning { color: #9a6700; } .fail { color: #cf222e; font-weight: bold; }
+</style>
+</head>
+<body>
+<h1>Inspektionsrapport</h1>
+<dl>
+<dt>Installation</dt><dd>$installation_id</dd>
+<dt>Adresse</dt><dd>$address</dd>
+<dt>Kunde</dt><dd>$customer_name</dd>
+<dt>Installationsdato</dt><dd>$installation_date</dd>
+<dt>Seneste eftersyn</dt><dd>$last_inspection</dd>
+<dt>Resultat</dt><dd>$summary</dd>
+</dl>
+<table>
+<thead><tr><th>Tidspunkt</th><th>Testtype</th><th>Værdi</th><th>Enhed</th><th>Status</th><th>Bemærkninger</th></tr></thead>
+<tbody>
+$rows
+</tbody>
+</table>
+</body>
+</html>
+""")
+
+_HTML_ROW = Template(
+    '<tr><td>$timestamp</td><td>$test_type</td><td>$value</td><td>$unit</td>'
+    '<td class="$status_class">$status</td><td>$notes</td></tr>'
+)
+
+def load_report_data(conn, installation_id: str) -> Optional[Tuple[tuple, List[tuple]]]:
+    """
+    Load an installation and its test results for a report.
+
+    Args:
+        conn: SQLite database connection
+        installation_id: ID of the installation
+
+    Returns:
+        Optional[Tuple[tuple, List[tuple]]]: The installation row (INSTALLATION_COLUMNS)
+        and its test results (TEST_RESULT_COLUMNS), None if the installation does not exist
+    """
+    installation = conn.execute(
+        f"SELECT {INSTALLATION_COLUMNS} FROM installations WHERE id = ?",
+        (installation_id,)
+    ).fetchone()
+    if installation is None:
+        return None
+    tests = conn.execute(
+        f"SELECT {TEST_RESULT_COLUMNS} FROM test_results WHERE installation_id = ? ORDER BY timestamp, id",
+        (installation_id,)
+    ).fetchall()
+    return installation, tests
+
+def report_hash(installation: Sequence[Any], tests: Iterable[Sequence[Any]]) -> str:
+    """
+    Hash everything that goes into a report.
+
+    Args:
+        installation: The installation row
+        tests: The test result rows
+
+    Returns:
+        str: Hex SHA-256; changes only when the data or the template version changes
+    """
+    digest = hashlib.sha256(f"v{TEMPLATE_VERSION}".encode("utf-8"))
+    digest.update(json.dumps(list(installation), default=str).encode("utf-8"))
+    for row in tests:
+        digest.update(json.dumps(list(row), default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+def _summary(tests: Sequence[Sequence[Any]]) -> str:
+    counts = {}
+    for row in tests:
+        counts[row[5]] = counts.get(row[5], 0) + 1
+    if not tests:
+        return "Ingen målinger"
+    parts = [f"{counts[status]} {status.lower()}" for status in STATUS_CLASSES if status in counts]
+    return f"{len(tests)} målinger: " + ", ".join(parts)
+
+def _text(value: Any) -> str:
+    return "" if value is None else str(value)
+
+def _format_value(value: Any) -> str:
+    if isinstance(value, float):
+        return f"{value:.4g}"
+    return _text(value)
+
+def _format_timestamp(value: Optional[str]) -> str:
+    # ISO-tidsstempler vises uden sekundbrøk og med mellemrum i stedet for "T"
+    return _text(value)[:19].replace("T", " ")
+
+def render_html(installation: Sequence[Any], tests: Sequence[Sequence[Any]]) -> bytes:
+    """
+    Render the report as HTML.
+
+    Returns:
+        bytes: UTF-8 encoded HTML
+    """
+    rows = "\n".join(
+        _HTML_ROW.substitute(
+            timestamp=html.escape(_format_timestamp(row[6])),
+            test_type=html.escape(_text(row[2])),
+            value=html.escape(_format_value(row[3])),
+            unit=html.escape(_text(row[4])),
+            status=html.escape(_text(row[5])),
+            status_class=STATUS_CLASSES.get(row[5], ""),
+            notes=html.escape(_text(row[7])),
+        )
+        for row in tests
+    )
+    page = _HTML_PAGE.substitute(
+        installation_id=html.escape(_text(installation[0])),
+        address=html.escape(_text(installation[1])),
+        customer_name=html.escape(_text(installation[2])),
+        installation_date=html.escape(_format_timestamp(installation[3])),
+        last_inspection=html.escape(_format_timestamp(installation[4])),
+        summary=html.escape(_summary(tests)),
+        rows=rows,
+    )
+    return page.encode("utf-8")
+
+# A4 i punkter og layout for PDF-rapporten
+_PAGE_WIDTH, _PAGE_HEIGHT = 595, 842
+_MARGIN = 50
+_LINE_HEIGHT = 13
+_TABLE_COLUMNS = (
+    ("Tidspunkt", 0, 19),
+    ("Testtype", 95, 20),
+    ("Værdi", 200, 10),
+    ("Enhed", 250, 6),
+    ("Status", 285, 14),
+    ("Bemærkninger", 360, 34),
+)
+
+# Tegn uden for WinAnsi (cp1252), som ellers ikke kan vises med standardskrifterne
+_PDF_REPLACEMENTS = str.maketrans({"Ω": "Ohm", "Δ": "D", "≤": "<=", "≥": ">="})
+
+def _pdf_string(text: str) -> bytes:
+    raw = text.translate(_PDF_REPLACEMENTS).encode("cp1252", errors="replace")
+    return b"(" + raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+def _pdf_text(x: float, y: float, text: str, font: str = "F1", size: int = 9) -> bytes:
+    return b"BT /%s %d Tf %.1f %.1f Td %s Tj ET\n" % (font.encode("ascii"), size, x, y, _pdf_string(text))
+
+def _clip(text: str, width: int) -> str:
+    return text if len(text) <= width else text[:width - 1] + "…"
+
+def render_pdf(installation: Sequence[Any], tests: Sequence[Sequence[Any]]) -> bytes:
+    """
+    Render the report as PDF.
+
+    The PDF is written directly without external libraries: text in the
+    built-in Helvetica fonts, compressed page streams and one table that
+    continues across pages.
+
+    Returns:
+        bytes: The PDF document
+    """
+    pages: List[bytes] = []
+    content = bytearray()
+    y = _PAGE_HEIGHT - _MARGIN
+
+    content += _pdf_text(_MARGIN, y, "Inspektionsrapport", "F2", 16)
+    y -= 2 * _LINE_HEIGHT
+    for label, value in (
+        ("Installation", _text(installation[0])),
+        ("Adresse", _text(installation[1])),
+        ("Kunde", _text(installation[2])),
+        ("Installationsdato", _format_timestamp(installation[3])),
+        ("Seneste eftersyn", _format_timestamp(installation[4])),
+        ("Resultat", _summary(tests)),
+    ):
+        content += _pdf_text(_MARGIN, y, label, "F2")
+        content += _pdf_text(_MARGIN + 100, y, value)
+        y -= _LINE_HEIGHT
+    y -= _LINE_HEIGHT
+
+    def table_header():
+        nonlocal y
+        for title, offset, _ in _TABLE_COLUMNS:
+            content.extend(_pdf_text(_MARGIN + offset, y, title, "F2"))
+        y -= _LINE_HEIGHT
+
+    table_header()
+    for row in tests:
+        if y < _MARGIN:
+            pages.append(bytes(content))
+            content.clear()
+            y = _PAGE_HEIGHT - _MARGIN
+            table_header()
+        values = (
+            _format_timestamp(row[6]), _text(row[2]), _format_value(row[3]),
+            _text(row[4]), _text(row[5]), _text(row[7]),
+        )
+        for (_, offset, width), value in zip(_TABLE_COLUMNS, values):
+            content += _pdf_text(_MARGIN + offset, y, _clip(value, width), "F2" if value == "Ikke godkendt" else "F1")
+        y -= _LINE_HEIGHT
+    pages.append(bytes(content))
+
+    # Objekter: 1 katalog, 2 sidetræ, 3-4 skrifter, derefter side + indhold pr. side
+    objects: List[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+    ]
+    page_ids = []
+    for page in pages:
+        stream = zlib.compress(page)
+        page_id = len(objects) + 1
+        page_ids.append(page_id)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>"
+            % (_PAGE_WIDTH, _PAGE_HEIGHT, page_id + 1)
+        )
+        objects.append(
+            b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream) + stream + b"\nendstream"
+        )
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % page_id for page_id in page_ids), len(page_ids)
+    )
+
+    output = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(output)
+
+_RENDERERS = {
+    "html": render_html,
+    "pdf": render_pdf,
+}
+
+def _write_atomic(path: str, data: bytes):
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as target:
+            target.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def report_path(cache_dir: str, installation_id: str, content_hash: str, report_format: str) -> str:
+    """
+    Path of a cached report: <cache_dir>/<installation>/<hash>.<format>.
+    The folder is named after a hash of the installation ID, so the ID does
+    not have to be a valid file name.
+    """
+    directory = hashlib.sha256(installation_id.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, directory, f"{content_hash}.{report_format}")
+
+def _remove_stale(path: str, report_format: str, grace: float):
+    """Delete the installation's older reports in the same format that were not used within grace seconds."""
+    directory, current = os.path.split(path)
+    cutoff = time.time() - grace
+    for name in os.listdir(directory):
+        if name == current or not name.endswith(f".{report_format}"):
+            continue
+        stale = os.path.join(directory, name)
+        try:
+            # En fil der lige er udleveret til en FileResponse har fået ny mtime ved
+            # cache-hittet, så den slettes ikke før svaret har nået at åbne den
+            if os.stat(stale).st_mtime < cutoff:
+                os.remove(stale)
+        except FileNotFoundError:
+            pass
+
+def render_report_file(installation: Sequence[Any], tests: Sequence[Sequence[Any]],
+                       report_format: str, cache_dir: str) -> Tuple[str, bool]:
+    """
+    Return a cached report or render it from rows that are already loaded.
+
+    The report is stored under report_path with a hash covering the
+    installation, all its test results and the template version, so an
+    unchanged installation is never rendered twice. A cache hit refreshes the
+    file's modification time. When a new version is written, older versions
+    not used within STALE_REPORT_GRACE_SECONDS are deleted; a request that was
+    just handed one of them can still open it.
+
+    Args:
+        installation: The installation row from load_report_data
+        tests: The test results from load_report_data
+        report_format: "html" or "pdf"
+        cache_dir: Folder for rendered reports
+
+    Returns:
+        Tuple[str, bool]: Path of the report and whether it came from the cache
+
+    Raises:
+        ValueError: If the format is unknown
+    """
+    if report_format not in _RENDERERS:
+        raise ValueError(f"Unknown report format: {report_format}")
+
+    path = report_path(cache_dir, installation[0], report_hash(installation, tests), report_format)
+    try:
+        # Markér filen som brugt, så _remove_stale ikke sletter den under en anden forespørgsel
+        os.utime(path)
+        return path, True
+    except FileNotFoundError:
+        pass
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    _write_atomic(path, _RENDERERS[report_format](installation, tests))
+    _remove_stale(path, report_format, STALE_REPORT_GRACE_SECONDS)
+    return path, False
+
+def render_report(conn, installation_id: str, report_format: str, cache_dir: str) -> Optional[Tuple[str, bool]]:
+    """
+    Load the rows of an installation and return its cached or freshly rendered report.
+
+    Args:
+        conn: SQLite database connection
+        installation_id: ID of the installation
+        report_format: "html" or "pdf"
+        cache_dir: Folder for rendered reports
+
+    Returns:
+        Optional[Tuple[str, bool]]: Path of the report and whether it came from the cache,
+        None if the installation does not exist
+
+    Raises:
+        ValueError: If the format is unknown
+    """
+    if report_format not in _RENDERERS:
+        raise ValueError(f"Unknown report format: {report_format}")
+
+    data = load_report_data(conn, installation_id)
+    if data is None:
+        return None
+    installation, tests = data
+    return render_report_file(installation, tests, report_format, cache_dir)
+
+# Hver proces i puljen har sin egen forbindelse
+_worker_conn = None
+
+def _init_worker(db_path: str):
+    global _worker_conn
+    _worker_conn = sqlite3.connect(db_path)
+
+def _render_chunk(installation_ids: Sequence[str], formats: Sequence[str], cache_dir: str) -> Dict[str, int]:
+    counts = {"rendered": 0, "cached": 0, "missing": 0}
+    for installation_id in installation_ids:
+        for report_format in formats:
+            result = render_report(_worker_conn, installation_id, report_format, cache_dir)
+            if result is None:
+                counts["missing"] += 1
+                break
+            counts["cached" if result[1] else "rendered"] += 1
+    return counts
+
+def generate_reports(db_path: str, installation_ids: Sequence[str], formats: Sequence[str],
+                     cache_dir: str, workers: int = 4, chunk_size: int = 50) -> Dict[str, int]:
+    """
+    Render reports for many installations spread over a process pool.
+
+    Args:
+        db_path: Path to the database; each process opens its own connection
+        installation_ids: Installations to render reports for
+        formats: Formats ("html" and/or "pdf")
+        cache_dir: Folder for rendered reports
+        workers: Number of processes
+        chunk_size: Installations per task in the pool
+
+    Returns:
+        Dict[str, int]: Number of rendered, cached and missing reports
+    """
+    for report_format in formats:
+        if report_format not in _RENDERERS:
+            raise ValueError(f"Unknown report format: {report_format}")
+
+    totals = {"rendered": 0, "cached": 0, "missing": 0}
+    chunks = [installation_ids[i:i + chunk_size] for i in range(0, len(installation_ids), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(db_path,)) as executor:
+        futures = [executor.submit(_render_chunk, chunk, formats, cache_dir) for chunk in chunks]
+        for done, future in enumerate(as_completed(futures), start=1):
+            for key, count in future.result().items():
+                totals[key] += count
+            logging.info(f"{done}/{len(chunks)} bidder færdige: {totals}")
+    return totals
+
+def main():
+    """
+    Command line: render reports for the given installations, or all of them.
+    """
+    from config import DB_PATH, LOG_FORMAT, REPORT_CACHE_DIR, REPORT_WORKERS
+
+    parser = argparse.ArgumentParser(description="Generér inspektionsrapporter")
+    parser.add_argument("installation_ids", nargs="*", help="Installationer (standard: alle)")
+    parser.add_argument("--db", default=DB_PATH, help="Sti til databasen")
+    parser.add_argument("--format", dest="formats", action="append", choices=sorted(_RENDERERS),
+                        help="Format, kan gentages (standard: html og pdf)")
+    parser.add_argument("--out", default=REPORT_CACHE_DIR, help="Mappe til rapporterne")
+    parser.add_argument("--workers", type=int, default=REPORT_WORKERS, help="Antal processer")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+    installation_ids = args.installation_ids
+    if not installation_ids:
+        conn = sqlite3.connect(args.db)
+        try:
+            installation_ids = [row[0] for row in conn.execute("SELECT id FROM installations ORDER BY id")]
+        finally:
+            conn.close()
+
+    result = generate_reports(args.db, installation_ids, args.formats or sorted(_RENDERERS), args.out, args.workers)
+    logging.info(
+        f"Rapporter færdige: {result['rendered']} genereret, {result['cached']} uændrede, "
+        f"{result['missing']} installationer ikke fundet"
+    )
+
+if __name__ == "__main__":
+    main()
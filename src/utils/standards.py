@@ -0,0 +1,299 @@
+import hashlib
+import re
+from bisect import bisect_left
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, FrozenSet, Mapping, NamedTuple, Optional, Tuple
+
+from src.models import TestType
+
+class Limit(NamedTuple):
+    """
+    Grænseværdi for én kombination af testtype og testbetingelser.
+
+    For "max" er værdier <= pass_limit godkendt og <= warn_limit en advarsel.
+    For "min" er værdier >= pass_limit godkendt og >= warn_limit en advarsel.
+    Alt andet er ikke godkendt.
+    """
+    direction: str
+    pass_limit: float
+    warn_limit: float
+
+# Standardbetingelser når målingen ikke angiver andet
+DEFAULT_RATED_CURRENT_MA = 30.0
+DEFAULT_RCD_TYPE = "A"
+DEFAULT_CIRCUIT_VOLTAGE = 230.0
+
+RCD_RATED_CURRENTS_MA = (10.0, 30.0, 100.0, 300.0, 500.0)
+RCD_TYPES = ("AC", "A", "F", "B", "S")
+
+# Øvre grænse (inklusiv) for hvert spændingsbånd i tabel 6A:
+# bånd 0 = SELV/PELV, bånd 1 = op til 500 V, bånd 2 = over 500 V
+VOLTAGE_BANDS = (50.0, 500.0)
+
+# Hvilke betingelser grænseværdien afhænger af for hver testtype
+_DIMENSIONS: Dict[str, Tuple[str, ...]] = {
+    TestType.RCD.value: ("rated_current", "rcd_type"),
+    TestType.ISOLATION.value: ("voltage_band",),
+    TestType.CONTINUITY.value: (),
+    TestType.EARTHING.value: ("rated_current",),
+    TestType.SHORT_CIRCUIT.value: (),
+}
+
+TEST_TYPES = frozenset(_DIMENSIONS)
+
+# Faktor fra hver kendt enhed til den enhed grænseværdierne i tabellen er angivet i
+UNIT_FACTORS: Mapping[str, Mapping[str, float]] = MappingProxyType({
+    TestType.RCD.value: MappingProxyType({"ms": 1.0, "s": 1000.0}),
+    TestType.ISOLATION.value: MappingProxyType({"kΩ": 0.001, "MΩ": 1.0, "GΩ": 1000.0}),
+    TestType.CONTINUITY.value: MappingProxyType({"mΩ": 0.001, "Ω": 1.0}),
+    TestType.EARTHING.value: MappingProxyType({"mΩ": 0.001, "Ω": 1.0, "kΩ": 1000.0}),
+    TestType.SHORT_CIRCUIT.value: MappingProxyType({"A": 1.0, "kA": 1000.0}),
+})
+
+_OHM = re.compile(r"\s*(ohm|Ω)\s*$", re.IGNORECASE)
+
+@lru_cache(maxsize=256)
+def canonical_unit(unit: Optional[str]) -> Optional[str]:
+    """
+    Skriver en enhed på standardform, f.eks. "MOhm", "M ohm" og "MΩ" (ohm-tegnet U+2126) som "MΩ".
+
+    Præfikset bevarer store/små bogstaver, da mΩ og MΩ er forskellige enheder.
+
+    Args:
+        unit: Enheden som angivet på målingen
+
+    Returns:
+        Optional[str]: Enheden på standardform, None hvis den mangler
+    """
+    if unit is None:
+        return None
+    unit = unit.strip().replace("\u2126", "Ω")
+    return _OHM.sub("Ω", unit).replace(" ", "")
+
+def unit_factor(test_type: str, unit: Optional[str]) -> Optional[float]:
+    """
+    Finder faktoren, som en måleværdi i unit skal ganges med for at kunne
+    sammenlignes med grænseværdierne for testtypen.
+
+    Args:
+        test_type: Testtypen (TestType værdi)
+        unit: Målingens enhed
+
+    Returns:
+        Optional[float]: Faktoren, None hvis testtypen eller enheden er ukendt
+    """
+    factors = UNIT_FACTORS.get(test_type)
+    if factors is None:
+        return None
+    return factors.get(canonical_unit(unit))
+
+def voltage_band(circuit_voltage: float) -> int:
+    """
+    Finder spændingsbåndet for en kreds' nominelle spænding.
+
+    Args:
+        circuit_voltage: Kredsens nominelle spænding i V
+
+    Returns:
+        int: Index i VOLTAGE_BANDS (len(VOLTAGE_BANDS) for over 500 V)
+    """
+    return bisect_left(VOLTAGE_BANDS, circuit_voltage)
+
+def _rules():
+    """
+    Grænseværdier iht. DS/HD 60364-6 som (testtype, mærkestrøm, RCD-type, spændingsbånd, grænse).
+    Betingelser testtypen ikke afhænger af er None.
+    """
+    for rated_current in RCD_RATED_CURRENTS_MA:
+        for rcd_type in RCD_TYPES:
+            if rcd_type == "S":
+                # Selektive RCD'er er forsinkede og må bruge op til 500 ms ved IΔn
+                limit = Limit("max", 500.0, 500.0)
+            else:
+                # Udløsningstid i ms ved IΔn, med tolerance op til 400 ms
+                limit = Limit("max", 300.0, 400.0)
+            yield TestType.RCD.value, rated_current, rcd_type, None, limit
+
+        # Jordelektrodemodstand i Ω: RA x IΔn <= 50 V, og over 200 Ω regnes som ustabil
+        max_resistance = float(int(50.0 * 1000.0 / rated_current))
+        yield TestType.EARTHING.value, rated_current, None, None, Limit(
+            "max", min(200.0, max_resistance), max_resistance
+        )
+
+    # Isolationsmodstand i MΩ (tabel 6A): SELV/PELV 0,5 MΩ ved 250 V DC, ellers 1,0 MΩ
+    yield TestType.ISOLATION.value, None, None, 0, Limit("min", 0.5, 0.5)
+    yield TestType.ISOLATION.value, None, None, 1, Limit("min", 1.0, 1.0)
+    yield TestType.ISOLATION.value, None, None, 2, Limit("min", 1.0, 1.0)
+
+    # Beskyttelsesledernes kontinuitet i Ω
+    yield TestType.CONTINUITY.value, None, None, None, Limit("max", 0.5, 1.0)
+
+    # Kortslutningsstrøm i A: mindst 5 x In for en B16 automatsikring
+    yield TestType.SHORT_CIRCUIT.value, None, None, None, Limit("min", 80.0, 80.0)
+
+def _compile() -> Mapping[Tuple, Limit]:
+    table = {}
+    for test_type, rated_current, rcd_type, band, limit in _rules():
+        table[(test_type, rated_current, rcd_type, band)] = limit
+    return MappingProxyType(table)
+
+# Opbygges én gang ved import og deles af API'et og batch-valideringen
+LIMIT_TABLE = _compile()
+
+def _rule_key(test_type: str, rated_current_ma: float, rcd_type: str,
+              circuit_voltage: float) -> Optional[Tuple]:
+    dimensions = _DIMENSIONS.get(test_type)
+    if dimensions is None:
+        return None
+    return (
+        test_type,
+        float(rated_current_ma) if "rated_current" in dimensions else None,
+        rcd_type.upper() if "rcd_type" in dimensions else None,
+        voltage_band(circuit_voltage) if "voltage_band" in dimensions else None,
+    )
+
+def lookup(test_type: str, rated_current_ma: float = DEFAULT_RATED_CURRENT_MA,
+           rcd_type: str = DEFAULT_RCD_TYPE,
+           circuit_voltage: float = DEFAULT_CIRCUIT_VOLTAGE) -> Optional[Limit]:
+    """
+    Slår grænseværdien op for en testtype under givne testbetingelser.
+
+    Args:
+        test_type: Testtypen (TestType værdi)
+        rated_current_ma: RCD-mærkestrøm i mA
+        rcd_type: RCD-type (AC, A, F, B eller S)
+        circuit_voltage: Kredsens nominelle spænding i V
+
+    Returns:
+        Optional[Limit]: Grænseværdien, None hvis testtypen er ukendt eller
+        kombinationen af betingelser ikke er dækket af tabellen
+    """
+    key = _rule_key(test_type, rated_current_ma, rcd_type, circuit_voltage)
+    return None if key is None else LIMIT_TABLE.get(key)
+
+def _fingerprint(*parts) -> str:
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:12]
+
+def _compile_versions():
+    # Versionen afhænger også af enheden og dens omregning, så rækker bedømt
+    # før omregningen blev ændret bliver genberegnet
+    rule_versions = {
+        (key, unit): _fingerprint(key, limit, unit, factor)
+        for key, limit in LIMIT_TABLE.items()
+        for unit, factor in UNIT_FACTORS[key[0]].items()
+    }
+    # Målinger uden en regel i tabellen (f.eks. en ukendt mærkestrøm) får en version,
+    # der skifter hvis der tilføjes regler for testtypen, så de bliver genberegnet
+    fallback_versions = {
+        (test_type, unit): _fingerprint(
+            test_type, sorted(repr(key) for key in LIMIT_TABLE if key[0] == test_type), unit, factor
+        )
+        for test_type in TEST_TYPES
+        for unit, factor in UNIT_FACTORS[test_type].items()
+    }
+    # Målinger med en ukendt enhed bedømmes ikke, men genberegnes hvis der tilføjes enheder
+    unknown_unit_versions = {
+        test_type: _fingerprint(test_type, sorted(UNIT_FACTORS[test_type].items()))
+        for test_type in TEST_TYPES
+    }
+    unknown_version = _fingerprint(None, sorted(TEST_TYPES))
+    return (MappingProxyType(rule_versions), MappingProxyType(fallback_versions),
+            MappingProxyType(unknown_unit_versions), unknown_version)
+
+RULE_VERSIONS, _FALLBACK_VERSIONS, _UNKNOWN_UNIT_VERSIONS, _UNKNOWN_VERSION = _compile_versions()
+
+# Alle versioner der svarer til den nuværende tabel
+CURRENT_RULE_VERSIONS: FrozenSet[str] = frozenset(
+    [*RULE_VERSIONS.values(), *_FALLBACK_VERSIONS.values(), *_UNKNOWN_UNIT_VERSIONS.values(), _UNKNOWN_VERSION]
+)
+
+# Samlet version for hele tabellen, vises i status
+RULESET_VERSION = _fingerprint(sorted(CURRENT_RULE_VERSIONS))
+
+# Status sat manuelt gennem API'et; disse rækker genberegnes aldrig
+MANUAL_RULE_VERSION = "manual"
+
+def rule_version(test_type: str, unit: Optional[str],
+                 rated_current_ma: float = DEFAULT_RATED_CURRENT_MA,
+                 rcd_type: str = DEFAULT_RCD_TYPE,
+                 circuit_voltage: float = DEFAULT_CIRCUIT_VOLTAGE) -> str:
+    """
+    Finder versionen af den regel, som en måling med givne betingelser bedømmes efter.
+
+    Versionen er et fingeraftryk af reglens nøgle, grænseværdier og enhedens
+    omregning, så den ændrer sig kun når netop den regel ændres.
+
+    Args:
+        test_type: Testtypen (TestType værdi)
+        unit: Målingens enhed
+
+    Returns:
+        str: Regelversionen
+    """
+    key = _rule_key(test_type, rated_current_ma, rcd_type, circuit_voltage)
+    if key is None:
+        return _UNKNOWN_VERSION
+    unit = canonical_unit(unit)
+    if unit not in UNIT_FACTORS[test_type]:
+        return _UNKNOWN_UNIT_VERSIONS[test_type]
+    version = RULE_VERSIONS.get((key, unit))
+    return version if version is not None else _FALLBACK_VERSIONS[(test_type, unit)]
+
+_RATED_CURRENT = re.compile(r"(\d+(?:[.,]\d+)?)\s*mA")
+_RCD_TYPE = re.compile(r"\btype\s*(AC|A|F|B|S)\b", re.IGNORECASE)
+_EXTRA_LOW_VOLTAGE = re.compile(r"\b(SELV|PELV)\b", re.IGNORECASE)
+
+@lru_cache(maxsize=4096)
+def parse_conditions(notes: Optional[str]) -> Tuple[float, str, float]:
+    """
+    Finder testbetingelserne i bemærkningerne, f.eks. "30 mA Type A" eller "SELV".
+
+    Resultatet caches pr. tekst, da de samme bemærkninger går igen på mange målinger.
+
+    Args:
+        notes: Bemærkninger til testen
+
+    Returns:
+        Tuple[float, str, float]: Mærkestrøm i mA, RCD-type og kredsspænding i V
+    """
+    rated_current = DEFAULT_RATED_CURRENT_MA
+    rcd_type = DEFAULT_RCD_TYPE
+    circuit_voltage = DEFAULT_CIRCUIT_VOLTAGE
+    if notes:
+        match = _RATED_CURRENT.search(notes)
+        if match:
+            rated_current = float(match.group(1).replace(",", "."))
+        match = _RCD_TYPE.search(notes)
+        if match:
+            rcd_type = match.group(1).upper()
+        if _EXTRA_LOW_VOLTAGE.search(notes):
+            circuit_voltage = VOLTAGE_BANDS[0]
+    return rated_current, rcd_type, circuit_voltage
+
+def lookup_for_notes(test_type: str, notes: Optional[str]) -> Optional[Limit]:
+    """
+    Slår grænseværdien op ud fra testbetingelserne angivet i bemærkningerne.
+
+    Args:
+        test_type: Testtypen (TestType værdi)
+        notes: Bemærkninger til testen
+
+    Returns:
+        Optional[Limit]: Grænseværdien, None hvis den ikke findes
+    """
+    return lookup(test_type, *parse_conditions(notes))
+
+def rule_version_for_notes(test_type: str, unit: Optional[str], notes: Optional[str]) -> str:
+    """
+    Finder regelversionen ud fra testbetingelserne angivet i bemærkningerne.
+
+    Args:
+        test_type: Testtypen (TestType værdi)
+        unit: Målingens enhed
+        notes: Bemærkninger til testen
+
+    Returns:
+        str: Regelversionen
+    """
+    return rule_version(test_type, unit, *parse_conditions(notes))
@@ -0,0 +1,499 @@
+import argparse
+import logging
+import sqlite3
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.data.writer import GroupCommitWriter
+from src.models import TestStatus
+from src.utils.standards import (
+    CURRENT_RULE_VERSIONS, Limit, MANUAL_RULE_VERSION, RULESET_VERSION, TEST_TYPES, lookup_for_notes,
+    rule_version_for_notes, unit_factor
+)
+
+# Statuskoder brugt i de vektoriserede beregninger
+PASS, WARNING, FAIL, UNKNOWN = 0, 1, 2, -1
+STATUS_BY_CODE = {
+    PASS: TestStatus.PASS,
+    WARNING: TestStatus.WARNING,
+    FAIL: TestStatus.FAIL,
+}
+
+def grade_rows(test_types: Sequence[str], values: Sequence[float], units: Sequence[Optional[str]],
+               notes: Sequence[Optional[str]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Klassificerer målinger af blandede testtyper og finder regelversionen for hver.
+
+    Grænseværdien og enhedens omregning slås op i standards.LIMIT_TABLE og
+    standards.UNIT_FACTORS én gang pr. forskellig kombination af testtype,
+    enhed og bemærkning, og sammenligningen med måleværdierne sker derefter
+    vektoriseret for alle rækker på én gang.
+
+    Args:
+        test_types: Testtype for hver måling
+        values: Måleværdi for hver måling
+        units: Enhed for hver måling
+        notes: Bemærkninger for hver måling
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Statuskode (UNKNOWN for ukendte testtyper
+        og enheder) og regelversion for hver måling
+    """
+    values = np.asarray(values, dtype=np.float64)
+
+    # Hver forskellig (testtype, enhed, bemærkning) får et index i listen af grænser
+    keys: Dict[tuple, int] = {}
+    row_keys = np.fromiter(
+        (keys.setdefault(key, len(keys)) for key in zip(test_types, units, notes)),
+        dtype=np.intp, count=len(values)
+    )
+
+    # Retning pr. kombination: 1 = max, 2 = min, 0 = ingen grænse (FAIL),
+    # UNKNOWN = ukendt testtype eller enhed
+    directions = np.zeros(len(keys), dtype=np.int8)
+    factors = np.ones(len(keys))
+    pass_limits = np.full(len(keys), np.nan)
+    warn_limits = np.full(len(keys), np.nan)
+    versions = np.empty(len(keys), dtype=object)
+    unknown_units = set()
+    for index, (test_type, unit, note) in enumerate(keys):
+        versions[index] = rule_version_for_notes(test_type, unit, note)
+        if test_type not in TEST_TYPES:
+            directions[index] = UNKNOWN
+            continue
+        factor = unit_factor(test_type, unit)
+        if factor is None:
+            directions[index] = UNKNOWN
+            unknown_units.add((test_type, unit))
+            continue
+        factors[index] = factor
+        limit = lookup_for_notes(test_type, note)
+        if limit is not None:
+            directions[index] = 1 if limit.direction == "max" else 2
+            pass_limits[index] = limit.pass_limit
+            warn_limits[index] = limit.warn_limit
+    for test_type, unit in sorted(unknown_units, key=repr):
+        logging.warning(f"Ukendt enhed '{unit}' for testtype {test_type}; målingerne bedømmes ikke")
+
+    direction = directions[row_keys]
+    pass_limit = pass_limits[row_keys]
+    warn_limit = warn_limits[row_keys]
+    # Værdierne omregnes til tabellens enhed før sammenligningen
+    values = values * factors[row_keys]
+
+    codes = np.full(values.shape, FAIL, dtype=np.int8)
+    upper = direction == 1
+    lower = direction == 2
+    codes[upper & (values <= warn_limit)] = WARNING
+    codes[upper & (values <= pass_limit)] = PASS
+    codes[lower & (values >= warn_limit)] = WARNING
+    codes[lower & (values >= pass_limit)] = PASS
+    codes[direction == UNKNOWN] = UNKNOWN
+
+    return codes, versions[row_keys]
+
+def classify_rows(test_types: Sequence[str], values: Sequence[float], units: Sequence[Optional[str]],
+                  notes: Sequence[Optional[str]]) -> np.ndarray:
+    """
+    Klassificerer målinger af blandede testtyper.
+
+    Returns:
+        np.ndarray: Statuskode for hver måling (UNKNOWN for ukendte testtyper og enheder)
+    """
+    return grade_rows(test_types, values, units, notes)[0]
+
+def grade_value(limit: Limit, value: float) -> int:
+    """
+    Sammenligner en enkelt måleværdi med en grænseværdi.
+
+    Returns:
+        int: PASS, WARNING eller FAIL
+    """
+    if limit.direction == "max":
+        if value <= limit.pass_limit:
+            return PASS
+        if value <= limit.warn_limit:
+            return WARNING
+    else:
+        if value >= limit.pass_limit:
+            return PASS
+        if value >= limit.warn_limit:
+            return WARNING
+    return FAIL
+
+def grade(test_type: str, value: float, unit: Optional[str],
+          notes: Optional[str] = None) -> Optional[TestStatus]:
+    """
+    Klassificerer en enkelt måling.
+
+    Returns:
+        Optional[TestStatus]: Status, None for ukendte testtyper og enheder
+    """
+    if test_type not in TEST_TYPES:
+        return None
+    factor = unit_factor(test_type, unit)
+    if factor is None:
+        return None
+    limit = lookup_for_notes(test_type, notes)
+    if limit is None:
+        return TestStatus.FAIL
+    return STATUS_BY_CODE[grade_value(limit, value * factor)]
+
+_STATUS_VALUES = np.array([STATUS_BY_CODE[code].value for code in (PASS, WARNING, FAIL)], dtype=object)
+
+def _status_values(codes: np.ndarray) -> np.ndarray:
+    """Statusværdier til databasen, None for ukendte testtyper og enheder."""
+    statuses = np.full(codes.shape, None, dtype=object)
+    known = codes != UNKNOWN
+    statuses[known] = _STATUS_VALUES[codes[known]]
+    return statuses
+
+def grade_chunk(test_types: Sequence[str], values: Sequence[float], units: Sequence[Optional[str]],
+                notes: Sequence[Optional[str]]) -> Tuple[List[Optional[str]], List[str]]:
+    """
+    Bedømmer en bid rækker; kan køres i en ProcessPoolExecutor.
+
+    Returns:
+        Tuple[List[Optional[str]], List[str]]: Status (None for ukendte testtyper
+        og enheder) og regelversion for hver række
+    """
+    codes, versions = grade_rows(test_types, values, units, notes)
+    return _status_values(codes).tolist(), versions.tolist()
+
+def regrade_all(conn, chunk_size: int = 10000,
+                progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, int]:
+    """
+    Genberegner status for alle testresultater i tabellen.
+
+    Rækkerne læses i ID-orden i bidder, omregnes til tabellens enhed og
+    klassificeres vektoriseret, og kun ændrede rækker skrives tilbage med
+    executemany - én transaktion pr. bid. Manuelt satte statusser røres ikke,
+    og rækker med en ukendt enhed beholder deres status.
+
+    Args:
+        conn: SQLite database connection
+        chunk_size: Antal rækker pr. bid
+        progress: Kaldes med (behandlede rækker, ændrede rækker) efter hver bid
+
+    Returns:
+        Dict[str, int]: Antal behandlede og ændrede rækker
+    """
+    processed = 0
+    changed = 0
+    last_id = 0
+
+    while True:
+        rows = conn.execute(
+            """SELECT id, test_type, value, unit, notes, status, rule_version FROM test_results
+               WHERE id > ? AND rule_version IS NOT ? ORDER BY id LIMIT ?""",
+            (last_id, MANUAL_RULE_VERSION, chunk_size)
+        ).fetchall()
+        if not rows:
+            break
+
+        ids, test_types, values, units, notes, old_statuses, old_versions = zip(*rows)
+        codes, versions = grade_rows(test_types, values, units, notes)
+        statuses = _status_values(codes)
+
+        # Ukendte testtyper og enheder beholder deres status, men får en regelversion
+        new_statuses = np.where(codes != UNKNOWN, statuses, np.asarray(old_statuses, dtype=object))
+        update_mask = (
+            (new_statuses != np.asarray(old_statuses, dtype=object))
+            | (versions != np.asarray(old_versions, dtype=object))
+        )
+
+        updates = [
+            (status, version, row[0], MANUAL_RULE_VERSION, row[6], row[2], row[3], row[4])
+            for status, version, row in zip(
+                new_statuses[update_mask].tolist(),
+                versions[update_mask].tolist(),
+                (row for row, update in zip(rows, update_mask) if update)
+            )
+        ]
+        if updates:
+            with conn:
+                # Rækker der er ændret via PUT siden de blev læst (manuel status,
+                # ny værdi, enhed eller nye bemærkninger) overskrives ikke
+                changed += conn.executemany(
+                    """UPDATE test_results SET status = ?, rule_version = ?
+                       WHERE id = ? AND rule_version IS NOT ? AND rule_version IS ?
+                       AND value IS ? AND unit IS ? AND notes IS ?""",
+                    updates
+                ).rowcount
+
+        processed += len(rows)
+        last_id = ids[-1]
+        if progress:
+            progress(processed, changed)
+
+    return {"processed": processed, "changed": changed}
+
+def stale_rule_versions(conn) -> List[Optional[str]]:
+    """
+    Finder de regelversioner i test_results, som ikke længere svarer til grænseværdi-tabellen.
+
+    DISTINCT læses fra indekset på rule_version, så det kræver ikke en
+    gennemgang af selve tabellen.
+
+    Args:
+        conn: SQLite database connection
+
+    Returns:
+        List[Optional[str]]: Forældede versioner (None for rækker der aldrig er bedømt med version)
+    """
+    rows = conn.execute("SELECT DISTINCT rule_version FROM test_results").fetchall()
+    return [
+        version for (version,) in rows
+        if version not in CURRENT_RULE_VERSIONS and version != MANUAL_RULE_VERSION
+    ]
+
+def count_stale(conn, versions: Sequence[Optional[str]]) -> int:
+    """Tæller rækkerne med de givne regelversioner."""
+    return sum(
+        conn.execute("SELECT COUNT(*) FROM test_results WHERE rule_version IS ?", (version,)).fetchone()[0]
+        for version in versions
+    )
+
+def _stale_chunks(conn, versions: Sequence[Optional[str]], chunk_size: int) -> Iterator[list]:
+    for version in versions:
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                """SELECT id, test_type, value, unit, notes, status, rule_version FROM test_results
+                   WHERE rule_version IS ? AND id > ? ORDER BY id LIMIT ?""",
+                (version, last_id, chunk_size)
+            ).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            yield rows
+
+_WRITE_GRADE = """UPDATE test_results SET status = COALESCE(?, status), rule_version = ?
+    WHERE id = ? AND rule_version IS NOT ? AND rule_version IS ?
+    AND value IS ? AND unit IS ? AND notes IS ? AND status IS ?"""
+
+def _write_grades(conn, updates: Sequence[tuple]) -> int:
+    """
+    Skriver bedømte rækker tilbage
+    (status, version, id, manual, læst version, værdi, enhed, bemærkninger, læst status).
+
+    Returns:
+        int: Antal rækker hvis status faktisk blev ændret
+    """
+    # COALESCE: ukendte testtyper og enheder beholder deres status, men får en regelversion.
+    # Rækker der er ændret via PUT siden de blev læst (ny værdi, enhed, nye
+    # bemærkninger eller status) springes over; dem tager næste kørsel
+    status_changes = [update for update in updates if update[0] is not None and update[0] != update[-1]]
+    version_only = [update for update in updates if update[0] is None or update[0] == update[-1]]
+    changed = conn.executemany(_WRITE_GRADE, status_changes).rowcount if status_changes else 0
+    if version_only:
+        conn.executemany(_WRITE_GRADE, version_only)
+    return changed
+
+def regrade_stale(conn, executor: Optional[Executor] = None, chunk_size: int = 5000,
+                  max_pending: int = 4,
+                  progress: Optional[Callable[[int, int, int], None]] = None,
+                  writer: Optional[GroupCommitWriter] = None, write_batch: int = 500,
+                  stop: Optional[threading.Event] = None) -> Dict[str, int]:
+    """
+    Genberegner kun de testresultater, hvis regel er ændret siden de blev bedømt.
+
+    Forældede rækker findes via indekset på rule_version. Bidderne bedømmes i
+    executor (f.eks. en ProcessPoolExecutor), mens hovedtråden læser næste bid
+    og skriver de færdige tilbage - én transaktion pr. bid, eller med writer
+    i stykker af write_batch rækker gennem den fælles skrivetråd, så API'ets
+    skrivninger ikke venter på en stor transaktion.
+
+    Args:
+        conn: SQLite database connection (bruges kun til at læse, når writer er angivet)
+        executor: Executor til bedømmelsen, None for at bedømme i den kaldende tråd
+        chunk_size: Antal rækker pr. bid
+        max_pending: Antal bidder der højst bedømmes samtidig
+        progress: Kaldes med (behandlede rækker, ændrede statusser, forældede rækker i alt) efter hver bid
+        writer: Skrivetråd som ændringerne skrives gennem, None for at skrive på conn
+        write_batch: Antal rækker pr. skrivning gennem writer
+        stop: Når den sættes, stoppes efter den igangværende bid
+
+    Returns:
+        Dict[str, int]: Antal forældede, behandlede og ændrede rækker
+    """
+    versions = stale_rule_versions(conn)
+    total = count_stale(conn, versions)
+    processed = 0
+    changed = 0
+
+    def write(rows, graded):
+        nonlocal processed, changed
+        statuses, new_versions = graded
+        updates = [(status, version, row[0], MANUAL_RULE_VERSION, row[6], row[2], row[3], row[4], row[5])
+                   for status, version, row in zip(statuses, new_versions, rows)]
+        if writer is None:
+            with conn:
+                changed += _write_grades(conn, updates)
+        else:
+            # Én lille skrivning ad gangen, så API'ets skrivninger kommer imellem
+            for start in range(0, len(updates), write_batch):
+                changed += writer.submit(_write_grades, updates[start:start + write_batch]).result()
+        processed += len(rows)
+        if progress:
+            progress(processed, changed, total)
+
+    # Højst max_pending bidder er undervejs i executor ad gangen
+    pending = deque()
+    for rows in _stale_chunks(conn, versions, chunk_size):
+        if stop is not None and stop.is_set():
+            pending.clear()
+            break
+        _, test_types, values, units, notes, _, _ = zip(*rows)
+        if executor is None:
+            write(rows, grade_chunk(test_types, values, units, notes))
+            continue
+        pending.append((rows, executor.submit(grade_chunk, test_types, values, units, notes)))
+        if len(pending) >= max_pending:
+            done_rows, future = pending.popleft()
+            write(done_rows, future.result())
+
+    while pending:
+        done_rows, future = pending.popleft()
+        write(done_rows, future.result())
+
+    return {"stale": total, "processed": processed, "changed": changed}
+
+class RegradeJob:
+    """
+    Kører regrade_stale i en baggrundstråd med en procespulje og holder styr på fremdriften.
+    Der kører højst én genberegning ad gangen.
+    """
+
+    def __init__(self, workers: int = 2, chunk_size: int = 5000,
+                 writer: Optional[GroupCommitWriter] = None):
+        """
+        Args:
+            workers: Antal processer til bedømmelsen
+            chunk_size: Antal rækker pr. bid
+            writer: Skrivetråd som ændringerne skrives gennem, None for at skrive på den lånte forbindelse
+        """
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.writer = writer
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._state = {
+            "status": "idle",
+            "ruleset_version": RULESET_VERSION,
+            "stale": 0,
+            "processed": 0,
+            "changed": 0,
+            "started": None,
+            "finished": None,
+            "error": None,
+        }
+
+    def start(self, connection: Callable[[], ContextManager]) -> bool:
+        """
+        Starter en genberegning, hvis der ikke allerede kører en.
+
+        Args:
+            connection: Kaldes for at låne en forbindelse, f.eks. ConnectionPool.connection
+
+        Returns:
+            bool: True hvis jobbet blev startet, False hvis et andet job kører
+        """
+        with self._lock:
+            if self._state["status"] == "running":
+                return False
+            self._state.update(
+                status="running", stale=0, processed=0, changed=0,
+                started=datetime.now(), finished=None, error=None
+            )
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, args=(connection,), daemon=True)
+            self._thread.start()
+            return True
+
+    def state(self) -> Dict[str, Any]:
+        """Returnerer en kopi af jobbets tilstand."""
+        with self._lock:
+            return dict(self._state)
+
+    def wait(self, timeout: Optional[float] = None):
+        """Venter på at det kørende job bliver færdigt."""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stopper det kørende job efter den igangværende bid og venter på det."""
+        self._stop.set()
+        self.wait(timeout)
+
+    def _progress(self, processed: int, changed: int, total: int):
+        with self._lock:
+            self._state.update(processed=processed, changed=changed, stale=total)
+
+    def _run(self, connection):
+        try:
+            # spawn i stedet for fork, da processen allerede kører andre tråde
+            with ProcessPoolExecutor(max_workers=self.workers,
+                                     mp_context=multiprocessing.get_context("spawn")) as executor, \
+                    connection() as conn:
+                result = regrade_stale(
+                    conn, executor, self.chunk_size,
+                    max_pending=2 * self.workers, progress=self._progress,
+                    writer=self.writer, stop=self._stop
+                )
+            stopped = self._stop.is_set()
+            logging.info(
+                f"Genberegning {'stoppet' if stopped else 'færdig'}: "
+                f"{result['processed']} rækker, {result['changed']} ændret"
+            )
+            with self._lock:
+                self._state.update(status="stopped" if stopped else "done", finished=datetime.now(), **result)
+        except Exception as e:
+            logging.error(f"Genberegning fejlede: {e}")
+            with self._lock:
+                self._state.update(status="failed", finished=datetime.now(), error=str(e))
+
+def main():
+    """
+    Kommandolinje: genberegn status for testresultater bedømt efter forældede regler,
+    eller for hele test_results-tabellen med --all.
+    """
+    from config import DB_PATH, LOG_FORMAT, REGRADE_CHUNK_SIZE, REGRADE_WORKERS
+
+    parser = argparse.ArgumentParser(description="Genberegn status for testresultater")
+    parser.add_argument("--db", default=DB_PATH, help="Sti til databasen")
+    parser.add_argument("--chunk-size", type=int, default=REGRADE_CHUNK_SIZE, help="Rækker pr. transaktion")
+    parser.add_argument("--workers", type=int, default=REGRADE_WORKERS, help="Antal processer til bedømmelsen")
+    parser.add_argument("--all", action="store_true", help="Genberegn alle rækker, ikke kun forældede")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+    conn = sqlite3.connect(args.db)
+    try:
+        if args.all:
+            result = regrade_all(
+                conn, args.chunk_size,
+                progress=lambda processed, changed: logging.info(f"{processed} rækker behandlet, {changed} ændret")
+            )
+        else:
+            with ProcessPoolExecutor(max_workers=args.workers) as executor:
+                result = regrade_stale(
+                    conn, executor, args.chunk_size, max_pending=2 * args.workers,
+                    progress=lambda processed, changed, total: logging.info(
+                        f"{processed}/{total} forældede rækker behandlet, {changed} ændret"
+                    )
+                )
+        logging.info(f"Genberegning færdig: {result['processed']} rækker, {result['changed']} ændret")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import os
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+# Tilføj projektets rodmappe til Python's path, så vi kan importere fra src
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data import db as data
+from src.data.migrations import migrate
+from src.data.pool import DEFAULT_PRAGMAS
+from src.models import Installation, TestResult, TestStatus, TestType
+
+def connect(db_path: str) -> sqlite3.Connection:
+    """Open a connection with the same pragmas as the API."""
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    for name, value in DEFAULT_PRAGMAS.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
+@pytest.fixture
+def db_path(tmp_path) -> str:
+    """A migrated database file."""
+    path = str(tmp_path / "test.db")
+    conn = connect(path)
+    migrate(conn)
+    conn.close()
+    return path
+
+@pytest.fixture
+def conn(db_path):
+    conn = connect(db_path)
+    yield conn
+    conn.close()
+
+@pytest.fixture
+def add_installation(conn):
+    """Insert an installation and return its ID."""
+    def add(installation_id: str = "INST-1", address: str = "Vestergade 1, Aarhus",
+            customer_name: str = "Jensen El") -> str:
+        with conn:
+            data.save_installation(conn, Installation(installation_id, address, customer_name))
+        return installation_id
+    return add
+
+@pytest.fixture
+def add_test(conn):
+    """Insert a test result and return its ID."""
+    start = datetime(2025, 1, 1, 12, 0)
+    count = 0
+
+    def add(installation_id: str = "INST-1", test_type: TestType = TestType.RCD, value: float = 20.0,
+            unit: str = "ms", status: TestStatus = TestStatus.PASS, notes: str = None,
+            rule_version: str = None, timestamp: datetime = None) -> int:
+        nonlocal count
+        count += 1
+        test = TestResult(test_type, value, unit, status, notes=notes, rule_version=rule_version,
+                          timestamp=timestamp or start + timedelta(minutes=count))
+        with conn:
+            return data.save_test_result(conn, test, installation_id)
+    return add
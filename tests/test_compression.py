@@ -0,0 +1,75 @@
+import pytest
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import FileResponse, JSONResponse
+from fastapi.testclient import TestClient
+
+from api.middleware import CompressionMiddleware, choose_encoding
+
+ETAG = '"abc123"'
+ITEMS = [{"id": f"INST-{number}", "address": "Vestergade 1, Aarhus"} for number in range(200)]
+IMAGE = bytes(range(256)) * 64
+
+@pytest.fixture
+def client(tmp_path):
+    image_path = tmp_path / "billede.txt"
+    image_path.write_bytes(IMAGE)
+
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    @app.get("/items")
+    def items(request: Request):
+        if request.headers.get("if-none-match") == ETAG:
+            return Response(status_code=304, headers={"ETag": ETAG})
+        return JSONResponse(ITEMS, headers={"ETag": ETAG})
+
+    @app.get("/small")
+    def small():
+        return JSONResponse({"ok": True}, headers={"ETag": ETAG})
+
+    @app.get("/image")
+    def image():
+        return FileResponse(image_path, media_type="text/plain")
+
+    return TestClient(app)
+
+def test_choose_encoding():
+    assert choose_encoding("gzip, br", brotli_available=False) == "gzip"
+    assert choose_encoding("gzip;q=0.5, br", brotli_available=True) == "br"
+    assert choose_encoding("identity") is None
+    assert choose_encoding("*;q=0") is None
+
+def test_large_json_is_gzipped_with_encoded_etag(client):
+    response = client.get("/items", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == '"abc123-gzip"'
+    assert "accept-encoding" in response.headers["vary"].lower()
+    assert response.json() == ITEMS
+
+def test_small_response_is_not_compressed(client):
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == ETAG
+
+def test_conditional_get_with_encoded_etag_gives_304(client):
+    etag = client.get("/items", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+    response = client.get("/items", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert "content-encoding" not in response.headers
+
+def test_conditional_get_with_plain_etag_gives_304(client):
+    response = client.get("/items", headers={"Accept-Encoding": "identity", "If-None-Match": ETAG})
+    assert response.status_code == 304
+    assert response.headers["etag"] == ETAG
+
+def test_range_request_is_not_compressed(client):
+    full = client.get("/image", headers={"Accept-Encoding": "gzip"})
+    assert full.headers["content-encoding"] == "gzip"
+    assert full.content == IMAGE  # httpx pakker gzip ud
+
+    response = client.get("/image", headers={"Accept-Encoding": "gzip", "Range": "bytes=100-199"})
+    assert response.status_code == 206
+    assert "content-encoding" not in response.headers
+    assert response.content == IMAGE[100:200]
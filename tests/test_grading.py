@@ -0,0 +1,186 @@
+from concurrent.futures import Executor, Future
+
+import pytest
+
+from src import models
+from src.data.writer import GroupCommitWriter
+from src.tests import grade_test
+from src.utils import standards
+from src.utils.validators import (
+    UNKNOWN, STATUS_BY_CODE, grade, grade_rows, regrade_all, regrade_stale, stale_rule_versions
+)
+
+RCD = models.TestType.RCD.value
+ISOLATION = models.TestType.ISOLATION.value
+CONTINUITY = models.TestType.CONTINUITY.value
+EARTHING = models.TestType.EARTHING.value
+SHORT_CIRCUIT = models.TestType.SHORT_CIRCUIT.value
+PASS = models.TestStatus.PASS
+WARNING = models.TestStatus.WARNING
+FAIL = models.TestStatus.FAIL
+
+# Bedømmelse
+
+@pytest.mark.parametrize("test_type, value, unit, expected", [
+    (RCD, 25.0, "ms", PASS),
+    (RCD, 0.025, "s", PASS),
+    (RCD, 0.35, "s", WARNING),
+    (RCD, 0.5, "s", FAIL),
+    (ISOLATION, 0.3, "GΩ", PASS),
+    (ISOLATION, 500.0, "kΩ", FAIL),
+    (ISOLATION, 2.0, "MOhm", PASS),
+    (CONTINUITY, 300.0, "mΩ", PASS),
+    (CONTINUITY, 0.8, "ohm", WARNING),
+    (EARTHING, 0.5, "kΩ", WARNING),
+    (EARTHING, 2.0, "kΩ", FAIL),
+    (EARTHING, 150.0, "Ω", PASS),
+    (SHORT_CIRCUIT, 0.5, "kA", PASS),
+    (SHORT_CIRCUIT, 50.0, "A", FAIL),
+])
+def test_grade_converts_units(test_type, value, unit, expected):
+    assert grade(test_type, value, unit) == expected
+    assert grade_test(test_type, value, unit) == expected
+
+def test_grade_uses_conditions_in_notes():
+    assert grade(RCD, 450.0, "ms") == FAIL
+    assert grade(RCD, 450.0, "ms", "30 mA Type S") == PASS
+    assert grade(ISOLATION, 0.7, "MΩ") == FAIL
+    assert grade(ISOLATION, 0.7, "MΩ", "SELV-kreds") == PASS
+
+def test_unknown_unit_is_not_graded():
+    assert standards.unit_factor(RCD, "MΩ") is None
+    assert grade(RCD, 25.0, "MΩ") is None
+    assert grade_test(RCD, 25.0, "MΩ") is None
+    codes, _ = grade_rows([RCD], [25.0], ["MΩ"], [None])
+    assert codes.tolist() == [UNKNOWN]
+
+def test_unknown_test_type():
+    assert grade("Ukendt test", 1.0, "V") is None
+    assert grade_test("Ukendt test", 1.0, "V") == PASS
+
+def test_grade_rows_matches_grade():
+    rows = [
+        (RCD, 25.0, "ms", None),
+        (RCD, 0.45, "s", "30 mA Type S"),
+        (RCD, 350.0, "ms", "100 mA"),
+        (ISOLATION, 800.0, "kΩ", None),
+        (ISOLATION, 0.6, "MΩ", "PELV"),
+        (CONTINUITY, 900.0, "mΩ", None),
+        (EARTHING, 1.2, "kΩ", "300 mA"),
+        (EARTHING, 12.0, "Ω", "42 mA"),
+        (SHORT_CIRCUIT, 0.2, "kA", None),
+        (RCD, 25.0, "V", None),
+        ("Ukendt test", 1.0, "V", None),
+    ]
+    codes, versions = grade_rows(*zip(*rows))
+    for (test_type, value, unit, notes), code, version in zip(rows, codes.tolist(), versions.tolist()):
+        expected = grade(test_type, value, unit, notes)
+        assert STATUS_BY_CODE.get(code) == expected, (test_type, value, unit, notes)
+        assert version == standards.rule_version_for_notes(test_type, unit, notes)
+        assert version in standards.CURRENT_RULE_VERSIONS
+
+def test_rule_version_depends_on_unit():
+    assert standards.rule_version(RCD, "ms") != standards.rule_version(RCD, "s")
+    assert standards.rule_version(ISOLATION, "MOhm") == standards.rule_version(ISOLATION, "MΩ")
+    assert standards.rule_version(RCD, "V") in standards.CURRENT_RULE_VERSIONS
+    assert standards.MANUAL_RULE_VERSION not in standards.CURRENT_RULE_VERSIONS
+
+# Genberegning
+
+def rows_by_id(conn):
+    return {row[0]: row[1:] for row in conn.execute("SELECT id, status, rule_version FROM test_results")}
+
+@pytest.fixture
+def graded_rows(add_installation, add_test):
+    """Rows with a wrong or missing status and no rule version, one manual row and one with an unknown unit."""
+    add_installation()
+    return {
+        "pass": add_test(value=0.025, unit="s", status=FAIL),
+        "fail": add_test(value=600.0, unit="ms", status=PASS),
+        "unchanged": add_test(value=20.0, unit="ms", status=PASS),
+        "manual": add_test(value=600.0, unit="ms", status=PASS, rule_version=standards.MANUAL_RULE_VERSION),
+        "unknown_unit": add_test(value=20.0, unit="V", status=WARNING),
+    }
+
+def check_regraded(conn, ids):
+    rows = rows_by_id(conn)
+    assert rows[ids["pass"]][0] == PASS.value
+    assert rows[ids["fail"]][0] == FAIL.value
+    assert rows[ids["unchanged"]][0] == PASS.value
+    assert rows[ids["manual"]] == (PASS.value, standards.MANUAL_RULE_VERSION)
+    assert rows[ids["unknown_unit"]][0] == WARNING.value
+    for test_id, (_, version) in rows.items():
+        if test_id != ids["manual"]:
+            assert version in standards.CURRENT_RULE_VERSIONS
+    assert stale_rule_versions(conn) == []
+
+def test_regrade_all(conn, graded_rows):
+    progress = []
+    result = regrade_all(conn, chunk_size=2, progress=lambda *args: progress.append(args))
+    assert result == {"processed": 4, "changed": 4}
+    assert progress[-1] == (4, 4)
+    check_regraded(conn, graded_rows)
+
+    # Anden kørsel ændrer intet
+    assert regrade_all(conn) == {"processed": 4, "changed": 0}
+
+def test_regrade_stale(conn, graded_rows):
+    result = regrade_stale(conn, chunk_size=2)
+    # Statusændringer tælles; de to andre får kun en regelversion
+    assert result == {"stale": 4, "processed": 4, "changed": 2}
+    check_regraded(conn, graded_rows)
+    assert regrade_stale(conn) == {"stale": 0, "processed": 0, "changed": 0}
+
+def test_regrade_stale_through_writer(conn, db_path, graded_rows):
+    writer = GroupCommitWriter(db_path)
+    try:
+        result = regrade_stale(conn, writer=writer, write_batch=1)
+    finally:
+        writer.close()
+    assert result == {"stale": 4, "processed": 4, "changed": 2}
+    check_regraded(conn, graded_rows)
+
+def test_regrade_only_touches_stale_versions(conn, add_installation, add_test):
+    add_installation()
+    current = standards.rule_version(RCD, "ms")
+    # Forkert status, men bedømt efter den nuværende regel: røres ikke af regrade_stale
+    kept = add_test(value=600.0, unit="ms", status=PASS, rule_version=current)
+    stale = add_test(value=600.0, unit="ms", status=PASS, rule_version="gammel")
+
+    assert regrade_stale(conn) == {"stale": 1, "processed": 1, "changed": 1}
+    rows = rows_by_id(conn)
+    assert rows[kept] == (PASS.value, current)
+    assert rows[stale] == (FAIL.value, current)
+
+class ChangingExecutor(Executor):
+    """Runs each chunk inline, after letting `change` modify the rows it was read from."""
+
+    def __init__(self, change):
+        self.change = change
+
+    def submit(self, fn, *args, **kwargs):
+        self.change()
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+@pytest.mark.parametrize("change, rule_version", [
+    ("value = 20.0", None),
+    ("unit = 'V'", None),
+    ("notes = '30 mA Type S'", None),
+    ("status = 'Advarsel'", None),
+    ("status = 'Godkendt', rule_version = 'manual'", standards.MANUAL_RULE_VERSION),
+])
+def test_regrade_skips_rows_changed_after_read(conn, add_installation, add_test, change, rule_version):
+    add_installation()
+    test_id = add_test(value=600.0, unit="ms", status=PASS)
+
+    def update():
+        # Som en PUT mellem læsningen og skrivningen af bidden
+        with conn:
+            conn.execute(f"UPDATE test_results SET {change} WHERE id = ?", (test_id,))
+
+    result = regrade_stale(conn, executor=ChangingExecutor(update))
+    assert result["changed"] == 0
+    # Rækken er ikke overskrevet; næste kørsel tager den
+    assert rows_by_id(conn)[test_id][1] == rule_version
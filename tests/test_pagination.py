@@ -0,0 +1,34 @@
+import base64
+import json
+
+import pytest
+
+from src.data.pagination import decode_cursor, encode_cursor
+
+@pytest.mark.parametrize("key", [
+    ("2025-01-01T12:00:00", 42),
+    ("Jensen El", "INST-1"),
+    (None, 7),
+    (1.5, "æøå"),
+])
+def test_cursor_round_trip(key):
+    cursor = encode_cursor(key)
+    assert "=" not in cursor
+    assert decode_cursor(cursor, len(key)) == key
+
+def raw_cursor(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode("utf-8")).decode("ascii").rstrip("=")
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "ikke-base64!",
+    raw_cursor({"timestamp": "2025-01-01", "id": 1}),
+    raw_cursor(["2025-01-01"]),
+    raw_cursor(["2025-01-01", 1, 2]),
+    raw_cursor(["2025-01-01", True]),
+    raw_cursor(["2025-01-01", [1]]),
+    raw_cursor(["2025-01-01", {"id": 1}]),
+])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, 2)
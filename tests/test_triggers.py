@@ -0,0 +1,194 @@
+from datetime import datetime
+
+from src.data import db as data
+from src.data import changes
+from src.data.installation_status import (
+    INSTALLATION_STATUS_COLUMNS, get_installation_status, rebuild_installation_status
+)
+from src.data.search import rebuild_search_index, search
+from src.data.sync import get_changes, get_latest_version
+from src import models
+from src.models import Task, TaskPriority, TaskStatus
+
+def hit_ids(conn, text, kind):
+    return [hit["id"] for hit in search(conn, text, kinds=[kind])]
+
+def add_task(conn, task_id, title, notes=None, installation_id=None):
+    task = Task(task_id, title, None, TaskStatus.PLANNED, TaskPriority.MEDIUM, installation_id,
+                datetime(2025, 1, 1), None, None, None, None, None, notes)
+    with conn:
+        data.save_task(conn, task)
+
+# Søgeindeks (FTS5)
+
+def test_installation_search_follows_insert_update_delete(conn, add_installation):
+    add_installation("INST-1", customer_name="Jensen El")
+    add_installation("INST-2", customer_name="Hansen Service")
+    assert hit_ids(conn, "jensen", "installation") == ["INST-1"]
+
+    with conn:
+        data.update_installation(conn, "INST-1", {"customer_name": "Nielsen Teknik"})
+    assert hit_ids(conn, "jensen", "installation") == []
+    assert hit_ids(conn, "nielsen", "installation") == ["INST-1"]
+
+    with conn:
+        data.delete_installation(conn, "INST-1")
+    assert hit_ids(conn, "nielsen", "installation") == []
+    assert hit_ids(conn, "hansen", "installation") == ["INST-2"]
+
+def test_search_survives_vacuum(conn, add_installation):
+    for number in range(1, 6):
+        add_installation(f"INST-{number}", customer_name=f"Kunde{number}")
+    add_task(conn, "T-1", "Udskift HPFI", installation_id="INST-5")
+    add_task(conn, "T-2", "Eftersyn tavle", installation_id="INST-5")
+    with conn:
+        for number in range(1, 5):
+            data.delete_installation(conn, f"INST-{number}")
+        data.delete_task(conn, "T-1")
+
+    # VACUUM kan omnummerere rowid; indeksene må ikke pege på de forkerte rækker bagefter
+    conn.execute("VACUUM")
+    assert hit_ids(conn, "kunde5", "installation") == ["INST-5"]
+    assert hit_ids(conn, "tavle", "task") == ["T-2"]
+    assert hit_ids(conn, "hpfi", "task") == []
+
+def test_rebuild_search_index_matches_triggers(conn, add_installation, add_test):
+    add_installation("INST-1", customer_name="Jensen El")
+    add_task(conn, "T-1", "Eftersyn tavle")
+    test_id = add_test(notes="Målt i køkkenet")
+    before = {kind: hit_ids(conn, text, kind)
+              for kind, text in (("installation", "jensen"), ("task", "tavle"), ("test", "køkkenet"))}
+
+    rebuild_search_index(conn)
+    after = {kind: hit_ids(conn, text, kind)
+             for kind, text in (("installation", "jensen"), ("task", "tavle"), ("test", "køkkenet"))}
+    assert before == after == {"installation": ["INST-1"], "task": ["T-1"], "test": [str(test_id)]}
+
+# Seneste resultat pr. testtype (installation_status)
+
+def status_rows(conn, installation_id="INST-1"):
+    return {row[1]: (row[2], row[5]) for row in get_installation_status(conn, installation_id)}
+
+def test_installation_status_keeps_latest_result(conn, add_installation, add_test):
+    add_installation()
+    newest = add_test(status=models.TestStatus.FAIL, timestamp=datetime(2025, 3, 1))
+    add_test(status=models.TestStatus.PASS, timestamp=datetime(2025, 2, 1))
+    isolation = add_test(test_type=models.TestType.ISOLATION, value=2.0, unit="MΩ")
+    assert status_rows(conn) == {
+        models.TestType.RCD.value: (newest, models.TestStatus.FAIL.value),
+        models.TestType.ISOLATION.value: (isolation, models.TestStatus.PASS.value),
+    }
+
+    with conn:
+        data.update_test_result(conn, newest, {"status": models.TestStatus.WARNING.value})
+    assert status_rows(conn)[models.TestType.RCD.value] == (newest, models.TestStatus.WARNING.value)
+
+def test_installation_status_falls_back_when_latest_is_removed(conn, add_installation, add_test):
+    add_installation()
+    older = add_test(status=models.TestStatus.PASS, timestamp=datetime(2025, 2, 1))
+    newest = add_test(status=models.TestStatus.FAIL, timestamp=datetime(2025, 3, 1))
+
+    with conn:
+        data.update_test_result(conn, newest, {"timestamp": datetime(2025, 1, 1).isoformat()})
+    assert status_rows(conn)[models.TestType.RCD.value] == (older, models.TestStatus.PASS.value)
+
+    with conn:
+        data.delete_test_result(conn, older)
+    assert status_rows(conn)[models.TestType.RCD.value] == (newest, models.TestStatus.FAIL.value)
+
+    with conn:
+        data.delete_test_result(conn, newest)
+    assert status_rows(conn) == {}
+
+def test_installation_status_matches_rebuild(conn, add_installation, add_test):
+    add_installation("INST-1")
+    add_installation("INST-2")
+    first = add_test("INST-1")
+    add_test("INST-1", test_type=models.TestType.EARTHING, value=0.5, unit="Ω")
+    add_test("INST-2", status=models.TestStatus.WARNING)
+    with conn:
+        data.update_test_result(conn, first, {"installation_id": "INST-2"})
+        data.delete_test_result(conn, add_test("INST-1"))
+
+    query = f"SELECT {INSTALLATION_STATUS_COLUMNS} FROM installation_status ORDER BY installation_id, test_type"
+    maintained = conn.execute(query).fetchall()
+    rebuild_installation_status(conn)
+    assert conn.execute(query).fetchall() == maintained
+
+# Ændringsversioner (change_versions)
+
+def test_change_versions_bump_on_change(conn, add_installation, add_test):
+    scopes = (changes.INSTALLATIONS_SCOPE, changes.TASKS_SCOPE,
+              changes.test_results_scope("INST-1"), changes.test_results_scope("INST-2"))
+    assert changes.get_change_versions(conn, scopes) == (0, 0, 0, 0)
+
+    add_installation("INST-1")
+    add_installation("INST-2")
+    installations, tasks, tests_1, tests_2 = changes.get_change_versions(conn, scopes)
+    assert installations != 0 and tasks == 0
+
+    test_id = add_test("INST-1")
+    after_insert = changes.get_change_versions(conn, scopes)
+    assert after_insert[2] != tests_1 and after_insert[3] == tests_2
+
+    add_task(conn, "T-1", "Eftersyn")
+    assert changes.get_change_versions(conn, scopes)[1] != tasks
+
+    with conn:
+        data.update_test_result(conn, test_id, {"notes": "ny bemærkning"})
+    after_update = changes.get_change_versions(conn, scopes)
+    assert after_update[2] != after_insert[2] and after_update[3] == after_insert[3]
+
+def test_change_versions_ignore_rule_version_only_update(conn, add_installation, add_test):
+    add_installation()
+    test_id = add_test(rule_version="old")
+    scope = (changes.test_results_scope("INST-1"),)
+    before = changes.get_change_versions(conn, scope)
+
+    with conn:
+        conn.execute("UPDATE test_results SET rule_version = 'new' WHERE id = ?", (test_id,))
+    assert changes.get_change_versions(conn, scope) == before
+
+# Ændringslog til synkronisering (change_log)
+
+def test_change_log_keeps_latest_change_per_entity(conn, add_installation, add_test):
+    add_installation("INST-1")
+    test_id = add_test("INST-1")
+    add_task(conn, "T-1", "Eftersyn", installation_id="INST-1")
+    entries, since, has_more = get_changes(conn)
+    # Installationens post flyttes efter testresultatet, da dens compliance-kolonner ændres
+    assert [(entity, entity_id) for _, entity, entity_id, _ in entries] == [
+        ("test", str(test_id)), ("installation", "INST-1"), ("task", "T-1")
+    ]
+    assert not has_more and since == get_latest_version(conn)
+
+    with conn:
+        data.update_installation(conn, "INST-1", {"address": "Nørregade 2"})
+    entries, _, _ = get_changes(conn, since)
+    assert [(entity, entity_id) for _, entity, entity_id, _ in entries] == [("installation", "INST-1")]
+    assert entries[0][3][1] == "Nørregade 2"
+
+    # Stadig én post pr. række
+    all_changes, _, _ = get_changes(conn)
+    assert len(all_changes) == 3
+
+def test_change_log_tombstones_deleted_rows(conn, add_installation, add_test):
+    add_installation("INST-1")
+    test_id = add_test("INST-1")
+    _, since, _ = get_changes(conn)
+
+    with conn:
+        data.delete_test_result(conn, test_id)
+    entries, _, _ = get_changes(conn, since)
+    assert [(entity, entity_id, row is None) for _, entity, entity_id, row in entries] == [
+        ("test", str(test_id), True), ("installation", "INST-1", False)
+    ]
+
+def test_change_log_pages(conn, add_installation):
+    for number in range(5):
+        add_installation(f"INST-{number}")
+    first, since, has_more = get_changes(conn, limit=3)
+    assert len(first) == 3 and has_more
+    rest, _, has_more = get_changes(conn, since, limit=3)
+    assert len(rest) == 2 and not has_more
+    assert [entity_id for _, _, entity_id, _ in first + rest] == [f"INST-{number}" for number in range(5)]
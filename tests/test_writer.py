@@ -0,0 +1,93 @@
+import sqlite3
+import threading
+
+import pytest
+
+from src.data.writer import GroupCommitWriter, WriterClosedError, WriterQueueFullError
+
+def insert_task(conn, task_id: str):
+    conn.execute(
+        "INSERT INTO tasks (id, title, status, priority, created_date) VALUES (?, ?, 'Planlagt', 'Medium', '2025-01-01')",
+        (task_id, f"Opgave {task_id}")
+    )
+    return task_id
+
+def insert_then_fail(conn, task_id: str):
+    insert_task(conn, task_id)
+    raise ValueError("fejl efter indsættelse")
+
+def task_ids(conn):
+    return {row[0] for row in conn.execute("SELECT id FROM tasks")}
+
+@pytest.fixture
+def writer(db_path):
+    writer = GroupCommitWriter(db_path)
+    yield writer
+    writer.close()
+
+def block(writer):
+    """Occupy the writer thread until the returned event is set."""
+    started = threading.Event()
+    release = threading.Event()
+
+    def wait(conn):
+        started.set()
+        release.wait(5)
+
+    future = writer.submit(wait)
+    assert started.wait(5)
+    return release, future
+
+def test_submit_returns_result(writer, conn):
+    assert writer.submit(insert_task, "T-1").result(5) == "T-1"
+    assert task_ids(conn) == {"T-1"}
+
+def test_failing_write_is_rolled_back_alone(writer, conn):
+    release, blocker = block(writer)
+    futures = [
+        writer.submit(insert_task, "T-1"),
+        writer.submit(insert_then_fail, "T-2"),
+        writer.submit(insert_task, "T-1"),  # dublet: IntegrityError
+        writer.submit(insert_task, "T-3"),
+    ]
+    release.set()
+    blocker.result(5)
+
+    assert futures[0].result(5) == "T-1"
+    with pytest.raises(ValueError):
+        futures[1].result(5)
+    with pytest.raises(sqlite3.IntegrityError):
+        futures[2].result(5)
+    assert futures[3].result(5) == "T-3"
+
+    # Den fejlende skrivnings egen indsættelse er rullet tilbage, de andre er committet
+    assert task_ids(conn) == {"T-1", "T-3"}
+    stats = writer.stats()
+    assert stats["max_batch"] >= 4
+    assert stats["failed"] == 2
+    assert stats["batch_errors"] == 0
+
+def test_full_queue_is_rejected(db_path):
+    writer = GroupCommitWriter(db_path, max_queue=1)
+    try:
+        release, blocker = block(writer)
+        queued = writer.submit(insert_task, "T-1")
+        with pytest.raises(WriterQueueFullError):
+            writer.submit(insert_task, "T-2")
+        release.set()
+        assert queued.result(5) == "T-1"
+        assert writer.stats()["rejected"] == 1
+    finally:
+        writer.close()
+
+def test_close_commits_queued_writes_then_rejects(db_path, conn):
+    writer = GroupCommitWriter(db_path)
+    release, blocker = block(writer)
+    queued = writer.submit(insert_task, "T-1")
+    release.set()
+    writer.close()
+
+    assert queued.result(5) == "T-1"
+    assert task_ids(conn) == {"T-1"}
+    with pytest.raises(WriterClosedError):
+        writer.submit(insert_task, "T-2")